@@ -0,0 +1,75 @@
+"""
+Compare ACE parsing throughput of the regex and the tokenizer
+
+The sample lines are parsed `repeat` times, the valid ACEs of generated IOS and ASA
+ACLs of `lines` lines once.
+
+Usage:
+    python -m benchmarks.bench_ace_match [repeat] [lines]
+"""
+import re
+import sys
+import time
+from benchmarks.generate import generate_acl
+from cisco_acl.regexes import ace_match, ace_regex_match, ace_tokenize, cisco_acl_regex
+
+valid_aces = [
+    'permit tcp any any eq 80',
+    'permit tcp 172.30.0.0 0.0.255.255 any established',
+    'permit tcp any host 1.1.1.1 eq 80 443',
+    'permit udp host 10.1.1.1 eq 53 any',
+    'permit tcp object-group some_hosts host www.cisco.com range ftp-data ftp',
+    'deny ip any host 2001:420:210d::a log',
+    '10 permit tcp any addrgroup some_hosts eq 80',
+    'access-list outside extended permit tcp any host 77.100.100.221 eq 22 (hitcnt=0) 0x0540b3cb',
+    'access-list outside extended deny ip any any (hitcnt=12) 0x1e3b4c5d',
+]
+
+# Invalid ACEs make the regex backtrack; the cost grows exponentially with the length of the port list
+invalid_aces = [
+    'permit tcp any host eq 80',
+    'permit tcp any any eq 80 443 8080 host 1.1.1.1',
+    'permit udp any any range 1 2 3',
+]
+
+
+def ace_match_uncompiled(ace):
+    """ ace_match as it was before the tokenizer: the pattern is compiled on every call """
+    match = re.compile(cisco_acl_regex, re.I).match(ace.lower())
+    return match.groupdict() if match else False
+
+
+def lines_per_second(func, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            func(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+
+def generated_aces(lines, acl_format):
+    """ The ACEs of a generated ACL, without object-group definitions and remarks """
+    return [line for line in generate_acl(lines, acl_format)
+            if not line.startswith(('object-group', ' ')) and 'remark' not in line]
+
+
+def main(repeat=1000, lines=20000):
+    workloads = [
+        ('valid', valid_aces, repeat),
+        ('invalid', invalid_aces, max(1, repeat // 10)),
+        ('ios', generated_aces(lines, 'ios'), 1),
+        ('asa', generated_aces(lines, 'asa'), 1),
+    ]
+    for workload, aces, count in workloads:
+        for name, func in [
+            ('before (re.compile per call)', ace_match_uncompiled),
+            ('compiled regex (ace_regex_match)', ace_regex_match),
+            ('tokenizer (ace_tokenize)', ace_tokenize),
+            ('ace_match', ace_match),
+        ]:
+            print('{0:<8} {1:<34} {2:>12,.0f} lines/sec'.format(
+                workload, name, lines_per_second(func, aces, count)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,73 @@
+"""
+Measure the import time of the package, and check it against a budget
+
+Every module is imported in a fresh interpreter with -X importtime; the time
+reported is the best of several runs, the cumulative time of the top-level
+cisco_acl imports (including the standard library modules they pull in).
+Bytecode caches are written on the first run, as for an installed package.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat N] [--budget MS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+modules = [
+    'cisco_acl',
+    'cisco_acl.regexes',
+    'cisco_acl.port_translations',
+    'cisco_acl.convert_mask',
+    'cisco_acl.acl_audit',
+]
+
+
+def import_time(module):
+    """
+    Import a module in a new interpreter
+
+    Args:
+        module (str): module name
+
+    Returns:
+        float: milliseconds spent importing the cisco_acl modules and their dependencies
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True, env=env,
+    ).stderr
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Imports are indented by nesting level: only the top-level one is counted, it includes
+        # the package and every module it pulls in (the standard library ones too)
+        if name.startswith('  ') or name.split('.')[0].strip() != 'cisco_acl':
+            continue
+        total += int(cumulative)
+    return total / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the import time of cisco_acl')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=None, help='maximum import time of any module, in ms')
+    args = parser.parse_args(argv)
+
+    over_budget = False
+    for module in modules:
+        milliseconds = min(import_time(module) for _ in range(args.repeat + 1))
+        print('{0:<30} {1:>8.2f} ms'.format(module, milliseconds))
+        if args.budget is not None and milliseconds > args.budget:
+            over_budget = True
+    if over_budget:
+        print('Import time over the budget of {0} ms'.format(args.budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
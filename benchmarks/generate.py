@@ -0,0 +1,161 @@
+"""
+Generate synthetic IOS and ASA ACLs for benchmarks
+
+The generated ACLs mix the features seen in production configs: hosts,
+wildcard/subnet masks, IPv6 hosts, object-groups (with their definitions),
+named ports, port ranges, keywords, remarks, and ASA hitcnt suffixes.  Every
+generated ACE is valid; the same seed always gives the same ACL.
+
+Usage:
+    python -m benchmarks.generate [--format ios|asa] [--seed N] lines output
+"""
+import argparse
+import gzip
+import random
+from cisco_acl.port_translations import translation_groups
+
+acl_formats = ['ios', 'asa']
+
+
+def _ipv4(rng):
+    return '{0}.{1}.{2}.{3}'.format(rng.choice([10, 172, 192, 198]), rng.randint(0, 255),
+                                    rng.randint(0, 255), rng.randint(1, 254))
+
+
+def _network(rng, acl_format, groups):
+    kind = rng.random()
+    if kind < 0.15:
+        return 'any'
+    if kind < 0.45:
+        return 'host ' + _ipv4(rng)
+    if kind < 0.50:
+        return 'host 2001:db8:{0:x}::{1:x}'.format(rng.randint(0, 0xffff), rng.randint(1, 0xffff))
+    if kind < 0.60:
+        return 'object-group ' + rng.choice(groups)
+
+    length = rng.choice([8, 16, 24, 24, 24, 28, 30])
+    address = rng.getrandbits(32) >> (32 - length) << (32 - length)
+    address = '.'.join(str(address >> shift & 255) for shift in (24, 16, 8, 0))
+    mask = ((1 << length) - 1) << (32 - length)
+    if acl_format == 'ios':
+        mask ^= (1 << 32) - 1
+    return '{0} {1}'.format(address, '.'.join(str(mask >> shift & 255) for shift in (24, 16, 8, 0)))
+
+
+def _port(rng, acl_format, protocol):
+    if rng.random() < 0.3:
+        return rng.choice(list(translation_groups[acl_format][protocol]))
+    return str(rng.choice([22, 25, 53, 80, 443, 1433, 3306, 3389, 8080, 8443, rng.randint(1024, 65535)]))
+
+
+def _ports(rng, acl_format, protocol):
+    kind = rng.random()
+    if kind < 0.55:
+        return 'eq ' + _port(rng, acl_format, protocol)
+    if kind < 0.65:
+        return 'eq {0} {1}'.format(_port(rng, acl_format, protocol), _port(rng, acl_format, protocol))
+    if kind < 0.80:
+        low = rng.randint(1, 60000)
+        return 'range {0} {1}'.format(low, low + rng.randint(1, 5000))
+    if kind < 0.90:
+        return '{0} {1}'.format(rng.choice(['gt', 'lt']), rng.randint(1024, 60000))
+    return None
+
+
+def _ace(rng, acl_format, groups):
+    action = 'permit' if rng.random() < 0.8 else 'deny'
+    protocol = rng.choice(['tcp', 'tcp', 'tcp', 'udp', 'ip', 'icmp'])
+    ace = [action, protocol, _network(rng, acl_format, groups)]
+    if protocol in ('tcp', 'udp') and rng.random() < 0.1:
+        ace.append('eq ' + _port(rng, acl_format, protocol))
+    ace.append(_network(rng, acl_format, groups))
+
+    ports = _ports(rng, acl_format, protocol) if protocol in ('tcp', 'udp') else None
+    if ports:
+        ace.append(ports)
+    if protocol == 'tcp' and rng.random() < 0.05 and acl_format == 'ios':
+        ace.append('established')
+    elif protocol == 'icmp' and rng.random() < 0.3:
+        ace.append('echo')
+    elif rng.random() < 0.05 and not (ports and ports.startswith('eq') and not ports.split()[-1].isdigit()):
+        ace.append('log')  # after a port name, 'log' would be taken for a port
+    return ace
+
+
+def _object_groups(rng, count, acl_format):
+    names = ['group{0}'.format(n) for n in range(count)]
+    lines = []
+    for name in names:
+        lines.append('object-group network ' + name)
+        for _ in range(rng.randint(1, 4)):
+            member = 'host ' + _ipv4(rng)
+            lines.append((' network-object ' if acl_format == 'asa' else ' ') + member)
+    return names, lines
+
+
+def generate_acl(lines=1000, acl_format='ios', seed=0, name='bench'):
+    """
+    Generate a synthetic ACL
+
+    Args:
+        lines (int): number of ACEs
+        acl_format (str): 'ios' or 'asa'
+        seed (int): random seed
+        name (str): name of the ASA access-list
+
+    Returns:
+        generator: lines of the ACL, object-group definitions first
+    """
+    if acl_format not in acl_formats:
+        raise ValueError('Unknown ACL format: {0}'.format(acl_format))
+    rng = random.Random(seed)
+    groups, definitions = _object_groups(rng, max(1, lines // 200), acl_format)
+    yield from definitions
+
+    for n in range(1, lines + 1):
+        if rng.random() < 0.02:
+            remark = 'remark generated rule block {0}'.format(n)
+            yield 'access-list {0} {1}'.format(name, remark) if acl_format == 'asa' else remark
+
+        ace = _ace(rng, acl_format, groups)
+        if acl_format == 'ios':
+            if rng.random() < 0.3:
+                ace.insert(0, str(n * 10))
+            yield ' '.join(ace)
+            continue
+
+        line = 'access-list {0} extended {1}'.format(name, ' '.join(ace))
+        # The hitcnt suffix is not accepted after ranges and keywords
+        if rng.random() < 0.5 and ace[-1] not in ('log', 'echo') and not any(part.startswith('range') for part in ace):
+            line += ' (hitcnt={0}) 0x{1:08x}'.format(rng.randint(0, 10 ** 6), rng.getrandbits(32))
+        yield line
+
+
+def write_acl(path, lines=1000, acl_format='ios', seed=0):
+    """
+    Write a synthetic ACL to a file (compressed if the path ends in .gz)
+
+    Args:
+        path (str): output file
+        lines (int): number of ACEs
+        acl_format (str): 'ios' or 'asa'
+        seed (int): random seed
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, mode='wt') as f:
+        for line in generate_acl(lines, acl_format, seed):
+            f.write(line + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic ACL')
+    parser.add_argument('lines', type=int, help='number of ACEs')
+    parser.add_argument('output', help='output file (.gz to compress)')
+    parser.add_argument('--format', choices=acl_formats, default='ios')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    write_acl(args.output, args.lines, args.format, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark the library on synthetic ACLs and report the results as JSON
+
+Each benchmark is timed on its own, then run again under tracemalloc for its
+peak memory (skip with --no-memory, tracemalloc slows everything down).
+Results can be saved and compared across commits:
+
+Usage:
+    python -m benchmarks.run [--sizes 1000 10000] [--formats ios asa] [--output results.json]
+    python -m benchmarks.run --compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from cisco_acl import __version__
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.convert_mask import translate_mask
+from cisco_acl.port_translations import PortTranslator
+from cisco_acl.regexes import ace_match
+from benchmarks.generate import generate_acl
+
+
+def bench_ace_match(lines, acl_format):
+    for line in lines:
+        ace_match(line.strip())
+
+
+def bench_audit(lines, acl_format):
+    AclAuditor(acl=lines, format=acl_format)
+
+
+def bench_translate_mask(lines, acl_format):
+    if acl_format == 'ios':
+        translate_mask(lines, 'wc', 'cidr')
+    else:
+        translate_mask(lines, 'subnet', 'cidr')
+
+
+def bench_translate_ports(lines, acl_format):
+    for line in lines:
+        try:
+            PortTranslator(line).translate_ace(acl_format=acl_format, conversion_type='to_number')
+        except SyntaxError:  # remarks and object-groups
+            pass
+
+
+benchmarks = {
+    'ace_match': bench_ace_match,
+    'AclAuditor': bench_audit,
+    'translate_mask': bench_translate_mask,
+    'PortTranslator.translate_ace': bench_translate_ports,
+}
+
+
+def run_benchmark(name, lines, acl_format, memory=True):
+    """
+    Time a benchmark and measure its peak memory
+
+    Args:
+        name (str): benchmark name (see benchmarks)
+        lines (list): lines of the ACL
+        acl_format (str): 'ios' or 'asa'
+        memory (bool): measure the peak memory with tracemalloc
+
+    Returns:
+        dict: benchmark results
+    """
+    func = benchmarks[name]
+    start = time.perf_counter()
+    func(lines, acl_format)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func(lines, acl_format)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'benchmark': name,
+        'format': acl_format,
+        'lines': len(lines),
+        'seconds': round(seconds, 4),
+        'lines_per_sec': round(len(lines) / seconds),
+        'peak_memory': peak,
+    }
+
+
+def run(sizes=(1000, 10000), formats=('ios', 'asa'), names=None, memory=True, seed=0):
+    """
+    Run the benchmarks on generated ACLs of every size and format
+
+    Returns:
+        dict: environment and list of benchmark results
+    """
+    results = []
+    for acl_format in formats:
+        for size in sizes:
+            lines = list(generate_acl(size, acl_format, seed))
+            for name in names or benchmarks:
+                result = run_benchmark(name, lines, acl_format, memory)
+                print('{benchmark:<30} {format:<4} {lines:>9} lines {lines_per_sec:>12,} lines/sec'.format(**result),
+                      file=sys.stderr)
+                results.append(result)
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(before, after):
+    """
+    Compare the throughput of two benchmark runs
+
+    Args:
+        before (dict): results of run()
+        after (dict): results of run()
+
+    Returns:
+        list: (benchmark, format, lines, speedup) tuples, speedup > 1 means after is faster
+    """
+    baseline = {(r['benchmark'], r['format'], r['lines']): r for r in before['results']}
+    comparison = []
+    for result in after['results']:
+        key = (result['benchmark'], result['format'], result['lines'])
+        if key in baseline:
+            comparison.append(key + (round(result['lines_per_sec'] / baseline[key]['lines_per_sec'], 2),))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cisco_acl on synthetic ACLs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--formats', nargs='+', choices=['ios', 'asa'], default=['ios', 'asa'])
+    parser.add_argument('--benchmarks', nargs='+', choices=list(benchmarks))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false')
+    parser.add_argument('--output', help='write the results to this file instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        for name, acl_format, lines, speedup in compare(before, after):
+            print('{0:<30} {1:<4} {2:>9} lines {3:>6.2f}x'.format(name, acl_format, lines, speedup))
+        return
+
+    results = json.dumps(run(args.sizes, args.formats, args.benchmarks, args.memory, args.seed), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+import sys
+from cisco_acl.cli import main
+
+sys.exit(main())
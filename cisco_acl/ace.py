@@ -0,0 +1,739 @@
+"""
+Compact, integer encoded model of parsed ACEs
+
+An Ace stores its fields as integers instead of the strings returned by
+cisco_acl.regexes.ace_match:
+* action: PERMIT or DENY
+* protocol: IP protocol number (0 for 'ip', which matches every protocol)
+* source/destination: Network(address, mask, version) with integer address and mask
+* source_ports/destination_ports: tuple of inclusive (low, high) port ranges
+
+Masks are always stored as network masks (bits set must match), whether the
+ACE used a wildcard mask (IOS) or a subnet mask (ASA).  'any' is stored with
+version 0, which matches both IPv4 and IPv6.
+
+References that can only be resolved with the rest of the config
+(object-group, addrgroup, port-group, host names) are kept as their original
+text.
+
+An Acl stores many ACEs in array backed columns, which takes a fraction of
+the memory of the equivalent permission dicts.
+
+Examples:
+    >>> ace = Ace.from_line('permit tcp 10.0.1.0 0.0.0.255 any eq 443')
+    >>> ace.protocol, ace.source, ace.destination_ports
+    (6, Network(address=167772416, mask=4294967040, version=4), ((443, 443),))
+    >>> acl = Acl.from_lines(['permit tcp any any eq www', 'deny ip any any'])
+    >>> acl[1] == Ace.from_line('deny ip any any')
+    True
+"""
+import logging
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+from ipaddress import ip_address
+from cisco_acl.regexes import ace_match
+from cisco_acl import port_translations
+from cisco_acl.port_translations import translate_port
+
+logging.getLogger(__name__)
+
+DENY = 0
+PERMIT = 1
+
+Network = namedtuple('Network', ['address', 'mask', 'version'])
+ANY = Network(0, 0, 0)
+ALL_PORTS = ((0, 65535),)
+
+MAX_MASK = {0: 0, 4: (1 << 32) - 1, 6: (1 << 128) - 1}
+
+PROTOCOLS = {
+    'ip': 0, 'icmp': 1, 'igmp': 2, 'tcp': 6, 'udp': 17, 'gre': 47, 'esp': 50, 'ahp': 51,
+    'eigrp': 88, 'ospf': 89, 'pim': 103, 'pcp': 108,
+}
+
+PROTOCOL_NAMES = {number: name for name, number in PROTOCOLS.items()}
+
+KEYWORDS = frozenset(['established', 'echo', 'echo-reply', 'time-exceeded', 'unreachable', 'log'])
+
+
+def _address(text):
+    """ Return the integer value and version of an address, without ipaddress for plain IPv4 """
+    octets = text.split('.')
+    if len(octets) == 4:
+        value = 0
+        for octet in octets:
+            if not octet.isdigit() or len(octet) > 3 or (octet[0] == '0' and len(octet) > 1) or int(octet) > 255:
+                break
+            value = value << 8 | int(octet)
+        else:
+            return value, 4
+    address = ip_address(text)  # raises the ipaddress error for invalid addresses
+    return int(address), address.version
+
+
+@lru_cache(maxsize=65536)
+def parse_network(network, mask_type='wc'):
+    """
+    Encode the source or destination of an ACE
+
+    Args:
+        network (str): network from ace_match (ex. 'any', 'host 1.1.1.1', '10.0.0.0 0.0.0.255')
+        mask_type (str): 'wc' (wildcard mask) or 'subnet' (subnet mask)
+
+    Returns:
+        Network, or the original text for object-groups, addrgroups and host names
+
+    Raises:
+        ValueError: invalid address or mask, or host bits set
+    """
+    words = network.split()
+    if not words:
+        raise ValueError('Missing network')
+    if words[0] == 'any':
+        return ANY
+    if words[0] == 'any4':
+        return Network(0, 0, 4)
+    if words[0] in ('object-group', 'addrgroup'):
+        return network
+
+    if words[0] == 'host':
+        try:
+            host, version = _address(words[1])
+        except ValueError:
+            if words[1].replace('.', '').isdigit():
+                raise
+            return network  # host name
+        return Network(host, MAX_MASK[version], version)
+
+    address, version = _address(words[0])
+    mask = _address(words[1])[0]
+    if version != 4:
+        raise ValueError('Only IPv4 networks take a mask: {0}'.format(network))
+    if mask_type == 'wc':
+        mask ^= MAX_MASK[4]
+    elif mask_type != 'subnet':
+        raise ValueError('Unknown mask type: {0}'.format(mask_type))
+    if address & ~mask:
+        raise ValueError('{0} has host bits set'.format(network))
+    return Network(address, mask, 4)
+
+
+def split_port_keyword(words, protocol='tcp', acl_format='ios'):
+    """
+    Split the words of a port list into the port words and a keyword swallowed by it
+
+    ace_match lets port names run into the keywords that follow them (ex. 'eq www log').
+    A word is only a keyword once the ports of the operator were read (one port, two
+    for range) and if it is not a port name of the protocol ('echo' is also port 7).
+
+    Args:
+        words (list): words of the port list, operator first (ex. ['eq', 'www', 'log'])
+        protocol (str): 'tcp' or 'udp'
+        acl_format (str): 'ios' or 'asa'
+
+    Returns:
+        tuple: (port words, operator first; keyword or None)
+
+    Examples:
+        >>> split_port_keyword(['eq', 'echo', 'log'], 'udp')
+        (['eq', 'echo'], 'log')
+        >>> split_port_keyword(['eq', 'www', 'echo'], 'tcp')
+        (['eq', 'www', 'echo'], None)
+    """
+    names = port_translations.translation_groups.get(acl_format, {}).get(protocol, {})
+    for i in range(3 if words[0].startswith('r') else 2, len(words)):
+        if words[i] in KEYWORDS and words[i] not in names:
+            return words[:i], words[i]
+    return words, None
+
+
+@lru_cache(maxsize=4096)
+def parse_ports(ports, protocol='tcp', acl_format='ios'):
+    """
+    Encode the source or destination ports of an ACE
+
+    Args:
+        ports (str): ports from ace_match (ex. 'eq 80 443', 'range ftp-data ftp', 'gt 1023')
+        protocol (str): 'tcp' or 'udp', used to translate port names
+        acl_format (str): 'ios' or 'asa', used to translate port names
+
+    Returns:
+        tuple: (low, high) port ranges, or the original text for object-groups and port-groups
+
+    Raises:
+        ValueError: unknown port name or port out of range
+    """
+    if ports is None:
+        return ALL_PORTS
+
+    words = ports.split()
+    op = words[0]
+    if op in ('object-group', 'port-group'):
+        return ports
+
+    numbers = []
+    words, _ = split_port_keyword(words, protocol, acl_format)
+    for port in words[1:]:
+        number = translate_port(acl_format, protocol, [port], 'to_number')[0]
+        if not number.isdigit() or int(number) > 65535:
+            raise ValueError('Invalid port: {0} {1}'.format(protocol, port))
+        numbers.append(int(number))
+
+    if op in ('e', 'eq'):
+        return tuple((p, p) for p in sorted(set(numbers)))
+    if op.startswith('r') and len(numbers) == 2:
+        low, high = numbers
+        if low > high:
+            raise ValueError('Invalid port range: {0}'.format(ports))
+        return (low, high),
+    if len(numbers) != 1:
+        raise ValueError('Invalid ports: {0}'.format(ports))
+
+    port = numbers[0]
+    if op == 'gt':
+        ranges = ((port + 1, 65535),)
+    elif op == 'ge':
+        ranges = ((port, 65535),)
+    elif op == 'lt':
+        ranges = ((0, port - 1),)
+    elif op == 'le':
+        ranges = ((0, port),)
+    else:  # ne
+        ranges = ((0, port - 1), (port + 1, 65535))
+    return tuple((low, high) for low, high in ranges if low <= high)
+
+
+def format_network(network, acl_format='ios'):
+    """
+    Render an encoded network as ACE text, the reverse of parse_network
+
+    Args:
+        network: Network or reference text
+        acl_format (str): 'ios' (wildcard masks) or 'asa' (subnet masks)
+
+    Returns:
+        str
+
+    Examples:
+        >>> format_network(parse_network('10.0.1.0 0.0.0.255'), 'asa')
+        '10.0.1.0 255.255.255.0'
+    """
+    if isinstance(network, str):
+        return network
+    if network == ANY:
+        return 'any'
+    if network.mask == 0 and network.version == 4:
+        return 'any4'
+    address = ip_address(network.address) if network.version == 6 else ip_address(network.address & MAX_MASK[4])
+    if network.mask == MAX_MASK[network.version]:
+        return 'host {0}'.format(address)
+    if network.version == 6:
+        return '{0}/{1}'.format(address, 128 - (MAX_MASK[6] ^ network.mask).bit_length())
+    mask = network.mask if acl_format == 'asa' else network.mask ^ MAX_MASK[4]
+    return '{0} {1}'.format(address, ip_address(mask))
+
+
+def format_ports(ports):
+    """
+    Render encoded ports as ACE text, the reverse of parse_ports
+
+    Args:
+        ports: tuple of (low, high) port ranges or reference text
+
+    Returns:
+        str: ports (ex. 'eq 80 443', 'range 1000 2000'), None for all ports
+
+    Raises:
+        ValueError: the ranges can't be written as a single port list
+
+    Examples:
+        >>> format_ports(((22, 22), (80, 80)))
+        'eq 22 80'
+        >>> format_ports(((1024, 65535),))
+        'gt 1023'
+    """
+    if isinstance(ports, str):
+        return ports
+    if ports == ALL_PORTS:
+        return None
+    if not ports:
+        return 'gt 65535'  # no port, parse_ports gives () back
+    if all(low == high for low, high in ports):
+        return 'eq ' + ' '.join(str(low) for low, high in ports)
+    if len(ports) == 2 and ports[0][0] == 0 and ports[1][1] == 65535 and ports[0][1] + 2 == ports[1][0]:
+        return 'ne {0}'.format(ports[0][1] + 1)
+    if len(ports) != 1:
+        raise ValueError('Ports need more than one ACE: {0}'.format(ports))
+    low, high = ports[0]
+    if high == 65535:
+        return 'gt {0}'.format(low - 1)
+    if low == 0:
+        return 'lt {0}'.format(high + 1)
+    return 'range {0} {1}'.format(low, high)
+
+
+# Keywords that narrow down the traffic an ACE matches ('log' does not)
+FILTER_KEYWORDS = frozenset(['established', 'echo', 'echo-reply', 'time-exceeded', 'unreachable'])
+
+
+def prefix_length(network):
+    """
+    Return the prefix length of a network, or None if its mask is not contiguous
+
+    Examples:
+        >>> prefix_length(parse_network('10.0.1.0 0.0.0.255'))
+        24
+    """
+    bits = 128 if network.version == 6 else 32
+    length = bits - (MAX_MASK[network.version or 4] ^ network.mask).bit_length()
+    if network.version and network.mask != (MAX_MASK[network.version] >> length) ^ MAX_MASK[network.version]:
+        return None
+    return length
+
+
+def network_covers(outer, inner):
+    """
+    Check if every address of inner is in outer
+
+    Args:
+        outer: Network or reference text
+        inner: Network or reference text
+
+    Returns:
+        bool
+    """
+    if outer == ANY or outer == inner:
+        return True
+    if isinstance(outer, str) or isinstance(inner, str) or outer.version != inner.version:
+        return False
+    return outer.mask & ~inner.mask == 0 and inner.address & outer.mask == outer.address
+
+
+def ports_cover(outer, inner):
+    """
+    Check if every port range of inner is in outer
+
+    Args:
+        outer: tuple of (low, high) port ranges or reference text
+        inner: tuple of (low, high) port ranges or reference text
+
+    Returns:
+        bool
+    """
+    if outer == ALL_PORTS or outer == inner:
+        return True
+    if isinstance(outer, str) or isinstance(inner, str):
+        return False
+
+    merged = []
+    for low, high in sorted(outer):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return all(any(low <= first and last <= high for low, high in merged) for first, last in inner)
+
+
+def network_overlaps(first, second):
+    """
+    Check if two networks may have an address in common
+
+    References (object-groups, host names) may overlap anything.
+
+    Args:
+        first: Network or reference text
+        second: Network or reference text
+
+    Returns:
+        bool
+
+    Examples:
+        >>> network_overlaps(parse_network('10.0.0.0 0.0.255.255'), parse_network('host 10.0.1.1'))
+        True
+        >>> network_overlaps(parse_network('10.0.0.0 0.0.0.255'), parse_network('10.0.1.0 0.0.0.255'))
+        False
+    """
+    if isinstance(first, str) or isinstance(second, str) or first == ANY or second == ANY:
+        return True
+    if first.version != second.version:
+        return False
+    # Works for non-contiguous masks too: the addresses agree on the bits both networks match
+    return (first.address ^ second.address) & first.mask & second.mask == 0
+
+
+def ports_overlap(first, second):
+    """
+    Check if two port lists have a port in common
+
+    Args:
+        first: tuple of (low, high) port ranges or reference text
+        second: tuple of (low, high) port ranges or reference text
+
+    Returns:
+        bool
+    """
+    if isinstance(first, str) or isinstance(second, str):
+        return bool(first) and bool(second)
+    return any(low <= other_high and other_low <= high for low, high in first for other_low, other_high in second)
+
+
+def _keyword(permission):
+    """ Return the keyword of a permission, including keywords swallowed by the port list """
+    keyword = permission['keyword']
+    ports = permission['destination_ports']
+    if keyword is None and ports is not None:
+        words = ports.split()
+        if words[0] not in ('object-group', 'port-group'):
+            keyword = split_port_keyword(words, permission['protocol'], 'asa' if permission['name'] else 'ios')[1]
+    return keyword
+
+
+class Ace:
+    """ An access control entry with integer encoded fields """
+    __slots__ = ('action', 'protocol', 'source', 'source_ports', 'destination', 'destination_ports', 'keyword')
+
+    def __init__(self, action, protocol=0, source=ANY, source_ports=ALL_PORTS,
+                 destination=ANY, destination_ports=ALL_PORTS, keyword=None):
+        self.action = action
+        self.protocol = protocol
+        self.source = source
+        self.source_ports = source_ports
+        self.destination = destination
+        self.destination_ports = destination_ports
+        self.keyword = keyword
+
+    @classmethod
+    def from_permission(cls, permission, mask_type=None):
+        """
+        Build an Ace from a permission returned by ace_match
+
+        Args:
+            permission (dict): permission from ace_match
+            mask_type (str): 'wc' or 'subnet', defaults to 'subnet' for ASA
+                ACEs (which have a name) and 'wc' for IOS ACEs
+
+        Returns:
+            Ace
+
+        Raises:
+            ValueError: invalid network or ports
+        """
+        acl_format = 'asa' if permission['name'] else 'ios'
+        if mask_type is None:
+            mask_type = 'subnet' if permission['name'] else 'wc'
+
+        protocol = permission['protocol']
+        if protocol in PROTOCOLS:
+            protocol_number = PROTOCOLS[protocol]
+        elif protocol.isdigit():
+            protocol_number = int(protocol)
+            if protocol_number > 255:
+                raise ValueError('Invalid protocol: {0}'.format(protocol))
+        else:
+            protocol_number = protocol  # object-group
+
+        if protocol in ('tcp', 'udp'):
+            source_ports = parse_ports(permission['source_ports'], protocol, acl_format)
+            destination_ports = parse_ports(permission['destination_ports'], protocol, acl_format)
+        elif isinstance(protocol_number, str):
+            # Port names depend on the protocols of the group, see ObjectGroups.expand
+            source_ports = permission['source_ports'] or ALL_PORTS
+            destination_ports = permission['destination_ports'] or ALL_PORTS
+        else:
+            source_ports = destination_ports = ALL_PORTS
+
+        return cls(
+            PERMIT if permission['action'] == 'permit' else DENY,
+            protocol_number,
+            parse_network(permission['source'], mask_type),
+            source_ports,
+            parse_network(permission['destination'], mask_type),
+            destination_ports,
+            _keyword(permission),
+        )
+
+    @classmethod
+    def from_line(cls, line, mask_type=None):
+        """
+        Parse an ACE into an Ace
+
+        Raises:
+            SyntaxError: the line is not a valid ACE
+            ValueError: invalid network or ports
+        """
+        permission = ace_match(line.strip())
+        if not permission:
+            raise SyntaxError('Invalid ACE: {0}'.format(line))
+        return cls.from_permission(permission, mask_type)
+
+    @property
+    def is_resolved(self):
+        """ True if no field refers to an object-group, port-group or host name """
+        return not any(isinstance(field, str) for field in (
+            self.protocol, self.source, self.source_ports, self.destination, self.destination_ports))
+
+    def covers(self, other):
+        """
+        Check if every packet matched by other is also matched by this ACE
+
+        References (object-groups, host names, ...) are only known to cover an
+        identical reference, or to be covered by 'any'.
+
+        Args:
+            other (Ace): ACE to compare to
+
+        Returns:
+            bool
+        """
+        if self.protocol != 0 and self.protocol != other.protocol:
+            return False
+        if self.keyword in FILTER_KEYWORDS and self.keyword != other.keyword:
+            return False
+        return (
+            network_covers(self.source, other.source) and
+            network_covers(self.destination, other.destination) and
+            ports_cover(self.source_ports, other.source_ports) and
+            ports_cover(self.destination_ports, other.destination_ports)
+        )
+
+    def overlaps(self, other):
+        """
+        Check if a packet may be matched by both this ACE and other
+
+        References (object-groups, host names, ...) are assumed to overlap
+        anything, so False is always right but True may not be.
+
+        Args:
+            other (Ace): ACE to compare to
+
+        Returns:
+            bool
+        """
+        if self.protocol != other.protocol and self.protocol != 0 and other.protocol != 0 and not (
+                isinstance(self.protocol, str) or isinstance(other.protocol, str)):
+            return False
+        if (self.keyword in FILTER_KEYWORDS and other.keyword in FILTER_KEYWORDS and
+                self.keyword != other.keyword):
+            return False
+        return (
+            network_overlaps(self.source, other.source) and
+            network_overlaps(self.destination, other.destination) and
+            ports_overlap(self.source_ports, other.source_ports) and
+            ports_overlap(self.destination_ports, other.destination_ports)
+        )
+
+    def to_line(self, acl_format='ios', name=None):
+        """
+        Render the ACE as a line of an ACL
+
+        Ports are written as numbers, and the protocol as a name when it has one.
+
+        Args:
+            acl_format (str): 'ios' or 'asa'
+            name (str): name of the ACL, required for 'asa'
+
+        Returns:
+            str
+
+        Raises:
+            ValueError: the ports can't be written in a single ACE (see format_ports)
+
+        Examples:
+            >>> Ace.from_line('permit tcp 10.0.1.0 0.0.0.255 any eq www').to_line('asa', 'out')
+            'access-list out extended permit tcp 10.0.1.0 255.255.255.0 any eq 80'
+        """
+        protocol = PROTOCOL_NAMES.get(self.protocol, self.protocol)
+        words = ['permit' if self.action == PERMIT else 'deny', str(protocol)]
+        for network, ports in ((self.source, self.source_ports), (self.destination, self.destination_ports)):
+            words.append(format_network(network, acl_format))
+            ports = format_ports(ports)
+            if ports is not None:
+                words.append(ports)
+        if self.keyword is not None:
+            words.append(self.keyword)
+        if acl_format == 'asa':
+            words[:0] = ['access-list', name, 'extended']
+        return ' '.join(words)
+
+    def _key(self):
+        return (self.action, self.protocol, self.source, self.source_ports,
+                self.destination, self.destination_ports, self.keyword)
+
+    def __eq__(self, other):
+        if not isinstance(other, Ace):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return 'Ace({0})'.format(', '.join(repr(field) for field in self._key()))
+
+
+class Acl:
+    """
+    Array backed, ordered collection of ACEs
+
+    Every field is stored in its own column: one entry per ACE in typed arrays,
+    port ranges in a flat array indexed by offsets, and references/keywords in
+    sparse dicts, since most ACEs have none.
+    """
+
+    def __init__(self):
+        self.line_nums = array('I')
+        self.actions = array('B')
+        self.protocols = array('h')  # -1 for object-groups
+        # version, then the high and low 64 bit words of the address and of the mask
+        self._networks = {
+            side: (array('B'), array('Q'), array('Q'), array('Q'), array('Q'))
+            for side in ('source', 'destination')
+        }
+        self._ports = {
+            side: (array('I', [0]), array('H'))  # offsets, flattened (low, high) ranges
+            for side in ('source_ports', 'destination_ports')
+        }
+        self._references = {}  # row -> {field: text}
+        self._keywords = {}  # row -> keyword
+
+    @classmethod
+    def from_permissions(cls, permissions, mask_type=None):
+        """
+        Build an Acl from AclAuditor.permissions
+
+        Permissions that can't be encoded (invalid networks or ports) are skipped.
+
+        Args:
+            permissions (dict): line_num -> permission from ace_match
+            mask_type (str): see Ace.from_permission
+
+        Returns:
+            Acl
+        """
+        acl = cls()
+        for line_num, permission in permissions.items():
+            try:
+                ace = Ace.from_permission(permission, mask_type)
+            except ValueError as e:
+                logging.debug('Skipping line {0}: {1}'.format(line_num, e))
+                continue
+            acl.append(ace, line_num)
+        return acl
+
+    @classmethod
+    def from_lines(cls, lines, mask_type=None):
+        """
+        Build an Acl from the lines of an ACL, skipping invalid ACEs
+
+        Args:
+            lines (iterable): lines of the ACL
+            mask_type (str): see Ace.from_permission
+
+        Returns:
+            Acl
+        """
+        permissions = {}
+        for i, line in enumerate(lines, start=1):
+            permission = ace_match(line.strip())
+            if permission:
+                permissions[i] = permission
+        return cls.from_permissions(permissions, mask_type)
+
+    def append(self, ace, line_num=0):
+        """
+        Append an Ace
+
+        Args:
+            ace (Ace): ACE to append
+            line_num (int): line number of the ACE in its ACL
+        """
+        row = len(self.line_nums)
+        references = {}
+
+        self.line_nums.append(line_num)
+        self.actions.append(ace.action)
+        if isinstance(ace.protocol, str):
+            references['protocol'] = ace.protocol
+            self.protocols.append(-1)
+        else:
+            self.protocols.append(ace.protocol)
+
+        for side in ('source', 'destination'):
+            network = getattr(ace, side)
+            if isinstance(network, str):
+                references[side] = network
+                network = ANY
+            versions, address_high, address_low, mask_high, mask_low = self._networks[side]
+            versions.append(network.version)
+            address_high.append(network.address >> 64)
+            address_low.append(network.address & 0xffffffffffffffff)
+            mask_high.append(network.mask >> 64)
+            mask_low.append(network.mask & 0xffffffffffffffff)
+
+        for side in ('source_ports', 'destination_ports'):
+            ports = getattr(ace, side)
+            offsets, ranges = self._ports[side]
+            if isinstance(ports, str):
+                references[side] = ports
+            else:
+                for low, high in ports:
+                    ranges.append(low)
+                    ranges.append(high)
+            offsets.append(len(ranges))
+
+        if references:
+            self._references[row] = references
+        if ace.keyword is not None:
+            self._keywords[row] = ace.keyword
+
+    def __len__(self):
+        return len(self.line_nums)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('Acl index out of range')
+        references = self._references.get(row, {})
+
+        fields = {}
+        for side in ('source', 'destination'):
+            if side in references:
+                fields[side] = references[side]
+                continue
+            versions, address_high, address_low, mask_high, mask_low = self._networks[side]
+            fields[side] = Network(
+                address_high[row] << 64 | address_low[row],
+                mask_high[row] << 64 | mask_low[row],
+                versions[row],
+            )
+        for side in ('source_ports', 'destination_ports'):
+            if side in references:
+                fields[side] = references[side]
+                continue
+            offsets, ranges = self._ports[side]
+            flat = ranges[offsets[row]:offsets[row + 1]]
+            fields[side] = tuple(zip(flat[::2], flat[1::2]))
+
+        return Ace(
+            self.actions[row],
+            references.get('protocol', self.protocols[row]),
+            fields['source'],
+            fields['source_ports'],
+            fields['destination'],
+            fields['destination_ports'],
+            self._keywords.get(row),
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def items(self):
+        """
+        Returns:
+            generator: (line_num, Ace) tuples, in ACL order
+        """
+        for row in range(len(self)):
+            yield self.line_nums[row], self[row]
@@ -3,21 +3,94 @@ Audit an ACL, checking for the following:
 * Invalid ACEs (syntax errors)
 * Networking errors (invalid IP/subnets)
 * Invalid ports
+* Redundant and shadowed ACEs (warnings, see cisco_acl.shadow)
+* Undefined, circular or invalid object-groups, when the config defines
+  object-groups (see cisco_acl.object_groups)
+* Host names that do not resolve, when a resolver is given (see cisco_acl.resolve)
 
 Supported ACL formats:
 * IOS extended
 * ASA extended
+
+ACLs can be read from a file (optionally gzip compressed), stdin ('-') or any
+iterable of lines. audit_stream() audits line by line in constant memory and
+yields errors as soon as they are found.
+
+The time spent in every phase of an audit can be collected with
+AclAuditor(stats=AuditStats()) or a hook (see cisco_acl.stats).
 """
 import logging
+import os
 import os.path
 import re
-from ipaddress import ip_network, ip_address
-from cisco_acl.regexes import ace_match, ip_address_rx, subnet_rx, dnsname_rx, keyword_rx
+import sys
+from itertools import islice
+from cisco_acl.regexes import ace_match, keyword_rx
 from cisco_acl.port_translations import translate_port
+from cisco_acl.ace import Ace, Acl
+from cisco_acl.object_groups import ObjectGroups
+from cisco_acl.stats import timed, timed_iter
+from cisco_acl.shadow import find_shadowed
+from cisco_acl.validate import network_errors, batch_network_errors
 
 logging.getLogger(__name__)
 
 
+def read_acl(acl):
+    """
+    Read the lines of an ACL
+
+    Args:
+        acl: path to an ACL file (files ending in .gz are decompressed), '-' for stdin,
+            or an iterable of lines (str or bytes)
+
+    Returns:
+        generator: lines of the ACL
+    """
+    if acl == '-':
+        yield from sys.stdin
+        return
+
+    if isinstance(acl, (str, os.PathLike)):
+        path = os.path.abspath(acl)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        if path.endswith('.gz'):
+            import gzip
+            f = gzip.open(path, mode='rt', errors='ignore', encoding='utf-8')
+        else:
+            f = open(path, mode='rt', errors='ignore', encoding='utf-8')
+        with f:
+            yield from f
+        return
+
+    for line in acl:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='ignore')
+        yield line
+
+
+def audit_stream(acl, acl_format='ios'):
+    """
+    Audit an ACL line by line
+
+    Only the current line is kept in memory, so arbitrarily large ACLs can be
+    piped through the audit.
+
+    Args:
+        acl: path to an ACL file, '-' for stdin or an iterable of lines (see read_acl)
+        acl_format (str): 'ios' or 'asa'
+
+    Returns:
+        generator: (line_num, error) tuples, in line order
+
+    Examples:
+        >>> list(audit_stream(['permit tcp any any eq 80', 'permit tcp any host eq 22']))
+        [(2, 'Invalid ACE: permit tcp any host eq 22')]
+    """
+    return AclAuditor(acl=acl, format=acl_format, stream=True).iter_audit()
+
+
 class AclAuditor:
     def __init__(self, **kwargs):
         self.acl = kwargs.get('acl')
@@ -41,9 +114,11 @@ class AclAuditor:
             'action': 'permit',
             'destination': 'any',
             'destination_ports': 'eq 80',
+            'hitcnt': None,
             'keyword': None,
             'name': None,
             'protocol': 'tcp',
+            'rule_hash': None,
             'sequence': None,
             'source': 'any',
             'source_ports': None},
@@ -57,86 +132,268 @@ class AclAuditor:
             10: 'Invalid ACE syntax',
         }
         """
+        self.warnings = {}
+        """
+        warnings = {
+            # line_num: warning
+            7: 'Redundant ACE: already permitted by line 2',
+            9: 'Shadowed ACE: denied by line 3',
+        }
+        """
+        self.shadowing = kwargs.get('shadowing', True)
+        self.object_groups = kwargs.get('object_groups')
+        if self.object_groups is None:
+            self.object_groups = ObjectGroups(self.acl_format)
+        self.cache = kwargs.get('cache')  # AuditCache of per-line results (see cisco_acl.cache)
+        self._cached = set()  # line numbers whose per-line results came from the cache
+        self.stats = kwargs.get('stats')  # AuditStats (see cisco_acl.stats)
+        self.hook = kwargs.get('hook')  # hook(phase, line_num, wall, cpu)
+        self.resolver = kwargs.get('resolver')  # resolves host names (see cisco_acl.resolve), None to skip
+        self.dns_cache = kwargs.get('dns_cache')  # TTLCache of resolved host names, shared between audits
+        if self.stats is not None or self.hook is not None:
+            self._instrument()
+        if not kwargs.get('stream', False):
+            self._audit()
+
+    def _instrument(self):
+        """ Replace the phases of the audit by timed versions reporting to the hooks """
+        hooks = [hook for hook in (self.stats, self.hook) if hook is not None]
+
+        def hook(*event):
+            for h in hooks:
+                h(*event)
+
+        def first_line(permission):
+            return next(iter(permission))
+
+        read, audit = self._read, self._audit
+        self._read = lambda: timed_iter(read(), 'read', hook)
+        self._parse_line = timed(self._parse_line, 'parse', hook, lambda i, line: i)
+        self._add_cached = timed(self._add_cached, 'cache', hook, lambda i, *args: i)
+        self._audit_networks = timed(self._audit_networks, 'networks', hook)
+        self._audit_ports = timed(self._audit_ports, 'ports', hook, first_line)
+        self._audit_object_groups = timed(self._audit_object_groups, 'object_groups', hook, first_line)
+        self._audit_host_names = timed(self._audit_host_names, 'resolve', hook)
+        self._audit_shadowing = timed(self._audit_shadowing, 'shadowing', hook)
+        self.audit_line = timed(self.audit_line, 'audit_line', hook)
+        timed_audit = timed(audit, 'total', hook)
+
+        def counted_audit():
+            hits, misses = (self.cache.hits, self.cache.misses) if self.cache is not None else (0, 0)
+            timed_audit()
+            if self.stats is not None:
+                self.stats.counters.update(
+                    lines_matched=len(self.permissions),
+                    lines_failed=sum(1 for error in self.errors.values() if error.startswith('Invalid ACE: ')),
+                    errors=len(self.errors),
+                    warnings=len(self.warnings),
+                )
+                if self.cache is not None:
+                    self.stats.counters.update(cache_hits=self.cache.hits - hits,
+                                               cache_misses=self.cache.misses - misses)
+        self._audit = counted_audit
+
+    def _audit(self):
         self._parse()
         self._run_audit()
 
+    def _read(self):
+        return read_acl(self.acl)
+
+    def _lines(self):
+        for i, line in enumerate(self._read(), start=1):
+            if self.object_groups.feed(line):  # object-group definitions
+                continue
+
+            line = line.strip()
+            if line == '':  # Skip blank lines
+                continue
+
+            if line.startswith('!'):  # Skip comments
+                continue
+
+            if line.startswith('remark'):
+                self.aces[i] = line
+                continue
+            yield i, line
+
     def _parse(self):
-        acl = os.path.abspath(self.acl)
-        if not os.path.isfile(acl):
-            raise FileNotFoundError
-
-        with open(acl, mode='rt', errors='ignore', encoding='utf-8') as f:
-            for i, line in enumerate(f.readlines(), start=1):
-                line = line.strip()
-                if line == '':  # Skip blank lines
-                    continue
-
-                if line.startswith('!'):  # Skip comments
-                    continue
-
-                if line.startswith('remark'):
-                    self.aces[i] = line
-                    continue
-                ace = ace_match(line)
-                if not ace:
-                    self.errors[i] = 'Invalid ACE: ' + line
+        if self.cache is None:
+            for i, line in self._lines():
+                self._parse_line(i, line)
+            return
+
+        lines = self._lines()
+        while True:
+            chunk = list(islice(lines, 500))
+            if not chunk:
+                break
+            for (i, line), cached in zip(chunk, self.cache.get_many(self.acl_format, [line for i, line in chunk])):
+                if cached is not None:
+                    self._add_cached(i, line, *cached)
                 else:
-                    self.permissions[i] = ace
-                    self.aces[i] = line
+                    self._parse_line(i, line)
+
+    def _parse_line(self, i, line):
+        ace = ace_match(line)
+        if not ace:
+            self.errors[i] = 'Invalid ACE: ' + line
+            if self.cache is not None:
+                self.cache.put(self.acl_format, line, None, None)
+        else:
+            self.permissions[i] = ace
+            self.aces[i] = line
 
     def _run_audit(self):
         logging.info('Processing networking errors ...')
+        uncached = {i: perm for i, perm in self.permissions.items() if i not in self._cached}
+        if uncached:
+            self._audit_networks(uncached)  # in one batch, every distinct network is checked once
         for i, perm in self.permissions.items():
-            self._audit_networks({i: perm})
-            self._audit_ports({i: perm})
+            if i not in self._cached:
+                self._audit_ports({i: perm})
+                if self.cache is not None:
+                    self.cache.put(self.acl_format, self.aces[i], perm, self.errors.get(i))
+            self._audit_object_groups({i: perm})
+        if self.cache is not None:
+            self.cache.flush()
+        if self.resolver is not None:
+            self._audit_host_names()  # not cached: names resolve differently over time
+        if self.shadowing:
+            self._audit_shadowing()
 
-    def _audit_networks(self, permission):
-        for i, perm in permission.items():
-            for net in [perm['source'], perm['destination']]:
-                if net == 'any':
-                    continue
-
-                if net.startswith('object-group') or net.startswith('addrgroup'):
-                    og = net.split()[1]
-                    if not re.match(dnsname_rx, og):
-                        self.errors[i] = 'Invalid object-group: ' + og
-                    else:
-                        continue
+    def _add_cached(self, i, line, perm, error):
+        if perm is None:
+            self.errors[i] = 'Invalid ACE: ' + line
+            return
+        self.permissions[i] = perm
+        self.aces[i] = line
+        self._cached.add(i)
+        if error is not None:
+            self.errors[i] = error
 
-                if net.startswith('host'):
-                    host = net.split()[1]
-
-                    if re.match(ip_address_rx, host):
-                        try:
-                            ip = ip_address(host)
-                        except ValueError:
-                            self.errors[i] = 'Invalid host IP: ' + host
-                    else:
-                        if re.match('\d{1,3}.\d{1,3}.\d{1,3}.\d{1,3}', host):
-                            self.errors[i] = 'Invalid host IP: ' + host
-                        elif not re.match(dnsname_rx, host):
-                            self.errors[i] = 'Invalid host: ' + host
-
-                elif re.match(subnet_rx, net):
-                    try:
-                        network = ip_network('/'.join(net.split()))
-                    except ValueError as e:
-                        self.errors[i] = 'Invalid subnet "{0}": {1}'.format(net, e)
+    def _audit_host_names(self):
+        logging.info('Processing host names ...')
+        from cisco_acl.resolve import resolve_audits  # only loaded (with threads and sockets) when resolving
+        resolve_audits([self], self.resolver, self.dns_cache)
 
-                else:
-                    self.errors[i] = 'Invalid host/network: {0}'.format(net)
+    def _audit_shadowing(self):
+        logging.info('Processing redundant and shadowed ACEs ...')
+        for i, covering, kind in find_shadowed(self.to_acl().items()):
+            action = 'permitted' if self.permissions[covering]['action'] == 'permit' else 'denied'
+            if kind == 'redundant':
+                self.warnings[i] = 'Redundant ACE: already {0} by line {1}'.format(action, covering)
+            else:
+                self.warnings[i] = 'Shadowed ACE: {0} by line {1}'.format(action, covering)
+
+    def to_acl(self):
+        """
+        Encode the permissions without errors as an Acl (see cisco_acl.ace)
+
+        Returns:
+            Acl
+        """
+        permissions = {i: perm for i, perm in self.permissions.items() if i not in self.errors}
+        return Acl.from_permissions(permissions)
+
+    def iter_audit(self):
+        """
+        Audit the ACL line by line without storing aces, permissions or errors
+
+        Returns:
+            generator: (line_num, error) tuples, in line order
+        """
+        for i, line in enumerate(self._read(), start=1):
+            if self.object_groups.feed(line):
+                continue
+            error = self.audit_line(line)
+            if error:
+                yield i, error
+        if self.cache is not None:
+            self.cache.flush()
+
+    def audit_line(self, line):
+        """
+        Audit a single line of an ACL
+
+        Args:
+            line (str): line of the ACL
+
+        Returns:
+            str: the error found on the line (the last one if there are several), None otherwise
+        """
+        line = line.strip()
+        if line == '' or line.startswith('!') or line.startswith('remark'):
+            return None
+
+        cached = self.cache.get(self.acl_format, line) if self.cache is not None else None
+        if cached is not None:
+            perm, error = cached
+        else:
+            perm = ace_match(line)
+            error = None
+            if perm:
+                for error in self._network_errors(perm):
+                    pass
+                for error in self._port_errors(perm):
+                    pass
+            if self.cache is not None:
+                self.cache.put(self.acl_format, line, perm or None, error)
+
+        if not perm:
+            return 'Invalid ACE: ' + line
+        for error in self._object_group_errors(perm):
+            pass
+        return error
+
+    def _audit_networks(self, permission):
+        checked = batch_network_errors(
+            net for perm in permission.values() for net in (perm['source'], perm['destination']))
+        for i, perm in permission.items():
+            for error in checked[perm['source']] + checked[perm['destination']]:
+                self.errors[i] = error
 
     def _audit_ports(self, permission):
         for i, perm in permission.items():
-            if perm['protocol'].lower() not in ['tcp', 'udp']:
+            for error in self._port_errors(perm):
+                self.errors[i] = error
+
+    def _audit_object_groups(self, permission):
+        for i, perm in permission.items():
+            for error in self._object_group_errors(perm):
+                self.errors[i] = error
+
+    def _network_errors(self, perm):
+        for net in [perm['source'], perm['destination']]:
+            yield from network_errors(net)
+
+    def _port_errors(self, perm):
+        if perm['protocol'].lower() not in ['tcp', 'udp']:
+            return
+        for ports in [perm['source_ports'], perm['destination_ports']]:
+            if ports is None or ports.startswith('object-group') or ports.startswith('port-group'):
                 continue
-            for ports in [perm['source_ports'], perm['destination_ports']]:
-                if ports is None:
-                    continue
-                for p in ports.split()[1:]:
-                    if not re.match('\d+$', p):
-                        if re.match(keyword_rx, p):
-                            continue
-                        port_num = translate_port('ios', perm['protocol'], [p], 'to_number')[0]
-                        if p == port_num:
-                            self.errors[i] = 'Invalid port: {0} - {1} {2}'.format(self.acl_format, perm['protocol'], p)
+            for p in ports.split()[1:]:
+                if not re.match('\d+$', p):
+                    if re.match(keyword_rx, p):
+                        continue
+                    port_num = translate_port('ios', perm['protocol'], [p], 'to_number')[0]
+                    if p == port_num:
+                        yield 'Invalid port: {0} - {1} {2}'.format(self.acl_format, perm['protocol'], p)
+
+    def _object_group_errors(self, perm):
+        if not self.object_groups:  # no definitions to check the references against
+            return
+        fields = ('protocol', 'source', 'source_ports', 'destination', 'destination_ports')
+        if not any(perm[field] and perm[field].startswith('object-group') for field in fields):
+            return
+        try:
+            ace = Ace.from_permission(perm)
+        except ValueError:  # reported by the network and port audits
+            return
+        if ace.is_resolved:
+            return
+        try:
+            self.object_groups.expand(ace)
+        except ValueError as e:
+            yield str(e)
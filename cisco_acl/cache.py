@@ -0,0 +1,190 @@
+"""
+Persistent cache of per-line audit results, for fast re-audits of ACLs that
+changed little since the last audit
+
+Each ACE is cached under a hash of its text and ACL format, with its parsed
+permission and the error found by the per-line checks (syntax, networks,
+ports).  A re-audit only parses and checks the new or changed lines; the
+cross-line analyses (object-groups, shadowing) are always recomputed.
+
+The cache is dropped when the package version or port_translations.json
+changes, and the least recently used lines are evicted past max_entries
+(lines are timestamped with the flush they were last used in).
+
+Examples:
+    >>> from cisco_acl.acl_audit import AclAuditor
+    >>> with AuditCache(':memory:') as cache:
+    ...     acl = AclAuditor(acl=['permit tcp any any eq 80'], cache=cache)
+    ...     acl = AclAuditor(acl=['permit tcp any any eq 80', 'permit tcp any host eq 22'], cache=cache)
+    ...     cache.hits, cache.misses
+    (1, 2)
+"""
+import hashlib
+import logging
+import sqlite3
+from cisco_acl import __version__
+from cisco_acl.port_translations import translation_file
+
+logging.getLogger(__name__)
+
+
+def cache_namespace():
+    """
+    Return the identifier of the code and data the cached results depend on
+
+    Returns:
+        str: package version, hash of port_translations.json and permission fields
+    """
+    with open(translation_file, mode='rb') as f:
+        translations_hash = hashlib.sha1(f.read()).hexdigest()
+    return '{0}:{1}:{2}'.format(__version__, translations_hash, ','.join(_fields))
+
+
+def _key(acl_format, line):
+    return hashlib.blake2b('{0}\n{1}'.format(acl_format, line).encode('utf-8'), digest_size=16).digest()
+
+
+# Permissions are stored as their values joined by _separator, in field order
+_fields = ('sequence', 'name', 'action', 'protocol', 'source', 'source_ports',
+           'destination', 'destination_ports', 'keyword', 'hitcnt', 'rule_hash')
+_separator = '\x1f'
+_none = '\x00'
+
+
+def _encode(permission):
+    if permission is None:
+        return None
+    return _separator.join(_none if permission[field] is None else permission[field] for field in _fields)
+
+
+def _decode(row):
+    if row[0] is None:
+        return None, row[1]
+    values = [None if value == _none else value for value in row[0].split(_separator)]
+    return dict(zip(_fields, values)), row[1]
+
+
+class AuditCache:
+    """ sqlite backed cache of per-line audit results """
+
+    def __init__(self, path, max_entries=1000000):
+        """
+        Args:
+            path (str): path to the cache database (':memory:' for a temporary cache)
+            max_entries (int): maximum number of cached lines
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS lines (key BLOB PRIMARY KEY, permission TEXT, error TEXT, used INTEGER)')
+
+        self.namespace = cache_namespace()
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'namespace'").fetchone()
+        if row is None or row[0] != self.namespace:
+            logging.info('Audit cache {0} is outdated, clearing it'.format(path))
+            self.invalidate()
+
+        self._clock = (self._db.execute('SELECT MAX(used) FROM lines').fetchone()[0] or 0) + 1
+        self._pending = {}  # key: row to write on flush
+        self._used = set()  # keys of the cache hits, timestamped on flush
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM lines').fetchone()[0] + len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, acl_format, line):
+        """
+        Look up the audit results of a line
+
+        Args:
+            acl_format (str): 'ios' or 'asa'
+            line (str): stripped line of the ACL
+
+        Returns:
+            tuple: (permission, error), permission is None for invalid ACEs. None if the line is not cached
+        """
+        return self.get_many(acl_format, [line])[0]
+
+    def get_many(self, acl_format, lines):
+        """
+        Look up the audit results of many lines with one query
+
+        Args:
+            acl_format (str): 'ios' or 'asa'
+            lines (list): stripped lines of the ACL (at most a few hundred)
+
+        Returns:
+            list: (permission, error) tuple or None for each line, see get()
+        """
+        keys = [_key(acl_format, line) for line in lines]
+        query = 'SELECT key, permission, error FROM lines WHERE key IN ({0})'.format(','.join('?' * len(keys)))
+        rows = {key: (permission, error) for key, permission, error in self._db.execute(query, keys)}
+        for key in keys:
+            if key in self._pending:
+                rows[key] = self._pending[key][1:3]
+
+        results = []
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                self.misses += 1
+                results.append(None)
+                continue
+            self.hits += 1
+            self._used.add(key)
+            results.append(_decode(row))
+        return results
+
+    def put(self, acl_format, line, permission, error):
+        """
+        Cache the audit results of a line (written on flush)
+
+        Args:
+            acl_format (str): 'ios' or 'asa'
+            line (str): stripped line of the ACL
+            permission (dict): permission from ace_match, None for invalid ACEs
+            error (str): error found by the per-line checks, None if the line is valid
+        """
+        key = _key(acl_format, line)
+        self._pending[key] = (key, _encode(permission), error, self._clock)
+
+    def flush(self):
+        """ Write the pending results and access times, then evict the least recently used lines """
+        with self._db:
+            self._db.executemany('INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?)', self._pending.values())
+            used = list(self._used)
+            for start in range(0, len(used), 500):
+                keys = used[start:start + 500]
+                self._db.execute('UPDATE lines SET used = ? WHERE key IN ({0})'.format(','.join('?' * len(keys))),
+                                 [self._clock] + keys)
+            self._pending.clear()
+            self._used.clear()
+            self._clock += 1
+
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                logging.debug('Evicting {0} lines from the audit cache'.format(excess))
+                self._db.execute(
+                    'DELETE FROM lines WHERE key IN (SELECT key FROM lines ORDER BY used LIMIT ?)', (excess,))
+
+    def invalidate(self):
+        """ Drop every cached result """
+        with self._db:
+            self._db.execute('DELETE FROM lines')
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('namespace', ?)", (self.namespace,))
+        self._pending = {}
+        self._used = set()
+
+    def close(self):
+        """ Flush and close the cache """
+        self.flush()
+        self._db.close()
@@ -0,0 +1,284 @@
+"""
+Compile an ACL into a packet classifier and find the first ACE matching flows
+
+The ACL is compiled with the bit vector scheme: for every field (source,
+destination, protocol, source port, destination port) the value space is cut
+into elementary intervals, each holding the set of ACEs matching it as an
+integer bitmap (bit n = n-th ACE).  A lookup is one binary search per field,
+four ANDs of the bitmaps, and the lowest set bit is the first matching ACE.
+
+Memory grows with (number of intervals x number of ACEs) / 8 bytes, which is
+fine for ACLs of a few thousand ACEs.
+
+ACEs referring to object-groups are expanded when the object-group
+definitions are given (see cisco_acl.object_groups).  ACEs referring to
+undefined object-groups or host names can't be compiled and are skipped
+(see CompiledAcl.skipped).  ACEs with a filtering keyword (established,
+echo, ...) only match flows carrying the same keyword.
+
+Examples:
+    >>> from cisco_acl.ace import Acl
+    >>> acl = Acl.from_lines(['deny tcp any host 10.0.0.1 eq 22', 'permit tcp any 10.0.0.0 0.0.0.255'])
+    >>> compiled = CompiledAcl(acl.items())
+    >>> compiled.match(Flow('192.0.2.1', '10.0.0.1', 'tcp', 40000, 22))
+    1
+    >>> compiled.match(Flow('192.0.2.1', '10.0.0.1', 'tcp', 40000, 443))
+    2
+    >>> compiled.permits(Flow('192.0.2.1', '10.0.1.1', 'udp', 53, 53))
+    False
+"""
+import logging
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from ipaddress import ip_address
+from itertools import repeat
+from cisco_acl.ace import PERMIT, PROTOCOLS, MAX_MASK, FILTER_KEYWORDS, prefix_length
+
+logging.getLogger(__name__)
+
+Flow = namedtuple('Flow', ['source', 'destination', 'protocol', 'source_port', 'destination_port', 'keyword'])
+Flow.__new__.__defaults__ = (0, 0, 0, None)
+"""
+source/destination: IP address (str, int or ipaddress object)
+protocol: protocol number or name (ex. 6 or 'tcp')
+source_port/destination_port: port numbers (0 for protocols without ports)
+keyword: 'established' for TCP packets with ACK or RST set, ICMP type name for ICMP packets
+"""
+
+
+class _Field:
+    """ Elementary intervals of a field, with the bitmap of ACEs matching each interval """
+
+    def __init__(self, intervals):
+        """
+        Args:
+            intervals (iterable): (bit, low, high) tuples, the ACE with that bit matches low..high
+        """
+        events = {}
+        for bit, low, high in intervals:
+            events.setdefault(low, [0, 0])[0] |= 1 << bit
+            events.setdefault(high + 1, [0, 0])[1] |= 1 << bit
+
+        self.bounds = [0]
+        self.bitmaps = [0]
+        current = 0
+        for point in sorted(events):
+            added, removed = events[point]
+            current = (current & ~removed) | added
+            if point == self.bounds[-1]:
+                self.bitmaps[-1] = current
+            else:
+                self.bounds.append(point)
+                self.bitmaps.append(current)
+
+    def lookup(self, value):
+        return self.bitmaps[bisect_right(self.bounds, value) - 1]
+
+
+def _network_interval(network, version):
+    """ Return the (low, high) addresses of a network, or None if it does not match this IP version """
+    if network.version not in (0, version):
+        return None
+    length = prefix_length(network)
+    if length is None:  # non-contiguous mask, matched during verification
+        return 0, MAX_MASK[version]
+    if network.mask == 0:
+        return 0, MAX_MASK[version]
+    return network.address, network.address | (MAX_MASK[version] ^ network.mask)
+
+
+def _address(address):
+    if isinstance(address, int):
+        return address, 4 if address <= MAX_MASK[4] else 6
+    address = ip_address(address)
+    return int(address), address.version
+
+
+def _network_matches(network, address, version):
+    if network.version not in (0, version):
+        return False
+    return address & network.mask == network.address
+
+
+class CompiledAcl:
+    """ First match classifier compiled from an ACL """
+
+    def __init__(self, aces, groups=None):
+        """
+        Args:
+            aces (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+            groups (ObjectGroups): object-group definitions used to expand references
+        """
+        self.line_nums = array('I')
+        self.actions = array('B')
+        self.skipped = []  # line numbers of ACEs that can't be compiled
+        self._aces = []
+        self._verify = 0  # bitmap of ACEs to check field by field after the lookup
+
+        for line_num, ace in self._expand(aces, groups):
+            bit = len(self._aces)
+            self._aces.append(ace)
+            self.line_nums.append(line_num)
+            self.actions.append(ace.action)
+            if (ace.keyword in FILTER_KEYWORDS or
+                    prefix_length(ace.source) is None or prefix_length(ace.destination) is None):
+                self._verify |= 1 << bit
+
+        self._sources = {}
+        self._destinations = {}
+        for version in (4, 6):
+            for fields, side in ((self._sources, 'source'), (self._destinations, 'destination')):
+                intervals = []
+                for bit, ace in enumerate(self._aces):
+                    interval = _network_interval(getattr(ace, side), version)
+                    if interval is not None:
+                        intervals.append((bit,) + interval)
+                fields[version] = _Field(intervals)
+
+        self._source_ports = _Field(
+            (bit, low, high) for bit, ace in enumerate(self._aces) for low, high in ace.source_ports)
+        self._destination_ports = _Field(
+            (bit, low, high) for bit, ace in enumerate(self._aces) for low, high in ace.destination_ports)
+
+        self._all_protocols = 0
+        self._protocols = {}
+        for bit, ace in enumerate(self._aces):
+            if ace.protocol == 0:
+                self._all_protocols |= 1 << bit
+            else:
+                self._protocols[ace.protocol] = self._protocols.get(ace.protocol, 0) | 1 << bit
+
+    def _expand(self, aces, groups):
+        for line_num, ace in aces:
+            expanded = [ace]
+            if not ace.is_resolved and groups is not None:
+                try:
+                    expanded = groups.expand(ace)
+                except ValueError as e:
+                    logging.debug('Cannot expand line {0}: {1}'.format(line_num, e))
+            if not all(ace.is_resolved for ace in expanded):
+                logging.debug('Skipping line {0}: unresolved reference'.format(line_num))
+                self.skipped.append(line_num)
+                continue
+            for ace in expanded:
+                yield line_num, ace
+
+    def __len__(self):
+        return len(self._aces)
+
+    def _first(self, source, destination, version, protocol, source_port, destination_port, keyword):
+        candidates = (
+            self._sources[version].lookup(source) &
+            self._destinations[version].lookup(destination) &
+            (self._all_protocols | self._protocols.get(protocol, 0)) &
+            self._source_ports.lookup(source_port) &
+            self._destination_ports.lookup(destination_port)
+        )
+        while candidates:
+            lowest = candidates & -candidates
+            bit = lowest.bit_length() - 1
+            if not lowest & self._verify:
+                return bit
+            ace = self._aces[bit]
+            if ((ace.keyword not in FILTER_KEYWORDS or ace.keyword == keyword) and
+                    _network_matches(ace.source, source, version) and
+                    _network_matches(ace.destination, destination, version)):
+                return bit
+            candidates ^= lowest
+        return None
+
+    def match(self, flow):
+        """
+        Find the first ACE matching a flow
+
+        Args:
+            flow (Flow): flow to classify
+
+        Returns:
+            int: line number of the matching ACE, None if no ACE matches (implicit deny)
+        """
+        source, version = _address(flow.source)
+        destination, destination_version = _address(flow.destination)
+        if version != destination_version:
+            return None
+        protocol = PROTOCOLS.get(flow.protocol, flow.protocol)
+        bit = self._first(source, destination, version, protocol,
+                          flow.source_port, flow.destination_port, flow.keyword)
+        return None if bit is None else self.line_nums[bit]
+
+    def permits(self, flow):
+        """
+        Check if a flow is permitted
+
+        Args:
+            flow (Flow): flow to classify
+
+        Returns:
+            bool: True if the first matching ACE permits the flow, False otherwise
+        """
+        source, version = _address(flow.source)
+        destination, destination_version = _address(flow.destination)
+        if version != destination_version:
+            return False
+        protocol = PROTOCOLS.get(flow.protocol, flow.protocol)
+        bit = self._first(source, destination, version, protocol,
+                          flow.source_port, flow.destination_port, flow.keyword)
+        return bit is not None and self.actions[bit] == PERMIT
+
+    def match_batch(self, sources, destinations, protocols, source_ports, destination_ports, version=4,
+                    keywords=None):
+        """
+        Find the first matching ACE of many flows, given as columns
+
+        Columns can be any sequences of equal length (lists, array.array, ...).
+        Lookups of repeated values in a column are cached.
+
+        Args:
+            sources: source addresses (int, or str/ipaddress objects)
+            destinations: destination addresses (int, or str/ipaddress objects)
+            protocols: protocol numbers
+            source_ports: source port numbers
+            destination_ports: destination port numbers
+            version (int): IP version of integer addresses
+            keywords: keyword of each flow (see Flow), None if no flow has one
+
+        Returns:
+            array: line number of the matching ACE for each flow, 0 if no ACE matches
+        """
+        results = array('I')
+        port_caches = ({}, {})
+        lookups = {
+            ip_version: ((self._sources[ip_version], self._destinations[ip_version],
+                          self._source_ports, self._destination_ports), ({}, {}) + port_caches)
+            for ip_version in (4, 6)
+        }
+        if keywords is None:
+            keywords = repeat(None)
+        verify = self._verify
+
+        for flow in zip(sources, destinations, protocols, source_ports, destination_ports, keywords):
+            source, destination, protocol, source_port, destination_port, keyword = flow
+            if not isinstance(source, int):
+                source, version = _address(source)
+                destination, destination_version = _address(destination)
+                if version != destination_version:
+                    results.append(0)
+                    continue
+
+            fields, caches = lookups[version]
+            candidates = self._all_protocols | self._protocols.get(protocol, 0)
+            for value, field, cache in zip((source, destination, source_port, destination_port), fields, caches):
+                bitmap = cache.get(value)
+                if bitmap is None:
+                    bitmap = cache[value] = field.lookup(value)
+                candidates &= bitmap
+
+            if candidates & verify:
+                bit = self._first(source, destination, version, protocol, source_port, destination_port, keyword)
+            elif candidates:
+                bit = (candidates & -candidates).bit_length() - 1
+            else:
+                bit = None
+            results.append(0 if bit is None else self.line_nums[bit])
+        return results
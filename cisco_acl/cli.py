@@ -0,0 +1,160 @@
+"""
+Command line interface: audit ACLs, convert masks and translate ports of many
+files in one process
+
+Results are streamed as JSON Lines (one JSON object per line) or as text.
+Files are processed by a pool of --jobs worker processes; '-' (or no file)
+reads stdin.
+
+Examples:
+    $ cisco-acl audit --jobs 8 backups/*.txt
+    {"file": "backups/r1.txt", "line": 2, "error": "Invalid ACE: permit tcp any host eq 22"}
+
+    $ cisco-acl convert-mask --from wc --to cidr --output text acl.txt
+    permit tcp 10.0.1.0/24 any eq 443
+
+    $ cisco-acl translate-ports --format asa --to number acl.txt
+    {"file": "acl.txt", "line": 1, "ace": "access-list out extended permit tcp any any eq 443"}
+"""
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from cisco_acl.acl_audit import read_acl, audit_stream
+from cisco_acl.convert_mask import iter_translate_mask, mask_types
+from cisco_acl.fleet import audit_fleet
+from cisco_acl.port_translations import translate_acl
+
+logging.getLogger(__name__)
+
+
+def _write(record, output):
+    """ Write a result as JSON Lines or text """
+    if output == 'jsonl':
+        sys.stdout.write(json.dumps(record) + '\n')
+    elif 'exception' in record:
+        sys.stdout.write('{file}: {exception}\n'.format(**record))
+    elif 'error' in record:
+        sys.stdout.write('{file}:{line}: {error}\n'.format(**record))
+    else:
+        sys.stdout.write(record['ace'] + '\n')
+
+
+def _audit(args):
+    status = 0
+    files = [path for path in args.files if path != '-']
+    if '-' in args.files:
+        for line_num, error in audit_stream('-', args.format):
+            _write({'file': '-', 'line': line_num, 'error': error}, args.output)
+            status = 1
+
+    for result in audit_fleet(files, args.format, jobs=args.jobs) if files else ():
+        if result.exception:
+            _write({'file': result.path, 'exception': result.exception}, args.output)
+            status = 1
+            continue
+        for line_num, error in sorted(result.errors.items()):
+            _write({'file': result.path, 'line': line_num, 'error': error}, args.output)
+            status = 1
+        sys.stdout.flush()
+    return status
+
+
+def convert_file(path, command, options):
+    """
+    Convert the lines of an ACL file
+
+    Args:
+        path (str): ACL file, '-' for stdin
+        command (str): 'convert-mask' or 'translate-ports'
+        options (dict): arguments of the command
+
+    Returns:
+        tuple: (path, converted lines, exception), exception is None on success
+    """
+    try:
+        lines = (line.rstrip('\r\n') for line in read_acl(path))
+        if command == 'convert-mask':
+            converted = iter_translate_mask(lines, options['from_type'], options['to_type'])
+        else:
+            converted = translate_acl(lines, options['format'], 'to_' + options['to'])
+        return path, list(converted), None
+    except Exception as e:
+        return path, [], '{0}: {1}'.format(type(e).__name__, e)
+
+
+def _write_conversions(results, output):
+    status = 0
+    for path, lines, exception in results:
+        if exception:
+            _write({'file': path, 'exception': exception}, output)
+            status = 1
+            continue
+        for line_num, line in enumerate(lines, start=1):
+            _write({'file': path, 'line': line_num, 'ace': line}, output)
+        sys.stdout.flush()
+    return status
+
+
+def _convert(args):
+    options = vars(args)
+    files = args.files
+    if args.jobs == 1 or len(files) == 1 or '-' in files:
+        return _write_conversions((convert_file(path, args.command, options) for path in files), args.output)
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = executor.map(convert_file, files, [args.command] * len(files), [options] * len(files))
+        return _write_conversions(results, args.output)
+
+
+def parser():
+    """
+    Build the argument parser of the cisco-acl command
+
+    Returns:
+        argparse.ArgumentParser
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('files', nargs='*', default=['-'], help="ACL files, '-' for stdin (default)")
+    common.add_argument('--jobs', '-j', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs, 1 to disable)')
+    common.add_argument('--output', '-o', choices=['jsonl', 'text'], default='jsonl', help='output format')
+
+    main_parser = argparse.ArgumentParser(prog='cisco-acl', description='Audit and convert Cisco ACLs')
+    main_parser.add_argument('--verbose', '-v', action='store_true')
+    commands = main_parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    audit = commands.add_parser('audit', parents=[common], help='check ACLs for errors')
+    audit.add_argument('--format', '-f', choices=['ios', 'asa'], default='ios')
+
+    convert = commands.add_parser('convert-mask', parents=[common], help='convert the masks of ACLs')
+    convert.add_argument('--from', dest='from_type', choices=mask_types, required=True)
+    convert.add_argument('--to', dest='to_type', choices=mask_types, required=True)
+
+    translate = commands.add_parser('translate-ports', parents=[common], help='translate port names/numbers')
+    translate.add_argument('--format', '-f', choices=['ios', 'asa'], default='ios')
+    translate.add_argument('--to', choices=['name', 'number'], required=True)
+    return main_parser
+
+
+def main(argv=None):
+    """
+    Run the cisco-acl command
+
+    Args:
+        argv (list): command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: exit status, 1 if an error was found or a file could not be processed
+    """
+    args = parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.command == 'audit':
+        return _audit(args)
+    return _convert(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Collect ACLs from many devices concurrently and audit them as they stream in
+
+A Transport opens connections to devices and runs commands on them; the
+Collector runs up to `concurrency` devices at a time, each under a timeout,
+and reuses open connections across commands.  Lines are fed to a streaming
+AclAuditor as they arrive, so the whole output of a device is never held in
+memory.
+
+Transports shipped with the library:
+* FileTransport: reads saved command outputs (offline runs and tests)
+* TcpTransport: sends commands over a TCP connection and reads the output up
+  to the device prompt; serve_acls() starts a local stand-in device
+
+Examples:
+
+# Audit the ACLs of saved 'show run' outputs, 20 devices at a time
+>>> devices = [Device('r1', 'backups/r1.txt'), Device('fw1', 'backups/fw1.txt', acl_format='asa')]
+>>> for result in collect_and_audit(devices, FileTransport(), concurrency=20, timeout=30):  # doctest: +SKIP
+...     print(result.device.name, result.errors, result.exception)
+"""
+import abc
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from cisco_acl.acl_audit import AclAuditor
+
+logging.getLogger(__name__)
+
+Device = namedtuple('Device', ['name', 'address', 'command', 'acl_format'])
+Device.__new__.__defaults__ = ('show running-config', 'ios')
+"""
+name (str): device name
+address (str): where to reach the device (file path for FileTransport, 'host:port' for TcpTransport)
+command (str): command printing the ACLs
+acl_format (str): 'ios' or 'asa'
+"""
+
+DeviceResult = namedtuple('DeviceResult', ['device', 'errors', 'elapsed', 'exception'])
+"""
+device (Device): device audited
+errors (dict): line_num -> error, as in AclAuditor.errors
+elapsed (float): wall time spent collecting and auditing, in seconds
+exception (str): why the device could not be audited, None on success
+"""
+
+
+class Transport(abc.ABC):
+    """ Interface of the transports used by Collector """
+
+    @abc.abstractmethod
+    async def connect(self, device):
+        """
+        Open a connection to a device
+
+        Returns:
+            connection object passed to run() and close()
+        """
+
+    @abc.abstractmethod
+    def run(self, connection, command):
+        """
+        Run a command
+
+        Returns:
+            async iterator: lines of the output
+        """
+
+    async def close(self, connection):
+        """ Close a connection """
+
+
+class FileTransport(Transport):
+    """ Read command outputs saved in files, the device address being the file path """
+
+    def __init__(self, chunk_size=1 << 16):
+        self.chunk_size = chunk_size
+
+    async def connect(self, device):
+        return device.address
+
+    async def run(self, connection, command):
+        loop = asyncio.get_running_loop()
+        with open(connection, mode='rt', errors='ignore', encoding='utf-8') as f:
+            while True:
+                lines = await loop.run_in_executor(None, f.readlines, self.chunk_size)
+                if not lines:
+                    break
+                for line in lines:
+                    yield line
+
+
+class TcpTransport(Transport):
+    """
+    Run commands over a plain TCP connection ('host:port' addresses)
+
+    The output of a command ends with the device prompt (a line ending with
+    one of the prompt characters), after which the connection can run the
+    next command.
+    """
+
+    def __init__(self, prompts='#>', connect_timeout=10):
+        self.prompts = tuple(prompts)
+        self.connect_timeout = connect_timeout
+
+    async def connect(self, device):
+        host, port = device.address.rsplit(':', 1)
+        return await asyncio.wait_for(asyncio.open_connection(host, int(port)), self.connect_timeout)
+
+    async def run(self, connection, command):
+        reader, writer = connection
+        writer.write(command.encode('utf-8') + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError('Connection closed before the prompt')
+            line = line.decode('utf-8', errors='ignore')
+            if line.rstrip().endswith(self.prompts):
+                return
+            yield line
+
+    async def close(self, connection):
+        reader, writer = connection
+        writer.close()
+        await writer.wait_closed()
+
+
+async def serve_acls(outputs, host='127.0.0.1', port=0, prompt='router#'):
+    """
+    Start a stand-in device answering commands with canned outputs
+
+    Args:
+        outputs (dict): command -> list of output lines
+        host (str): address to listen on
+        port (int): port to listen on, 0 for any free port
+        prompt (str): prompt sent after each output
+
+    Returns:
+        asyncio.Server: the listening server (see server.sockets[0].getsockname() for the port)
+    """
+    async def handle(reader, writer):
+        try:
+            while True:
+                command = await reader.readline()
+                if not command:
+                    break
+                command = command.decode('utf-8').strip()
+                lines = outputs.get(command, ['% Invalid input detected'])
+                writer.write(''.join(line.rstrip('\n') + '\n' for line in lines).encode('utf-8'))
+                writer.write((prompt + '\n').encode('utf-8'))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class Collector:
+    """ Run commands on many devices concurrently, reusing connections """
+
+    def __init__(self, transport, concurrency=10, timeout=60):
+        """
+        Args:
+            transport (Transport): how to reach the devices
+            concurrency (int): maximum number of devices processed at a time
+            timeout (float): maximum time spent on a device, in seconds
+        """
+        self.transport = transport
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._semaphore = None
+        self._connections = {}  # address: connection
+        self._locks = {}  # address: lock serializing the commands of a connection
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """ Close every open connection """
+        connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            await self.transport.close(connection)
+
+    async def _drop(self, address):
+        connection = self._connections.pop(address, None)
+        if connection is not None:
+            try:
+                await self.transport.close(connection)
+            except Exception as e:
+                logging.debug('Error closing connection to {0}: {1}'.format(address, e))
+
+    async def _audit_device(self, device):
+        lock = self._locks.setdefault(device.address, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(device.address)
+            if connection is None:
+                connection = self._connections[device.address] = await self.transport.connect(device)
+
+            auditor = AclAuditor(format=device.acl_format, stream=True)
+            errors = {}
+            line_num = 0
+            async for line in self.transport.run(connection, device.command):
+                line_num += 1
+                if auditor.object_groups.feed(line):
+                    continue
+                error = auditor.audit_line(line)
+                if error:
+                    errors[line_num] = error
+            return errors
+
+    async def audit_device(self, device):
+        """
+        Collect and audit the ACLs of a device
+
+        Args:
+            device (Device): device to audit
+
+        Returns:
+            DeviceResult
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                errors = await asyncio.wait_for(self._audit_device(device), self.timeout)
+            except Exception as e:
+                await self._drop(device.address)  # the connection is in an unknown state
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError('No complete output after {0}s'.format(self.timeout))
+                logging.info('Failed to audit {0}: {1}'.format(device.name, e))
+                return DeviceResult(device, {}, time.perf_counter() - start, '{0}: {1}'.format(type(e).__name__, e))
+            return DeviceResult(device, errors, time.perf_counter() - start, None)
+
+    async def audit(self, devices):
+        """
+        Collect and audit the ACLs of many devices concurrently
+
+        Args:
+            devices (iterable): Device tuples
+
+        Returns:
+            async generator: DeviceResult for each device, in order of completion
+        """
+        tasks = [asyncio.ensure_future(self.audit_device(device)) for device in devices]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def collect_and_audit(devices, transport, concurrency=10, timeout=60):
+    """
+    Collect and audit the ACLs of many devices (blocking)
+
+    Args:
+        devices (iterable): Device tuples
+        transport (Transport): how to reach the devices
+        concurrency (int): maximum number of devices processed at a time
+        timeout (float): maximum time spent on a device, in seconds
+
+    Returns:
+        list: DeviceResult for each device, in order of completion
+    """
+    async def run():
+        async with Collector(transport, concurrency, timeout) as collector:
+            return [result async for result in collector.audit(devices)]
+    return asyncio.run(run())
@@ -0,0 +1,335 @@
+"""
+Convert ACLs between the IOS extended and ASA extended formats
+
+* IOS:  [sequence] permit tcp 10.0.1.0 0.0.0.255 any eq www
+* ASA:  access-list NAME [line N] extended permit tcp 10.0.1.0 255.255.255.0 any eq www [(hitcnt=N) 0x...]
+
+Every line is converted on its own, from the fields located by ace_spans, so
+ACLs are streamed and large files can be converted by chunks in parallel:
+* the ACL name is added (IOS to ASA) or removed (ASA to IOS)
+* sequence numbers, 'line N', hit counts and rule hashes are dropped
+* masks are converted (wildcard for IOS, subnet mask for ASA, see
+  cisco_acl.convert_mask)
+* port names are translated with the port table of the source format and
+  kept when the target format knows them, otherwise replaced by their number
+* 'eq' with several ports (IOS) becomes one ASA line per port
+* remarks are kept
+
+The lines that can't be converted are reported with the reason, ex. invalid
+ACEs, non-contiguous wildcard masks, IPv6 in IOS, keywords or port names the
+target format does not have.
+
+Examples:
+    >>> for conversion in iter_convert_format([
+    ...         '10 permit tcp 10.0.1.0 0.0.0.255 any eq 80 443',
+    ...         'deny ip 10.0.0.0 0.255.0.255 any',
+    ...     ], 'ios', 'asa', name='outside_in'):
+    ...     print(conversion.converted or conversion.error)
+    ['access-list outside_in extended permit tcp 10.0.1.0 255.255.255.0 any eq 80', \
+'access-list outside_in extended permit tcp 10.0.1.0 255.255.255.0 any eq 443']
+    Non-contiguous mask: 10.0.0.0 0.255.0.255
+    >>> convert_line('access-list out line 2 extended permit udp any host 10.0.0.1 eq domain (hitcnt=5) 0x1a',
+    ...              'asa', 'ios')
+    ['permit udp any host 10.0.0.1 eq domain']
+"""
+import logging
+import os
+import re
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, product
+from socket import inet_aton, inet_ntoa
+from cisco_acl.acl_audit import read_acl
+from cisco_acl.ace import split_port_keyword
+from cisco_acl.convert_mask import subnet_re
+from cisco_acl.diff import asa_line_re
+from cisco_acl.hitcounts import parse_hitcnt
+from cisco_acl import port_translations
+from cisco_acl.regexes import ace_spans
+from cisco_acl.validate import ALL_ONES
+
+logging.getLogger(__name__)
+
+acl_formats = ['ios', 'asa']
+
+# Mask type of the networks of each format (see cisco_acl.convert_mask)
+MASK_TYPES = {'ios': 'wc', 'asa': 'subnet'}
+
+# Protocols which have another name on the target format, keyed by (from format, to format):
+# ASA calls 'ahp' 'ah', which ace_match does not know, the protocol number is valid on both
+PROTOCOL_NAMES = {('ios', 'asa'): {'ahp': '51'}}
+
+# Keywords the target format does not have
+UNSUPPORTED_KEYWORDS = {'asa': frozenset(['established'])}
+
+remark_re = re.compile(r'(?:access-list\s+(?P<name>\S+)\s+(?:line\s+\d+\s+)?)?remark(?:\s+(?P<text>.*))?$')
+
+Conversion = namedtuple('Conversion', ['line_num', 'line', 'converted', 'error'])
+"""
+line_num (int): line number of the line in the ACL being converted
+line (str): the line, as read
+converted (list): converted lines, empty if the line can't be converted
+error (str): why the line can't be converted, None otherwise
+"""
+
+
+def _network(network, from_format, to_format):
+    words = network.split()
+    keyword = words[0].lower()
+    if keyword in ('any', 'any4'):
+        return 'any'
+    if keyword == 'host':
+        if to_format == 'ios' and ':' in words[1]:
+            raise ValueError('IPv6 host in an IPv4 ACL: ' + network)
+        return 'host ' + words[1]
+    if subnet_re.match(network):
+        return _convert_mask(' '.join(words), from_format, to_format)
+    return keyword + ' ' + words[1]  # object-groups, addrgroups: names are case sensitive
+
+
+def _convert_mask(network, from_format, to_format):
+    """ Convert the mask of an IPv4 network, like convert_network but with integers only """
+    address, mask = network.split()
+    try:
+        address_bits = int.from_bytes(inet_aton(address), 'big')
+        mask_bits = int.from_bytes(inet_aton(mask), 'big')
+    except OSError:
+        raise ValueError('Invalid network: ' + network)
+    hostmask = mask_bits if MASK_TYPES[from_format] == 'wc' else mask_bits ^ ALL_ONES
+    if hostmask & (hostmask + 1):
+        raise ValueError('Non-contiguous mask: ' + network)
+    if address_bits & hostmask:
+        raise ValueError('Host bits set: ' + network)
+    mask_bits = hostmask if MASK_TYPES[to_format] == 'wc' else hostmask ^ ALL_ONES
+    return address + ' ' + inet_ntoa(mask_bits.to_bytes(4, 'big'))
+
+
+def _port(port, protocol, from_format, to_format):
+    if port.isdigit():
+        return port
+    numbers = port_translations.translation_groups
+    number = numbers[from_format][protocol].get(port)
+    if number is None:
+        raise ValueError('Unknown port: {0} {1}'.format(protocol, port))
+    if numbers[to_format][protocol].get(port) == number:
+        return port
+    return port_translations.translation_names[to_format][protocol].get(int(number), number)
+
+
+def _reference_port(port, from_format, to_format):
+    """ Translate a port of a protocol object-group: a name must mean the same port for tcp and udp """
+    if port.isdigit():
+        return port
+    translations = {_port(port, protocol, from_format, to_format)
+                    for protocol in ('tcp', 'udp')
+                    if port in port_translations.translation_groups[from_format][protocol]}
+    if len(translations) != 1:
+        raise ValueError('Ambiguous port with a protocol object-group: ' + port)
+    return translations.pop()
+
+
+def _ports(ports, protocol, from_format, to_format):
+    """ Return the alternatives for a port list (several for 'eq' with many ports on ASA) and the swallowed keyword """
+    if ports is None:
+        return [''], None
+    words = ports.split()
+    if words[0].lower() in ('object-group', 'port-group'):
+        return [' {0} {1}'.format(words[0].lower(), words[1])], None
+
+    words = [word.lower() for word in words]
+    if protocol in ('tcp', 'udp'):
+        words, keyword = split_port_keyword(words, protocol, from_format)
+        numbers = [_port(word, protocol, from_format, to_format) for word in words[1:]]
+    else:  # protocol object-group, its ports apply to its tcp and udp members
+        words, keyword = split_port_keyword(words, 'tcp', from_format)
+        numbers = [_reference_port(word, from_format, to_format) for word in words[1:]]
+    if words[0] in ('e', 'eq') and to_format == 'asa':
+        alternatives = [' eq ' + number for number in numbers]
+    else:
+        alternatives = [' {0} {1}'.format(words[0], ' '.join(numbers))] if numbers else []
+    if not alternatives:
+        raise ValueError('Invalid ports: ' + ports)
+    return alternatives, keyword
+
+
+def convert_line(line, from_format, to_format, name=None):
+    """
+    Convert an ACE or remark between the IOS and ASA formats
+
+    The networks and object-group names are taken from the line as written
+    (ace_match lowercases them, object-group names are case sensitive).
+
+    Args:
+        line (str): ACE or remark
+        from_format (str): 'ios' or 'asa'
+        to_format (str): 'ios' or 'asa'
+        name (str): name of the ACL, required for ASA output
+
+    Returns:
+        list: converted lines (ASA allows only one port per 'eq', so an IOS ACE may give several)
+
+    Raises:
+        ValueError: the line can't be converted
+    """
+    if from_format not in acl_formats or to_format not in acl_formats:
+        raise ValueError('Unsupported conversion: {0} to {1}'.format(from_format, to_format))
+    if to_format == 'asa' and not name:
+        raise ValueError('An ACL name is required for ASA ACLs')
+
+    line = line.strip()
+    prefix = 'access-list {0} extended '.format(name) if to_format == 'asa' else ''
+    remark = remark_re.match(line)
+    if remark is not None:
+        text = remark.group('text') or ''
+        return [('access-list {0} remark {1}' if to_format == 'asa' else 'remark {1}').format(name, text).rstrip()]
+
+    if from_format == 'asa':
+        parsed = parse_hitcnt(line)
+        if parsed is not None:
+            line = parsed[2]
+        line = asa_line_re.sub(r'\1 ', line)
+    spans = ace_spans(line) if len(line.lower()) == len(line) else None
+    if not spans:
+        raise ValueError('Invalid ACE: ' + line)
+    fields = {field: (line[span[0]:span[1]] if span is not None else None) for field, span in spans.items()}
+
+    protocol = ' '.join(fields['protocol'].split())
+    if protocol.lower().startswith('object-group'):
+        protocol = 'object-group ' + protocol.split()[1]
+    else:
+        protocol = protocol.lower()
+        protocol = PROTOCOL_NAMES.get((from_format, to_format), {}).get(protocol, protocol)
+    if protocol in ('tcp', 'udp') or protocol.startswith('object-group'):
+        source_ports, _ = _ports(fields['source_ports'], protocol, from_format, to_format)
+        destination_ports, swallowed = _ports(fields['destination_ports'], protocol, from_format, to_format)
+    elif fields['source_ports'] or fields['destination_ports']:
+        raise ValueError('Ports with protocol {0}: {1}'.format(protocol, line))
+    else:
+        source_ports = destination_ports = ['']
+        swallowed = None
+
+    keyword = (fields['keyword'] or '').lower() or swallowed
+    if keyword in UNSUPPORTED_KEYWORDS.get(to_format, ()):
+        raise ValueError('Unsupported keyword on {0}: {1}'.format(to_format, keyword))
+    keyword = ' ' + keyword if keyword else ''
+
+    head = '{0}{1} {2} {3}'.format(
+        prefix, fields['action'].lower(), protocol, _network(fields['source'], from_format, to_format))
+    destination = ' ' + _network(fields['destination'], from_format, to_format)
+    return [head + source + destination + destination_port + keyword
+            for source, destination_port in product(source_ports, destination_ports)]
+
+
+def _convert_lines(lines, from_format, to_format, name):
+    """ Convert (line_num, line) tuples, skipping blank lines, comments and the ACEs of other ASA ACLs """
+    conversions = []
+    for line_num, line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('!'):
+            continue
+        if from_format == 'asa' and name and stripped.startswith('access-list') and stripped.split()[1] != name:
+            continue
+        try:
+            conversions.append(Conversion(line_num, line, convert_line(stripped, from_format, to_format, name), None))
+        except ValueError as e:
+            conversions.append(Conversion(line_num, line, [], str(e)))
+    return conversions
+
+
+def _convert_chunk(chunk, from_format, to_format, name):
+    return _convert_lines(chunk, from_format, to_format, name)
+
+
+def iter_convert_format(lines, from_format, to_format, name=None, jobs=1, chunk_size=10000):
+    """
+    Convert an ACL between the IOS and ASA formats, streaming it line by line
+
+    Blank lines and comments are skipped.  When converting ASA ACLs to IOS,
+    name selects the ACL to convert (the ACEs of other ACLs are skipped);
+    otherwise the ACEs of every ACL are converted.
+
+    Args:
+        lines: ACL file path, '-' for stdin, or iterable of lines (see read_acl)
+        from_format (str): 'ios' or 'asa'
+        to_format (str): 'ios' or 'asa'
+        name (str): name of the ACL (required for ASA output)
+        jobs (int): number of worker processes converting chunks of lines, None for the number of CPUs;
+            1 converts in the current process
+        chunk_size (int): lines per chunk sent to a worker process
+
+    Returns:
+        generator: Conversion for every ACE and remark, in line order
+
+    Raises:
+        ValueError: unsupported formats or missing ACL name
+    """
+    if from_format not in acl_formats or to_format not in acl_formats:
+        raise ValueError('Unsupported conversion: {0} to {1}'.format(from_format, to_format))
+    if to_format == 'asa' and not name:
+        raise ValueError('An ACL name is required for ASA ACLs')
+
+    numbered = enumerate((line.rstrip('\r\n') for line in read_acl(lines)), start=1)
+    if jobs == 1:
+        while True:
+            chunk = list(islice(numbered, 500))
+            if not chunk:
+                return
+            yield from _convert_lines(chunk, from_format, to_format, name)
+
+    # At most two chunks per worker are pending, so memory stays bounded on large files
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(numbered, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_convert_chunk, chunk, from_format, to_format, name))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def convert_format(lines, from_format, to_format, name=None):
+    """
+    Convert an ACL between the IOS and ASA formats
+
+    Returns:
+        tuple: (converted lines, [Conversion of the lines that can't be converted]), see iter_convert_format
+    """
+    converted, failed = [], []
+    for conversion in iter_convert_format(lines, from_format, to_format, name):
+        converted.extend(conversion.converted)
+        if conversion.error:
+            failed.append(conversion)
+    return converted, failed
+
+
+def convert_format_file(input_file, output_file, from_format, to_format, name=None, jobs=None,
+                        chunk_size=10000):
+    """
+    Convert an ACL file between the IOS and ASA formats, by chunks converted in parallel
+
+    Args:
+        input_file (str): path of the ACL to convert (optionally gzip compressed, see read_acl)
+        output_file (str): path of the converted ACL
+        from_format (str): 'ios' or 'asa'
+        to_format (str): 'ios' or 'asa'
+        name (str): see iter_convert_format
+        jobs (int): see iter_convert_format
+        chunk_size (int): see iter_convert_format
+
+    Returns:
+        list: Conversion of the lines that can't be converted
+    """
+    failed = []
+    with open(output_file, mode='wt', encoding='utf-8') as f_out:
+        for conversion in iter_convert_format(input_file, from_format, to_format, name, jobs, chunk_size):
+            if conversion.error:
+                failed.append(conversion)
+            for line in conversion.converted:
+                f_out.write(line + '\n')
+    if failed:
+        logging.warning('{0} lines of {1} could not be converted'.format(len(failed), input_file))
+    return failed
@@ -1,6 +1,113 @@
+"""
+Translate between the mask notations used for networks in ACEs
+
+* wc:      wildcard mask (IOS)      10.0.1.0 0.0.0.255
+* subnet:  subnet mask (ASA)        10.0.1.0 255.255.255.0
+* cidr:    prefix length            10.0.1.0/24
+
+Each line is converted on its own, using only the source and destination
+networks parsed from that line, so large ACLs can be streamed through
+iter_translate_mask() or translate_mask_file().  IPv6 networks only exist in
+prefix notation: they are converted to cidr and left unchanged otherwise.
+"""
 import ipaddress
 import re
-from cisco_acl.regexes import ace_match
+from functools import lru_cache
+from cisco_acl.regexes import ace_spans
+
+mask_types = ['wc', 'subnet', 'cidr']
+
+subnet_re = re.compile(r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})$')
+cidr_re = re.compile(r'(?<!\S)([0-9A-Fa-f:.]+/\d{1,3})(?!\S)')
+
+
+@lru_cache(maxsize=4096)
+def convert_network(network, from_type, to_type):
+    """
+    Convert a network between mask notations
+
+    Args:
+        network (str): network (ex. '10.0.1.0 0.0.0.255', '10.0.1.0/24')
+        from_type (str): "wc", "subnet" or "cidr"
+        to_type (str): "wc", "subnet" or "cidr"
+
+    Returns:
+        str: converted network, or None if the network can't be converted
+            (invalid or non-contiguous mask, host bits set)
+
+    Examples:
+        >>> convert_network('10.0.1.0 0.0.0.255', 'wc', 'cidr')
+        '10.0.1.0/24'
+        >>> convert_network('10.0.1.0/24', 'cidr', 'subnet')
+        '10.0.1.0 255.255.255.0'
+    """
+    try:
+        if from_type == 'cidr':
+            ip_object = ipaddress.ip_network(network)
+        else:
+            address, mask = network.split()
+            mask = int(ipaddress.IPv4Address(mask))
+            if from_type == 'wc':
+                mask ^= 0xffffffff
+            prefixlen = 32 - (~mask & 0xffffffff).bit_length()
+            if mask != (0xffffffff << (32 - prefixlen)) & 0xffffffff:
+                return None  # non-contiguous mask
+            ip_object = ipaddress.IPv4Network((address, prefixlen))
+    except ValueError:
+        return None
+
+    if to_type == 'cidr':
+        return ip_object.with_prefixlen
+    if ip_object.version == 6:
+        return network
+    if to_type == 'subnet':
+        return ' '.join(ip_object.with_netmask.split('/'))
+    return ' '.join(ip_object.with_hostmask.split('/'))
+
+
+def _translate_line(acl_line, from_type, to_type):
+    if from_type == 'cidr':
+        return cidr_re.sub(
+            lambda m: convert_network(m.group(1), from_type, to_type) or m.group(1), acl_line)
+
+    stripped = acl_line.strip()
+    spans = ace_spans(stripped)
+    if not spans:
+        return acl_line
+
+    offset = len(acl_line) - len(acl_line.lstrip())
+    output_line = acl_line
+    # Replace right to left so the span of the source stays valid
+    for field in ['destination', 'source']:
+        start, end = spans[field]
+        network = stripped[start:end]
+        if not subnet_re.match(network):
+            continue
+        converted = convert_network(network, from_type, to_type)
+        if converted is not None:
+            output_line = output_line[:offset + start] + converted + output_line[offset + end:]
+    return output_line
+
+
+def iter_translate_mask(acl_lines, from_type, to_type):
+    """ Translate between various mask definitions in ACEs, one line at a time
+
+    Args:
+        acl_lines: iterable of ACEs
+        from_type: "wc", "subnet" or "cidr"
+        to_type: "wc", "subnet", or "cidr"
+
+    Returns:
+        generator: ACEs with subnet masks translated
+    """
+    if from_type not in mask_types or to_type not in mask_types:
+        raise TypeError
+
+    for acl_line in acl_lines:
+        if from_type == to_type:
+            yield acl_line
+        else:
+            yield _translate_line(acl_line, from_type, to_type)
 
 
 def translate_mask(acl_lines, from_type, to_type):
@@ -8,7 +115,7 @@ def translate_mask(acl_lines, from_type, to_type):
     
     Args:
         acl_lines: list of ACEs
-        from_type: "wc" or "subnet"
+        from_type: "wc", "subnet" or "cidr"
         to_type: "wc", "subnet", or "cidr"
 
     Returns:
@@ -25,41 +132,28 @@ def translate_mask(acl_lines, from_type, to_type):
         ['permit tcp 172.16.1.0 0.0.0.255 any eq 80']
         >>> translate_mask(acl_lines, 'subnet', 'cidr')
         ['permit tcp 172.16.1.0/24 any eq 80']
+        >>> translate_mask(['permit tcp 172.16.1.0/24 2001:db8::/32 eq 80'], 'cidr', 'wc')
+        ['permit tcp 172.16.1.0 0.0.0.255 2001:db8::/32 eq 80']
     """
+    return list(iter_translate_mask(acl_lines, from_type, to_type))
 
-    output_lines = []
-    types = ['wc', 'subnet', 'cidr']
-    if from_type not in types or to_type not in types:
-        raise TypeError
 
-    # determine if we have a subnet in the ACL line
-    subnet_regex = '(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
-    subnets_to_process = {}
+def translate_mask_file(input_file, output_file, from_type, to_type):
+    """ Translate between various mask definitions in an ACL file, streaming it line by line
 
-    for acl_line in acl_lines:
-        output_line = acl_line
-        m = ace_match(acl_line.strip())
-        if m:
-            source_host = m['source']
-            destination_host = m['destination']
-
-            for network in [source_host, destination_host]:
-                if re.match(subnet_regex, network):
-                    try:
-                        ip_object = ipaddress.ip_network('/'.join(network.split()))
-                        subnets_to_process[network] = ip_object
-                    except ValueError as e:
-                        continue
-
-        for subnet in subnets_to_process:
-            if from_type == 'wc' and to_type == 'cidr':
-                output_line = re.sub(subnet, subnets_to_process[subnet].with_prefixlen, output_line)
-            elif from_type == 'wc' and to_type == 'subnet':
-                output_line = re.sub(subnet, ' '.join(subnets_to_process[subnet].with_netmask.split('/')), output_line)
-            elif from_type == 'subnet' and to_type == 'wc':
-                output_line = re.sub(subnet, ' '.join(subnets_to_process[subnet].with_hostmask.split('/')), output_line)
-            elif from_type == 'subnet' and to_type == 'cidr':
-                output_line = re.sub(subnet, subnets_to_process[subnet].with_prefixlen, output_line)
-
-        output_lines.append(output_line)
-    return output_lines
+    Args:
+        input_file: path of the ACL to translate
+        output_file: path of the translated ACL
+        from_type: "wc", "subnet" or "cidr"
+        to_type: "wc", "subnet", or "cidr"
+
+    Returns:
+        int: number of lines written
+    """
+    count = 0
+    with open(input_file, mode='rt', errors='ignore', encoding='utf-8') as f_in, \
+            open(output_file, mode='wt', encoding='utf-8') as f_out:
+        for line in iter_translate_mask(f_in, from_type, to_type):
+            f_out.write(line)
+            count += 1
+    return count
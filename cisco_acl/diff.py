@@ -0,0 +1,205 @@
+"""
+Semantic diff of two versions of an ACL
+
+Both versions are normalized into canonical rules before being compared, so
+changes that do not change what an ACE matches are not reported:
+* sequence numbers ('10 permit ...', 'access-list out line 3 ...') and ASA hitcnt
+* wildcard versus subnet masks, 'host' versus a full mask
+* port names versus numbers, and the order of ports in 'eq' lists
+* remarks, comments and whitespace
+
+Every canonical rule is interned to an integer, and the two integer
+sequences are aligned: rules unique to both versions are anchored with a
+longest increasing subsequence (as in patience diff), and difflib aligns the
+few rules between anchors.  The unaligned rules are classified as:
+* added/removed: the rule only exists in one version
+* moved: the same rule exists in both versions, at a different position
+* changed: a rule matching the same traffic has a different action or logging
+
+Lines which are not valid ACEs are compared as text.
+
+Examples:
+    >>> old = ['10 permit tcp any host 10.0.0.1 eq www', '20 permit udp any any eq 53', '30 deny ip any any']
+    >>> new = ['permit tcp any 10.0.0.1 0.0.0.0 eq 80', 'deny udp any any eq domain', 'deny ip any any']
+    >>> for change in diff_acl(old, new):
+    ...     print(change.kind, change.old.line_num, change.new.line_num)
+    changed 2 2
+"""
+import difflib
+import logging
+import re
+from bisect import bisect_left
+from collections import namedtuple, defaultdict
+from cisco_acl.ace import Ace
+from cisco_acl.acl_audit import read_acl
+from cisco_acl.regexes import ace_match
+
+logging.getLogger(__name__)
+
+Rule = namedtuple('Rule', ['line_num', 'line', 'key'])
+Change = namedtuple('Change', ['kind', 'old', 'new'])
+
+# ASA 'show access-list' line numbers, which ace_match only accepts after two spaces
+asa_line_re = re.compile(r'^(access-list\s+\S+)\s+line\s+\d+\s+')
+
+
+def _canonical(line, name, mask_type):
+    """ Return the canonical key of a line, and the key of the traffic it matches """
+    permission = ace_match(asa_line_re.sub(r'\1 ', line))
+    if permission:
+        try:
+            ace = Ace.from_permission(permission, mask_type)
+        except ValueError:
+            pass
+        else:
+            name = permission['name'] or name
+            match = (name, ace.protocol, ace.source, ace.source_ports, ace.destination,
+                     ace.destination_ports, None if ace.keyword == 'log' else ace.keyword)
+            return (name, ace), match
+    key = ' '.join(line.split())
+    return key, key
+
+
+def _normalize(acl, mask_type, memo):
+    """ Return the line numbers, lines and keys of the rules of an ACL, as columns """
+    line_nums, lines, keys = [], [], []
+    lines_memo = memo.setdefault(None, {})
+    name = None
+    for i, line in enumerate(read_acl(acl), start=1):
+        line = line.strip()
+        if line == '' or line.startswith('!') or 'remark' in line.split()[:4]:
+            continue
+        if line.startswith(('ip access-list', 'ipv6 access-list')):
+            name = line.split()[-1]
+            lines_memo = memo.setdefault(name, {})
+        key = lines_memo.get(line)
+        if key is None:
+            key = lines_memo[line] = _canonical(line, name, mask_type)
+        line_nums.append(i)
+        lines.append(line)
+        keys.append(key)
+    return line_nums, lines, keys
+
+
+def canonical_rules(acl, mask_type=None):
+    """
+    Normalize an ACL into canonical rules
+
+    Args:
+        acl: ACL file path, text or iterable of lines (see read_acl)
+        mask_type (str): 'wc' or 'subnet', see Ace.from_permission
+
+    Returns:
+        list: Rule for every line which is not a remark, comment or blank line,
+            with key a (key, match key) tuple
+    """
+    return [Rule(*rule) for rule in zip(*_normalize(acl, mask_type, {}))]
+
+
+def _unique_anchors(a, b):
+    """ Return the longest increasing run of (i, j) pairs of items unique to both a and b """
+    positions = {}
+    for i, item in enumerate(a):
+        positions[item] = i if item not in positions else None
+    unique_b = {}
+    for j, item in enumerate(b):
+        if positions.get(item) is not None:
+            unique_b[item] = j if item not in unique_b else None
+    pairs = sorted((positions[item], j) for item, j in unique_b.items() if j is not None)
+
+    # Longest increasing subsequence of j (patience sorting)
+    tails, tail_index, previous = [], [], [None] * len(pairs)
+    for k, (i, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(k)
+        else:
+            tails[pile] = j
+            tail_index[pile] = k
+        previous[k] = tail_index[pile - 1] if pile else None
+    anchors = []
+    k = tail_index[-1] if tail_index else None
+    while k is not None:
+        anchors.append(pairs[k])
+        k = previous[k]
+    return anchors[::-1]
+
+
+def _unmatched(a, b):
+    """ Yield the (old, new) index ranges of a and b which are not part of their common subsequence """
+    a_start, b_start = 0, 0
+    for i, j in _unique_anchors(a, b) + [(len(a), len(b))]:
+        if (a_start, b_start) != (i, j):
+            # Lines between two anchors are few, difflib is fast enough for them
+            matcher = difflib.SequenceMatcher(None, a[a_start:i], b[b_start:j], autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag != 'equal':
+                    yield range(a_start + i1, a_start + i2), range(b_start + j1, b_start + j2)
+        a_start, b_start = i + 1, j + 1
+
+
+def diff_acl(old, new, mask_type=None):
+    """
+    Compare two versions of an ACL
+
+    Args:
+        old: old ACL, file path, text or iterable of lines (see read_acl)
+        new: new ACL, file path, text or iterable of lines (see read_acl)
+        mask_type (str): 'wc' or 'subnet', see Ace.from_permission
+
+    Returns:
+        list: Change(kind, old Rule, new Rule) sorted by position, with kind
+            'added' (no old rule), 'removed' (no new rule), 'moved' or 'changed'
+    """
+    memo = {}
+    old_columns = _normalize(old, mask_type, memo)
+    new_columns = _normalize(new, mask_type, memo)
+    old_keys, new_keys = old_columns[2], new_columns[2]
+
+    ids = {}
+    a = [ids.setdefault(key[0], len(ids)) for key in old_keys]
+    b = [ids.setdefault(key[0], len(ids)) for key in new_keys]
+
+    def old_rule(i):
+        return Rule(*(column[i] for column in old_columns))
+
+    def new_rule(j):
+        return Rule(*(column[j] for column in new_columns))
+
+    removed, added = [], []
+    for old_range, new_range in _unmatched(a, b):
+        removed.extend(old_range)
+        added.extend(new_range)
+
+    changes = []
+    # Rules in both versions, outside of the common subsequence
+    added_by_key = defaultdict(list)
+    for j in reversed(added):
+        added_by_key[b[j]].append(j)
+    unpaired = []
+    for i in removed:
+        if added_by_key[a[i]]:
+            changes.append(Change('moved', old_rule(i), new_rule(added_by_key[a[i]].pop())))
+        else:
+            unpaired.append(i)
+
+    # Rules matching the same traffic, with another action or logging
+    added_by_match = defaultdict(list)
+    for key in added_by_key.values():
+        for j in key:
+            added_by_match[new_keys[j][1]].append(j)
+    for match in added_by_match.values():
+        match.sort(reverse=True)
+    for i in unpaired:
+        match = added_by_match.get(old_keys[i][1])
+        if match:
+            changes.append(Change('changed', old_rule(i), new_rule(match.pop())))
+        else:
+            changes.append(Change('removed', old_rule(i), None))
+    for match in added_by_match.values():
+        changes.extend(Change('added', None, new_rule(j)) for j in match)
+
+    changes.sort(key=lambda change: (
+        change.new.line_num if change.new else change.old.line_num, change.old is None))
+    return changes
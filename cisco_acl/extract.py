@@ -0,0 +1,211 @@
+"""
+Extract the ACLs of large config dumps (show running-config, show tech)
+
+The dump is memory mapped and scanned once with a bytes regex, which builds
+an index of ACL name -> byte spans without decoding the file.  Only the ACLs
+that are asked for are decoded, parsed or audited, when they are asked for.
+
+Recognized blocks:
+* IOS named ACLs: 'ip access-list extended NAME' (or 'ipv6 access-list NAME')
+  followed by indented ACEs; the span covers the ACEs, not the header, and
+  headers without ACEs are ignored
+* ASA and IOS numbered ACLs: 'access-list NAME ...' lines; consecutive lines
+  of an ACL make one span, the 'access-list NAME' prefix of IOS numbered ACEs
+  is removed when they are decoded
+* object-groups: 'object-group TYPE NAME' followed by indented members,
+  used to audit the ACLs referring to them
+
+Examples:
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'running-config')
+    >>> with open(path, 'wb') as f:
+    ...     _ = f.write(b'hostname r1\\n'
+    ...                 b'ip access-list extended edge\\n'
+    ...                 b' 10 permit tcp any any eq 80\\n'
+    ...                 b' 20 permit tcp any host eq 22\\n'
+    ...                 b'interface Gi0/1\\n'
+    ...                 b'access-list 101 permit ip any any\\n')
+    >>> with ConfigIndex(path) as config:
+    ...     print(sorted(config), config.lines('101'))
+    ...     print(config.audit('edge').errors, config.audit('101').errors)
+    ['101', 'edge'] ['permit ip any any']
+    {2: 'Invalid ACE: 20 permit tcp any host eq 22'} {}
+"""
+import logging
+import mmap
+import re
+from cisco_acl.ace import Acl
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.object_groups import ObjectGroups
+
+logging.getLogger(__name__)
+
+# Words following 'access-list NAME' on ASA (IOS numbered ACLs have the action instead)
+ASA_ACL_TYPES = frozenset([b'line', b'extended', b'standard', b'remark', b'webtype', b'ethertype', b'advanced'])
+
+# Only lines following a newline are tried, which lets re skip to the next newline quickly
+line_start_re = re.compile(rb'\n(?=(?:ip(?:v6)? )?access-list |object-group )')
+block_re = re.compile(
+    rb'(?:'
+    rb'(?P<header>ip(?:v6)? access-list (?:(?:extended|standard|role-based) )?(?P<block_name>\S+)[^\n]*(?:\n|\Z))'
+    rb'|(?P<group_header>object-group \S+ (?P<group_name>\S+)[^\n]*(?:\n|\Z))'
+    rb'|access-list (?P<name>\S+)[ \t]+(?P<type>\S+)[^\n]*(?:\n|\Z)'
+    rb')'
+)
+body_re = re.compile(rb'(?:[ \t]+[^\n]*(?:\n|\Z))*')
+
+# 'access-list NAME' prefix of ASA remarks, which AclAuditor only skips without it
+asa_remark_re = re.compile(r'^access-list\s+\S+\s+(?:line\s+\d+\s+)?(?=remark\b)')
+
+
+class ConfigIndex:
+    """ Index of the ACLs of a config dump, mapping ACL names to byte spans of the file """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): path of the config dump
+        """
+        self.path = path
+        self.spans = {}
+        """
+        spans = {
+            # ACL name: [(start, end) byte offsets of its ACEs]
+            'edge': [(40, 112)],
+        }
+        """
+        self.formats = {}  # ACL name: 'ios' or 'asa'
+        self.group_spans = []  # (start, end) byte offsets of object-group definitions
+        self._groups = {}  # acl_format: ObjectGroups
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._map = b''
+        self._index()
+
+    def _index(self):
+        data = self._map
+        pos = 0
+        while pos < len(data):
+            match = block_re.match(data, pos)
+            if match is None:
+                found = line_start_re.search(data, pos)
+                if found is None:
+                    break
+                pos = found.end()
+                continue
+            pos = match.end()
+            if match.group('name') is not None:
+                name = match.group('name').decode('utf-8', 'ignore')
+                acl_format = 'asa' if match.group('type') in ASA_ACL_TYPES else 'ios'
+                self._add_span(name, acl_format, match.start(), pos)
+                continue
+
+            body = body_re.match(data, pos)
+            start, pos = body.start(), body.end()
+            if match.group('group_name') is not None:
+                self.group_spans.append((match.start(), pos))
+            elif pos > start:  # global commands (ex. 'ip access-list logging interval 10') have no ACEs
+                name = match.group('block_name').decode('utf-8', 'ignore')
+                self._add_span(name, 'ios', start, pos)
+
+    def _add_span(self, name, acl_format, start, end):
+        spans = self.spans.setdefault(name, [])
+        self.formats.setdefault(name, acl_format)
+        if spans and spans[-1][1] == start:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+
+    def __contains__(self, name):
+        return name in self.spans
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def iter_lines(self, name):
+        """
+        Decode the ACEs of an ACL, one span at a time
+
+        Args:
+            name (str): ACL name
+
+        Returns:
+            generator: lines of the ACL, without line endings ('access-list NAME' removed from IOS numbered ACEs)
+
+        Raises:
+            KeyError: unknown ACL
+        """
+        numbered = self.formats[name] == 'ios'
+        for start, end in self.spans[name]:
+            for line in self._map[start:end].decode('utf-8', 'ignore').splitlines():
+                if numbered and line.startswith('access-list'):
+                    words = line.split(None, 2)
+                    if words[:2] == ['access-list', name]:
+                        line = words[2] if len(words) > 2 else ''
+                yield line
+
+    def lines(self, name):
+        """
+        Returns:
+            list: lines of an ACL (see iter_lines)
+        """
+        return list(self.iter_lines(name))
+
+    def object_groups(self, acl_format='asa'):
+        """
+        Parse the object-groups of the config, on first use
+
+        Returns:
+            ObjectGroups
+        """
+        groups = self._groups.get(acl_format)
+        if groups is None:
+            groups = self._groups[acl_format] = ObjectGroups.from_lines(
+                (line for start, end in self.group_spans
+                 for line in self._map[start:end].decode('utf-8', 'ignore').splitlines()),
+                acl_format)
+        return groups
+
+    def acl(self, name):
+        """
+        Parse an ACL
+
+        Returns:
+            Acl: valid ACEs of the ACL (see cisco_acl.ace)
+        """
+        return Acl.from_lines(self.iter_lines(name))
+
+    def audit(self, name, **kwargs):
+        """
+        Audit an ACL
+
+        Args:
+            name (str): ACL name
+            **kwargs: AclAuditor arguments (format defaults to the format of the ACL)
+
+        Returns:
+            AclAuditor: line numbers are relative to the ACL, remarks are skipped
+        """
+        acl_format = kwargs.setdefault('format', self.formats[name])
+        if self.group_spans and 'object_groups' not in kwargs:
+            kwargs['object_groups'] = self.object_groups(acl_format)
+        lines = self.lines(name)
+        if acl_format == 'asa':
+            lines = [asa_remark_re.sub('', line, 1) for line in lines]
+        return AclAuditor(acl=lines, **kwargs)
@@ -0,0 +1,159 @@
+"""
+Audit the ACLs of a whole fleet of devices in parallel
+
+Files are spread across a pool of worker processes and results are streamed
+back as each file finishes.  Files that could not be audited (unreadable,
+missing, ...) are written to a manifest, which can be fed back to
+audit_fleet() to resume a run.
+
+Examples:
+
+# Audit every file in a directory with 8 worker processes
+>>> from cisco_acl.fleet import audit_fleet, read_manifest
+>>> for result in audit_fleet('backups/', jobs=8, manifest='failed.txt'):  # doctest: +SKIP
+...     print(result.path, len(result.errors), '{0:.3f}s'.format(result.elapsed))
+
+# Retry the files that failed
+>>> results = list(audit_fleet(read_manifest('failed.txt'), manifest='failed.txt'))  # doctest: +SKIP
+"""
+import glob
+import logging
+import os
+import os.path
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cisco_acl.acl_audit import audit_stream
+
+logging.getLogger(__name__)
+
+FleetResult = namedtuple('FleetResult', ['path', 'errors', 'elapsed', 'exception'])
+"""
+path (str): ACL file
+errors (dict): line_num -> error, as in AclAuditor.errors
+elapsed (float): wall time spent auditing the file, in seconds
+exception (str): why the file could not be audited, None on success
+"""
+
+
+def find_acls(target):
+    """
+    Expand a directory, glob pattern or list of paths into a sorted list of ACL files
+
+    Args:
+        target: directory (searched recursively), glob pattern, file, or list of any of these
+
+    Returns:
+        list: paths of ACL files
+    """
+    if not isinstance(target, (str, os.PathLike)):
+        paths = []
+        for t in target:
+            paths.extend(find_acls(t))
+        return paths
+
+    target = os.fspath(target)
+    if os.path.isdir(target):
+        paths = []
+        for root, dirs, files in os.walk(target):
+            paths.extend(os.path.join(root, f) for f in files)
+        return sorted(paths)
+
+    if glob.has_magic(target):
+        return sorted(p for p in glob.glob(target, recursive=True) if os.path.isfile(p))
+
+    # A single file, reported as a failure later on if it does not exist
+    return [target]
+
+
+def read_manifest(manifest):
+    """
+    Read the files listed in a manifest written by audit_fleet()
+
+    Args:
+        manifest (str): path of the manifest
+
+    Returns:
+        list: paths of ACL files
+    """
+    with open(manifest, mode='rt', encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def write_manifest(manifest, paths):
+    """
+    Write a manifest of ACL files, one path per line
+
+    Args:
+        manifest (str): path of the manifest
+        paths (list): paths of ACL files
+    """
+    with open(manifest, mode='wt', encoding='utf-8') as f:
+        for path in paths:
+            f.write(path + '\n')
+
+
+def audit_file(path, acl_format='ios'):
+    """
+    Audit a single ACL file, catching any error
+
+    Args:
+        path (str): ACL file
+        acl_format (str): 'ios' or 'asa'
+
+    Returns:
+        FleetResult: result of the audit
+    """
+    start = time.perf_counter()
+    try:
+        errors = dict(audit_stream(path, acl_format))
+    except Exception as e:
+        return FleetResult(path, {}, time.perf_counter() - start, '{0}: {1}'.format(type(e).__name__, e))
+    return FleetResult(path, errors, time.perf_counter() - start, None)
+
+
+def audit_fleet(target, acl_format='ios', jobs=None, manifest=None):
+    """
+    Audit many ACL files in parallel
+
+    Args:
+        target: directory, glob pattern, file, or list of any of these (see find_acls)
+        acl_format (str): 'ios' or 'asa'
+        jobs (int): number of worker processes, defaults to the number of CPUs;
+            1 audits the files in the current process
+        manifest (str): if given, the files that failed (or were not audited because
+            the generator was closed early) are written to this file
+
+    Returns:
+        generator: FleetResult for each file, in order of completion
+    """
+    pending = find_acls(target)
+    failed = []
+    logging.info('Auditing {0} ACL files ...'.format(len(pending)))
+
+    try:
+        if jobs == 1:
+            for path in list(pending):
+                result = audit_file(path, acl_format)
+                pending.remove(path)
+                if result.exception:
+                    failed.append(path)
+                yield result
+        else:
+            remaining = set(pending)
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(audit_file, path, acl_format) for path in pending]
+                try:
+                    for future in as_completed(futures):
+                        result = future.result()
+                        remaining.discard(result.path)
+                        if result.exception:
+                            failed.append(result.path)
+                        yield result
+                finally:
+                    for future in futures:
+                        future.cancel()
+                    pending = [path for path in pending if path in remaining]
+    finally:
+        if manifest is not None:
+            write_manifest(manifest, failed + pending)
@@ -0,0 +1,198 @@
+"""
+Hit counts of ASA rules over many snapshots, stored in columnar arrays
+
+Every rule (device, rule hash) gets a row, and every snapshot a column: an
+array of unsigned 64-bit hit counts (MISSING where the rule did not exist).
+Reports work on whole columns, so thousands of ACLs and snapshots can be
+analysed without a Python object per rule and snapshot.
+
+Examples:
+    >>> hits = HitCounts()
+    >>> hits.add('monday', 'fw1', [
+    ...     'access-list out extended permit tcp any any eq www (hitcnt=10) 0x1a',
+    ...     'access-list out extended permit tcp any any eq 22 (hitcnt=0) 0x2b',
+    ... ])
+    2
+    >>> hits.add('friday', 'fw1', [
+    ...     'access-list out extended permit tcp any any eq www (hitcnt=250) 0x1a',
+    ...     'access-list out extended permit tcp any any eq 22 (hitcnt=0) 0x2b',
+    ... ])
+    2
+    >>> [hits.rule(row).rule_hash for row in hits.zero_hit()]
+    ['0x2b']
+    >>> [(hits.rule(row).rule_hash, delta) for row, delta in hits.top(1, 'monday', 'friday')]
+    [('0x1a', 240)]
+"""
+import heapq
+import logging
+from array import array
+from collections import namedtuple
+from cisco_acl.acl_audit import read_acl
+
+logging.getLogger(__name__)
+
+MISSING = (1 << 64) - 1  # hit count of a rule absent from a snapshot
+
+Rule = namedtuple('Rule', ['device', 'rule_hash', 'ace'])
+
+
+def parse_hitcnt(line):
+    """
+    Extract the hit count and rule hash of an ASA ACE
+
+    Only the '(hitcnt=N) 0x...' suffix is parsed, which is much faster than
+    ace_match (see the hitcnt and rule_hash fields) and also accepts the
+    'show access-list' lines ace_match does not (ex. 'line N', indented
+    object-group expansions).
+
+    Args:
+        line (str): line of 'show access-list'
+
+    Returns:
+        tuple: (hit count, rule hash, ACE without the suffix), None if the line has no hit count
+    """
+    ace, separator, suffix = line.rpartition('(hitcnt=')
+    if not separator:
+        return None
+    count, separator, rule_hash = suffix.partition(')')
+    rule_hash = rule_hash.strip().lower()
+    if not separator or not count.isdigit() or not rule_hash or ' ' in rule_hash:
+        return None
+    return int(count), rule_hash, ace.strip()
+
+
+class HitCounts:
+    """ Hit counts of many rules over many snapshots """
+
+    def __init__(self):
+        self.snapshots = []  # snapshot labels, in the order they were added
+        self.columns = []  # one array('Q') of hit counts per snapshot
+        self.devices = []  # device of each row
+        self.rule_hashes = []  # rule hash of each row
+        self.aces = []  # ACE text of each row, as first seen
+        self._rows = {}  # (device, rule hash): row
+
+    def __len__(self):
+        return len(self.rule_hashes)
+
+    def rule(self, row):
+        """
+        Return the rule of a row
+
+        Returns:
+            Rule
+        """
+        return Rule(self.devices[row], self.rule_hashes[row], self.aces[row])
+
+    def _column(self, snapshot, create=False):
+        if snapshot in self.snapshots:
+            column = self.columns[self.snapshots.index(snapshot)]
+        elif not create:
+            if not isinstance(snapshot, int) or not -len(self.columns) <= snapshot < len(self.columns):
+                raise KeyError('Unknown snapshot: {0!r}'.format(snapshot))
+            column = self.columns[snapshot]
+        else:
+            self.snapshots.append(snapshot)
+            column = array('Q')
+            self.columns.append(column)
+        if len(column) < len(self):
+            column.extend(array('Q', [MISSING]) * (len(self) - len(column)))
+        return column
+
+    def add(self, snapshot, device, lines):
+        """
+        Add the hit counts of a device to a snapshot
+
+        Args:
+            snapshot: snapshot label (ex. a date string), created on first use
+            device (str): device the lines come from
+            lines: 'show access-list' output, file path or iterable of lines (see read_acl)
+
+        Returns:
+            int: number of hit counts read
+        """
+        column = self._column(snapshot, create=True)
+        rows = self._rows
+        count = 0
+        for line in read_acl(lines):
+            parsed = parse_hitcnt(line)
+            if parsed is None:
+                continue
+            hits, rule_hash, ace = parsed
+            row = rows.get((device, rule_hash))
+            if row is None:
+                row = rows[(device, rule_hash)] = len(self.rule_hashes)
+                self.devices.append(device)
+                self.rule_hashes.append(rule_hash)
+                self.aces.append(ace)
+                column.append(MISSING)
+            column[row] = hits
+            count += 1
+        return count
+
+    def counts(self, snapshot=-1):
+        """
+        Return the hit counts of every rule in a snapshot
+
+        Args:
+            snapshot: snapshot label, or index in snapshots (default: the last one)
+
+        Returns:
+            array: hit count per row, MISSING for rules absent from the snapshot
+
+        Raises:
+            KeyError: unknown snapshot
+        """
+        return self._column(snapshot)
+
+    def zero_hit(self, snapshot=-1):
+        """
+        Find the rules never hit, as of a snapshot
+
+        Returns:
+            list: rows with a hit count of 0
+        """
+        return [row for row, hits in enumerate(self.counts(snapshot)) if hits == 0]
+
+    def deltas(self, first=0, last=-1):
+        """
+        Return the hits of every rule between two snapshots
+
+        A count lower than in the first snapshot means the counters were
+        cleared in between; the delta is then the count of the last snapshot.
+
+        Returns:
+            array: hits per row between the snapshots, -1 for rules absent from either
+        """
+        before, after = self.counts(first), self.counts(last)
+        return array('q', (
+            -1 if old == MISSING or new == MISSING else (new - old if new >= old else new)
+            for old, new in zip(before, after)
+        ))
+
+    def unused(self, first=0, last=-1):
+        """
+        Find the rules not hit between two snapshots
+
+        Returns:
+            list: rows present in both snapshots with no new hit
+        """
+        return [row for row, delta in enumerate(self.deltas(first, last)) if delta == 0]
+
+    def top(self, n=10, first=None, last=-1):
+        """
+        Find the most hit rules
+
+        Args:
+            n (int): number of rules
+            first: snapshot to count the hits from, None to use the absolute hit counts of last
+            last: snapshot to count the hits to
+
+        Returns:
+            list: (row, hits) tuples, most hit first
+        """
+        if first is None:
+            values = ((row, hits) for row, hits in enumerate(self.counts(last)) if hits != MISSING)
+        else:
+            values = enumerate(self.deltas(first, last))
+        return heapq.nlargest(n, values, key=lambda item: item[1])
@@ -0,0 +1,329 @@
+"""
+Index the ACEs of a fleet of ACL files, to find the rules matching a flow
+
+Every file is parsed once (object-group references are expanded when the
+file defines them) and its ACEs are added to inverted indexes:
+* source and destination networks: PrefixIndex (see cisco_acl.shadow), a
+  lookup costs one dict access per prefix length in use
+* destination ports: single ports by port, ranges sorted by their low port
+* protocols: by protocol number
+
+A query intersects the candidates of the indexes for the fields it gives,
+then checks the remaining ACEs field by field.  An ACE matches a query
+network only if it matches every address of it (ex. a /24 query is not
+matched by an ACE for one host of the /24).
+
+Indexes can be saved to and loaded from gzip compressed JSON files.
+
+Examples:
+    >>> index = FleetIndex()
+    >>> index.add('fw1.txt', index_lines([
+    ...     'access-list out extended deny tcp any host 10.0.0.1 eq 443',
+    ...     'access-list out extended permit tcp any 10.0.0.0 255.255.255.0 eq 443',
+    ... ]))
+    >>> [(hit.line_num, hit.action) for hit in index.query(destination='10.0.0.1', protocol='tcp', port=443)]
+    [(1, 'deny'), (2, 'permit')]
+    >>> [hit.line_num for hit in index.permitted_by(destination='10.0.0.2', protocol='tcp', port=443)]
+    [2]
+"""
+import gzip
+import json
+import logging
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from ipaddress import ip_network
+from cisco_acl.ace import (Ace, Network, ALL_PORTS, PERMIT, PROTOCOLS, FILTER_KEYWORDS,
+                           network_covers, ports_cover)
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.fleet import find_acls
+from cisco_acl.shadow import PrefixIndex
+
+logging.getLogger(__name__)
+
+Hit = namedtuple('Hit', ['path', 'line_num', 'acl', 'action', 'line'])
+"""
+path (str): ACL file
+line_num (int): line number of the ACE in the file
+acl (str): name of the ACL (ASA), None for IOS
+action (str): 'permit' or 'deny'
+line (str): the ACE
+"""
+
+
+def index_lines(lines, acl_format='ios'):
+    """
+    Parse the ACEs of an ACL for indexing
+
+    Args:
+        lines: ACL file path or iterable of lines (see read_acl)
+        acl_format (str): 'ios' or 'asa'
+
+    Returns:
+        list: (line_num, ACL name, line, Ace) tuples, one per expanded ACE,
+            ACEs with errors are skipped
+    """
+    auditor = AclAuditor(acl=lines, format=acl_format, shadowing=False)
+    records = []
+    for i, perm in auditor.permissions.items():
+        if i in auditor.errors:
+            continue
+        try:
+            aces = [Ace.from_permission(perm)]
+            if not aces[0].is_resolved and auditor.object_groups:
+                aces = auditor.object_groups.expand(aces[0])
+        except ValueError:
+            continue
+        records.extend((i, perm['name'], auditor.aces[i], ace) for ace in aces)
+    return records
+
+
+def _index_file(path, acl_format):
+    try:
+        return path, index_lines(path, acl_format), None
+    except Exception as e:
+        return path, [], '{0}: {1}'.format(type(e).__name__, e)
+
+
+class _PortIndex:
+    """ Port ranges, finding the ranges containing a port """
+
+    def __init__(self):
+        self._all = []  # ids of ALL_PORTS and references
+        self._single = {}  # port -> ids
+        self._ranges = []  # (low, high, id), sorted by low on first lookup
+        self._lows = None
+
+    def add(self, ports, rule):
+        if isinstance(ports, str) or ports == ALL_PORTS:
+            self._all.append(rule)
+            return
+        for low, high in ports:
+            if low == high:
+                self._single.setdefault(low, []).append(rule)
+            else:
+                self._ranges.append((low, high, rule))
+                self._lows = None
+
+    def containing(self, port):
+        if self._lows is None:
+            self._ranges.sort()
+            self._lows = [low for low, high, rule in self._ranges]
+        found = set(self._all)
+        found.update(self._single.get(port, ()))
+        found.update(rule for low, high, rule in self._ranges[:bisect_right(self._lows, port)] if high >= port)
+        return found
+
+
+def _query_network(network):
+    if network is None or network == 'any':
+        return None
+    network = ip_network(network, strict=False)
+    return Network(int(network.network_address), int(network.netmask), network.version)
+
+
+def _encode_network(value):
+    return list(value) if isinstance(value, Network) else value
+
+
+def _decode_network(value):
+    return Network(*value) if isinstance(value, list) else value
+
+
+class FleetIndex:
+    """ Inverted indexes of the ACEs of many ACL files """
+
+    def __init__(self):
+        self.paths = []
+        self.failed = {}  # path: why it could not be indexed
+        self.file_ids = array('I')  # per rule: index in paths
+        self.line_nums = array('I')
+        self.names = []
+        self.lines = []
+        self.aces = []
+        self._sources = PrefixIndex()
+        self._destinations = PrefixIndex()
+        self._protocols = {}  # protocol (number or reference text): ids
+        self._ports = _PortIndex()
+
+    def __len__(self):
+        return len(self.aces)
+
+    @classmethod
+    def build(cls, target, acl_format='ios', jobs=None):
+        """
+        Index ACL files, parsing them in parallel
+
+        Args:
+            target: directory, glob pattern, file, or list of any of these (see find_acls)
+            acl_format (str): 'ios' or 'asa'
+            jobs (int): number of worker processes, defaults to the number of CPUs;
+                1 parses the files in the current process
+
+        Returns:
+            FleetIndex
+        """
+        index = cls()
+        paths = find_acls(target)
+        logging.info('Indexing {0} ACL files ...'.format(len(paths)))
+        if jobs == 1:
+            results = map(partial(_index_file, acl_format=acl_format), paths)
+            for path, records, exception in results:
+                index._add_result(path, records, exception)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for path, records, exception in executor.map(
+                        partial(_index_file, acl_format=acl_format), paths, chunksize=8):
+                    index._add_result(path, records, exception)
+        return index
+
+    def _add_result(self, path, records, exception):
+        if exception is not None:
+            logging.warning('Could not index {0}: {1}'.format(path, exception))
+            self.failed[path] = exception
+        else:
+            self.add(path, records)
+
+    def add(self, path, records):
+        """
+        Add the ACEs of a file
+
+        Args:
+            path (str): ACL file
+            records (list): (line_num, ACL name, line, Ace) tuples, see index_lines
+        """
+        file_id = len(self.paths)
+        self.paths.append(path)
+        for line_num, name, line, ace in records:
+            rule = len(self.aces)
+            self.file_ids.append(file_id)
+            self.line_nums.append(line_num)
+            self.names.append(name)
+            self.lines.append(line)
+            self.aces.append(ace)
+            self._sources.setdefault(ace.source, []).append(rule)
+            self._destinations.setdefault(ace.destination, []).append(rule)
+            self._protocols.setdefault(ace.protocol, []).append(rule)
+            self._ports.add(ace.destination_ports, rule)
+
+    def _candidates(self, source, destination, protocol, port):
+        sets = []
+        for network, prefixes in ((source, self._sources), (destination, self._destinations)):
+            if network is not None:
+                sets.append({rule for rules in prefixes.containing(network) for rule in rules})
+        if protocol is not None:
+            sets.append(set(self._protocols.get(protocol, ())) | set(self._protocols.get(0, ())))
+        if port is not None:
+            sets.append(self._ports.containing(port))
+        if not sets:
+            return range(len(self.aces))
+        sets.sort(key=len)
+        return sorted(sets[0].intersection(*sets[1:]))
+
+    def query(self, source=None, destination=None, protocol=None, port=None, source_port=None, keyword=None):
+        """
+        Find the ACEs matching a flow
+
+        Args:
+            source (str): source address or network (ex. '10.0.0.1', '10.0.0.0/24'), None for any
+            destination (str): destination address or network, None for any
+            protocol: protocol name or number (ex. 'tcp', 6), None for any
+            port (int): destination port, None for any
+            source_port (int): source port, None for any
+            keyword (str): 'established' or ICMP type of the flow
+
+        Returns:
+            list: Hit for every matching ACE, in file and line order
+        """
+        source, destination = _query_network(source), _query_network(destination)
+        if isinstance(protocol, str):
+            protocol = PROTOCOLS.get(protocol, int(protocol) if protocol.isdigit() else protocol)
+        destination_ports = None if port is None else ((port, port),)
+        source_ports = None if source_port is None else ((source_port, source_port),)
+
+        hits = []
+        last = None
+        # The protocol and port indexes are exact, except for port references (see ports_cover)
+        for rule in self._candidates(source, destination, protocol, port):
+            ace = self.aces[rule]
+            if source is not None and not network_covers(ace.source, source):
+                continue
+            if destination is not None and not network_covers(ace.destination, destination):
+                continue
+            if destination_ports is not None and not ports_cover(ace.destination_ports, destination_ports):
+                continue
+            if source_ports is not None and not ports_cover(ace.source_ports, source_ports):
+                continue
+            if ace.keyword in FILTER_KEYWORDS and ace.keyword != keyword:
+                continue
+            hit = (self.file_ids[rule], self.line_nums[rule])
+            if hit == last:  # expansions of the same object-group ACE
+                continue
+            last = hit
+            hits.append(Hit(self.paths[hit[0]], hit[1], self.names[rule],
+                            'permit' if ace.action == PERMIT else 'deny', self.lines[rule]))
+        return hits
+
+    def permitted_by(self, **flow):
+        """
+        Find the ACEs permitting a flow: the first matching ACE of every ACL, if it permits the flow
+
+        Args:
+            **flow: see query
+
+        Returns:
+            list: Hit of the permitting ACEs, in file and line order
+        """
+        first = {}
+        for hit in self.query(**flow):
+            first.setdefault((hit.path, hit.acl), hit)
+        return [hit for hit in first.values() if hit.action == 'permit']
+
+    def save(self, path):
+        """
+        Save the index to a gzip compressed JSON file
+
+        Args:
+            path (str): index file
+        """
+        ports = {}  # distinct port lists, saved once: port list -> position
+        rules = [
+            [self.file_ids[rule], self.line_nums[rule], self.names[rule], self.lines[rule], ace.action, ace.protocol,
+             _encode_network(ace.source), ports.setdefault(ace.source_ports, len(ports)),
+             _encode_network(ace.destination), ports.setdefault(ace.destination_ports, len(ports)), ace.keyword]
+            for rule, ace in enumerate(self.aces)
+        ]
+        # json.dumps encodes in C, json.dump does not
+        data = json.dumps({'version': 1, 'paths': self.paths, 'failed': self.failed,
+                           'ports': list(ports), 'rules': rules})
+        with gzip.open(path, mode='wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(data)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with save()
+
+        Args:
+            path (str): index file
+
+        Returns:
+            FleetIndex
+        """
+        with gzip.open(path, mode='rt', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls()
+        index.failed = data['failed']
+        ports = [tuple(tuple(ports) for ports in value) if isinstance(value, list) else value
+                 for value in data['ports']]
+        records = [[] for _ in data['paths']]
+        for (file_id, line_num, name, line, action, protocol, source, source_ports, destination,
+             destination_ports, keyword) in data['rules']:
+            ace = Ace(action, protocol, _decode_network(source), ports[source_ports],
+                      _decode_network(destination), ports[destination_ports], keyword)
+            records[file_id].append((line_num, name, line, ace))
+        for path, file_records in zip(data['paths'], records):
+            index.add(path, file_records)
+        return index
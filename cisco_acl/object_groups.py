@@ -0,0 +1,351 @@
+"""
+Parse object-group definitions and expand the ACEs referring to them
+
+Supported object-groups:
+* network: network-object/host/range/subnet members (ASA and IOS syntax)
+* service: port-object, service-object and IOS protocol/port members
+* protocol: protocol-object members
+
+Nested groups (group-object) are resolved once and memoized, so every later
+reference to a group is a dict lookup.  Members that can't be resolved from
+the config alone (host names, network objects) are kept as their original
+text, like references in cisco_acl.ace.
+
+Examples:
+    >>> groups = ObjectGroups.from_lines([
+    ...     'object-group network web',
+    ...     ' network-object host 10.0.0.1',
+    ...     ' group-object web-backends',
+    ...     'object-group network web-backends',
+    ...     ' network-object 10.1.0.0 255.255.255.0',
+    ...     'object-group service web-ports tcp',
+    ...     ' port-object eq www',
+    ...     ' port-object range 8080 8081',
+    ... ])
+    >>> groups.networks('web')
+    (Network(address=167772161, mask=4294967295, version=4), Network(address=167837696, mask=4294967040, version=4))
+    >>> ace = Ace.from_line('access-list out extended permit tcp any object-group web object-group web-ports')
+    >>> [a.destination_ports for a in groups.expand(ace)]
+    [((80, 80), (8080, 8081)), ((80, 80), (8080, 8081))]
+"""
+import logging
+from collections import namedtuple
+from ipaddress import ip_address, ip_network, summarize_address_range
+from itertools import product
+from cisco_acl.ace import (Ace, Network, ALL_PORTS, PROTOCOLS, KEYWORDS, parse_network, parse_ports,
+                           split_port_keyword)
+
+logging.getLogger(__name__)
+
+Service = namedtuple('Service', ['protocol', 'source_ports', 'destination_ports', 'keyword'])
+
+# Member lines recognized even without indentation
+MEMBER_KEYWORDS = frozenset([
+    'network-object', 'port-object', 'service-object', 'protocol-object', 'group-object', 'description',
+])
+
+_resolving = object()
+
+
+def _protocols(protocol):
+    """ Return the protocol names a service protocol stands for """
+    if protocol == 'tcp-udp':
+        return ['tcp', 'udp']
+    return [protocol]
+
+
+def _protocol_number(protocol):
+    if protocol in PROTOCOLS:
+        return PROTOCOLS[protocol]
+    if protocol.isdigit() and int(protocol) <= 255:
+        return int(protocol)
+    raise ValueError('Invalid protocol: {0}'.format(protocol))
+
+
+def _merge_ranges(ranges):
+    """ Sort port ranges and merge the overlapping/adjacent ones """
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(high, merged[-1][1]))
+        else:
+            merged.append((low, high))
+    return tuple(merged)
+
+
+class ObjectGroups:
+    """ Object-group definitions of a config, with memoized expansions """
+
+    def __init__(self, acl_format='asa'):
+        """
+        Args:
+            acl_format (str): 'ios' or 'asa', used to translate port names
+        """
+        self.acl_format = acl_format
+        self.groups = {}
+        """
+        groups = {
+            # name: (type, protocol, member lines)
+            'web': ('network', None, ['network-object host 10.0.0.1']),
+            'web-ports': ('service', 'tcp', ['port-object eq www']),
+        }
+        """
+        self._current = None
+        self._networks = {}
+        self._services = {}
+
+    @classmethod
+    def from_lines(cls, lines, acl_format='asa'):
+        """
+        Parse the object-groups of a config
+
+        Args:
+            lines (iterable): lines of the config, other lines are ignored
+            acl_format (str): 'ios' or 'asa'
+
+        Returns:
+            ObjectGroups
+        """
+        groups = cls(acl_format)
+        for line in lines:
+            groups.feed(line)
+        return groups
+
+    def __contains__(self, name):
+        return name.lower() in self.groups
+
+    def __len__(self):
+        return len(self.groups)
+
+    def feed(self, line):
+        """
+        Parse one line of a config
+
+        Members are the indented lines (or lines starting with a member
+        keyword) following an 'object-group' line.
+
+        Args:
+            line (str): line of the config
+
+        Returns:
+            bool: True if the line is part of an object-group definition
+        """
+        words = line.lower().split()
+        if not words:
+            return False
+
+        if words[0] == 'object-group' and len(words) >= 3:
+            kind, name = words[1], words[2]
+            protocol = words[3] if len(words) > 3 else None
+            self._current = self.groups.setdefault(name, (kind, protocol, []))
+            self._networks.clear()
+            self._services.clear()
+            return True
+
+        if self._current is not None and (line[:1].isspace() or words[0] in MEMBER_KEYWORDS):
+            self._current[2].append(' '.join(words))
+            self._networks.clear()
+            self._services.clear()
+            return True
+
+        self._current = None
+        return False
+
+    def _resolve(self, name, kinds, cache, parse_member):
+        name = name.lower()
+        result = cache.get(name)
+        if result is _resolving:
+            raise ValueError('Circular object-group reference: {0}'.format(name))
+        if result is not None:
+            return result
+        if name not in self.groups:
+            raise ValueError('Undefined object-group: {0}'.format(name))
+
+        kind, protocol, members = self.groups[name]
+        if kind not in kinds:
+            raise ValueError('Object-group {0} is not a {1} object-group'.format(name, '/'.join(kinds)))
+
+        cache[name] = _resolving
+        try:
+            result = []
+            for member in members:
+                words = member.split()
+                if words[0] == 'description':
+                    continue
+                if words[0] == 'group-object':
+                    result.extend(self._resolve(words[1], kinds, cache, parse_member))
+                    continue
+                try:
+                    result.extend(parse_member(words, protocol))
+                except (ValueError, IndexError) as e:
+                    raise ValueError('Invalid member of object-group {0}: "{1}"'.format(name, member)) from e
+        except BaseException:
+            del cache[name]
+            raise
+
+        cache[name] = result = tuple(dict.fromkeys(result))
+        return result
+
+    def networks(self, name):
+        """
+        Return the networks of a network object-group, nested groups included
+
+        Args:
+            name (str): name of the object-group
+
+        Returns:
+            tuple: Network tuples (or text of unresolvable members), in definition order
+
+        Raises:
+            ValueError: undefined or circular object-group, or invalid member
+        """
+        return self._resolve(name, ('network',), self._networks, self._parse_network)
+
+    def services(self, name):
+        """
+        Return the services of a service or protocol object-group, nested groups included
+
+        Args:
+            name (str): name of the object-group
+
+        Returns:
+            tuple: Service tuples, in definition order
+
+        Raises:
+            ValueError: undefined or circular object-group, or invalid member
+        """
+        return self._resolve(name, ('service', 'protocol'), self._services, self._parse_service)
+
+    def _parse_network(self, words, protocol=None):
+        if words[0] == 'network-object':
+            words = words[1:]
+        if words[0] == 'object':
+            return [' '.join(words)]
+        if words[0] in ('any', 'any4', 'host'):
+            return [parse_network(' '.join(words))]
+        if words[0] == 'any6':
+            return [Network(0, 0, 6)]
+        if words[0] == 'range':
+            first, last = ip_address(words[1]), ip_address(words[2])
+            return [Network(int(net.network_address), int(net.netmask), net.version)
+                    for net in summarize_address_range(first, last)]
+        if '/' in words[0]:
+            net = ip_network(words[0])
+            return [Network(int(net.network_address), int(net.netmask), net.version)]
+        return [parse_network(' '.join(words[:2]), 'subnet')]
+
+    def _parse_service(self, words, protocol=None):
+        if words[0] == 'protocol-object':
+            return [Service(_protocol_number(words[1]), ALL_PORTS, ALL_PORTS, None)]
+
+        if words[0] == 'port-object':
+            if protocol is None:
+                raise ValueError('port-object in an object-group without protocol')
+            return [Service(PROTOCOLS[name], ALL_PORTS, parse_ports(' '.join(words[1:]), name, self.acl_format), None)
+                    for name in _protocols(protocol)]
+
+        if words[0] == 'service-object':
+            words = words[1:]
+        if words[0] == 'object':
+            raise ValueError('Service objects are not supported')
+
+        source, destination, keyword = [], [], None
+        ports = destination
+        for word in words[1:]:
+            if word == 'source':
+                ports = source
+            elif word == 'destination':
+                ports = destination
+            elif word in KEYWORDS and (not ports or split_port_keyword(
+                    ports + [word], 'udp' if words[0] == 'udp' else 'tcp', self.acl_format)[1] == word):
+                keyword = word
+            else:
+                ports.append(word)
+
+        services = []
+        for name in _protocols(words[0]):
+            if name in ('tcp', 'udp'):
+                source_ports = parse_ports(' '.join(source), name, self.acl_format) if source else ALL_PORTS
+                destination_ports = (parse_ports(' '.join(destination), name, self.acl_format)
+                                     if destination else ALL_PORTS)
+            elif source or destination:
+                raise ValueError('Unsupported service: {0}'.format(' '.join(words)))
+            else:
+                source_ports = destination_ports = ALL_PORTS
+            services.append(Service(_protocol_number(name), source_ports, destination_ports, keyword))
+        return services
+
+    def _expand_network(self, network):
+        if isinstance(network, str) and network.startswith('object-group '):
+            return self.networks(network.split()[1])
+        return (network,)
+
+    def _ace_ports(self, ports, service_ports, protocol):
+        if ports == ALL_PORTS:
+            return service_ports
+        if service_ports != ALL_PORTS:
+            raise ValueError('Invalid ACE: ports after a service object-group with ports')
+        name = 'tcp' if protocol == PROTOCOLS['tcp'] else 'udp'
+        return self._expand_ports(parse_ports(ports, name, self.acl_format), protocol)
+
+    def _expand_ports(self, ports, protocol):
+        if isinstance(ports, str) and ports.startswith('object-group '):
+            return _merge_ranges(
+                port_range
+                for service in self.services(ports.split()[1]) if service.protocol == protocol
+                for port_range in service.destination_ports
+            )
+        return ports
+
+    def expand(self, ace):
+        """
+        Expand the object-group references of an Ace into concrete Aces
+
+        Args:
+            ace (Ace): ACE to expand
+
+        Returns:
+            list: Aces matching the same traffic, in order
+
+        Raises:
+            ValueError: undefined or circular object-group, or invalid member
+        """
+        source_ports, destination, destination_ports = ace.source_ports, ace.destination, ace.destination_ports
+
+        # 'permit tcp object-group a object-group b object-group c' is parsed with
+        # b as source ports, only the definitions tell it's the destination
+        if isinstance(source_ports, str) and source_ports.split()[0] == 'object-group':
+            group = self.groups.get(source_ports.split()[1])
+            if group is not None and group[0] == 'network':
+                if destination_ports != ALL_PORTS:
+                    raise ValueError('Invalid ACE: ports after {0}'.format(destination))
+                source_ports, destination, destination_ports = ALL_PORTS, source_ports, destination
+
+        if isinstance(ace.protocol, str):
+            services = self.services(ace.protocol.split()[1])
+            if source_ports != ALL_PORTS or destination_ports != ALL_PORTS:
+                # The ports of the ACE only match the TCP and UDP members of the group
+                services = tuple(
+                    Service(
+                        service.protocol,
+                        self._ace_ports(source_ports, service.source_ports, service.protocol),
+                        self._ace_ports(destination_ports, service.destination_ports, service.protocol),
+                        service.keyword,
+                    )
+                    for service in services if service.protocol in (PROTOCOLS['tcp'], PROTOCOLS['udp'])
+                )
+        else:
+            services = (Service(
+                ace.protocol,
+                self._expand_ports(source_ports, ace.protocol),
+                self._expand_ports(destination_ports, ace.protocol),
+                ace.keyword,
+            ),)
+
+        return [
+            Ace(ace.action, service.protocol, source, service.source_ports,
+                dest, service.destination_ports, service.keyword or ace.keyword)
+            for service, source, dest in product(
+                services, self._expand_network(ace.source), self._expand_network(destination))
+            if service.source_ports and service.destination_ports
+        ]
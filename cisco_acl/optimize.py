@@ -0,0 +1,262 @@
+"""
+Rewrite an ACL into a smaller ACL matching exactly the same traffic
+
+TCAM entries are what limits hardware ACLs: every ACE takes one entry per
+(source prefix, source port range, destination prefix, destination port
+range) combination.  optimize() cuts them down in three passes:
+* shadowed and redundant ACEs are dropped, since they never match (see
+  cisco_acl.shadow)
+* within a run of consecutive ACEs with the same action, the order of the
+  ACEs does not matter, so ACEs differing only by one network are merged
+  with ipaddress.collapse_addresses, and ACEs differing only by their ports
+  are merged into the union of their port ranges
+* ACEs covered by a merged ACE are dropped again
+
+ACEs referring to object-groups or host names, and networks with
+non-contiguous masks, are kept as they are.  So are ACEs with an empty port
+list (ex. 'gt 65535'): they are neither merged nor dropped, an empty list
+is more likely a parsing problem than a dead ACE.
+
+verify() checks that two ACLs give the same action for sampled flows: flows
+inside every ACE of both ACLs (including the edges of their networks and
+port ranges) and random flows.
+
+Examples:
+    >>> from cisco_acl.ace import Acl
+    >>> acl = Acl.from_lines([
+    ...     'permit tcp any 10.0.0.0 0.0.0.255 eq 80',
+    ...     'permit tcp any 10.0.1.0 0.0.0.255 eq 80',
+    ...     'permit tcp any 10.0.0.0 0.0.1.255 eq 81',
+    ...     'permit tcp any host 10.0.0.1 eq 80',
+    ...     'deny ip any any',
+    ... ])
+    >>> optimized = optimize(acl.items())
+    >>> for ace in optimized:
+    ...     print(ace.to_line())
+    permit tcp any 10.0.0.0 0.0.1.255 range 80 81
+    deny ip any any
+    >>> verify(acl.items(), optimized)
+    []
+"""
+import logging
+import random
+from ipaddress import IPv6Address, ip_network, collapse_addresses
+from cisco_acl.ace import Ace, ANY, MAX_MASK, PROTOCOL_NAMES, FILTER_KEYWORDS, Network, prefix_length
+from cisco_acl.classify import CompiledAcl, Flow
+from cisco_acl.shadow import find_shadowed
+
+logging.getLogger(__name__)
+
+FIELDS = ('action', 'protocol', 'source', 'source_ports', 'destination', 'destination_ports', 'keyword')
+
+
+def merge_ranges(ranges):
+    """
+    Merge overlapping and adjacent port ranges
+
+    Args:
+        ranges (iterable): (low, high) port ranges
+
+    Returns:
+        tuple: sorted, disjoint (low, high) port ranges
+
+    Examples:
+        >>> merge_ranges([(80, 80), (81, 81), (443, 443), (79, 80)])
+        ((79, 81), (443, 443))
+    """
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return tuple((low, high) for low, high in merged)
+
+
+def collapse_networks(networks):
+    """
+    Merge networks into the smallest list of networks covering the same addresses
+
+    Args:
+        networks (iterable): Network or reference text
+
+    Returns:
+        list: Network or reference text, references and non-contiguous masks unchanged
+    """
+    networks = list(dict.fromkeys(networks))
+    if ANY in networks:
+        return [ANY]
+    kept, prefixes = [], {4: [], 6: []}
+    for network in networks:
+        length = None if isinstance(network, str) else prefix_length(network)
+        if length is None:
+            kept.append(network)
+        else:
+            prefixes[network.version].append(ip_network((network.address, length)))
+    for version, version_prefixes in prefixes.items():
+        for prefix in collapse_addresses(version_prefixes):
+            kept.append(Network(int(prefix.network_address), int(prefix.netmask), version))
+    return kept
+
+
+def _merge_field(aces, field):
+    """ Merge the ACEs which only differ by one field """
+    groups = {}
+    for ace in aces:
+        key = tuple(getattr(ace, other) for other in FIELDS if other != field)
+        groups.setdefault(key, []).append(getattr(ace, field))
+
+    merged = []
+    index = FIELDS.index(field)
+    for key, values in groups.items():
+        if field in ('source', 'destination'):
+            values = collapse_networks(values)
+        elif any(isinstance(value, str) for value in values):
+            values = list(dict.fromkeys(values))
+        else:
+            values = [merge_ranges(ports for value in values for ports in value)]
+        for value in values:
+            merged.append(Ace(*(key[:index] + (value,) + key[index:])))
+    return merged
+
+
+def _has_ports(ace):
+    return bool(ace.source_ports) and bool(ace.destination_ports)
+
+
+def _drop_covered(aces):
+    covered = {line_num for line_num, _, _ in find_shadowed((i, ace) for i, ace in enumerate(aces) if _has_ports(ace))}
+    return [ace for i, ace in enumerate(aces) if i not in covered]
+
+
+def optimize(aces):
+    """
+    Optimize an ACL
+
+    Args:
+        aces (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+
+    Returns:
+        list: Ace of the optimized ACL, in ACL order
+    """
+    aces = _drop_covered([ace for _, ace in aces])
+
+    runs = []
+    for ace in aces:
+        # ACEs with an empty port list are runs of their own, kept as they are
+        if runs and runs[-1][0].action == ace.action and _has_ports(ace) and _has_ports(runs[-1][0]):
+            runs[-1].append(ace)
+        else:
+            runs.append([ace])
+
+    optimized = []
+    for run in runs:
+        if not _has_ports(run[0]):
+            optimized.extend(run)
+            continue
+        size = None
+        while size != len(run):
+            size = len(run)
+            for field in ('destination', 'source', 'destination_ports', 'source_ports'):
+                run = _merge_field(run, field)
+        optimized.extend(run)
+    return _drop_covered(optimized)
+
+
+def to_lines(aces, acl_format='ios', name=None):
+    """
+    Render ACEs as the lines of an ACL
+
+    ACEs whose ports can't be written in a single line (ex. two ranges) are
+    split into one line per port range.
+
+    Args:
+        aces (iterable): Ace
+        acl_format (str): 'ios' or 'asa', see Ace.to_line
+        name (str): name of the ACL, required for 'asa'
+
+    Returns:
+        list: lines
+    """
+    lines = []
+    for ace in aces:
+        try:
+            lines.append(ace.to_line(acl_format, name))
+            continue
+        except ValueError:
+            pass
+        for source_ports in _split_ports(ace.source_ports):
+            for destination_ports in _split_ports(ace.destination_ports):
+                split = Ace(ace.action, ace.protocol, ace.source, source_ports,
+                            ace.destination, destination_ports, ace.keyword)
+                lines.append(split.to_line(acl_format, name))
+    return lines
+
+
+def _split_ports(ports):
+    if isinstance(ports, str) or len(ports) == 1:
+        return [ports]
+    singles = tuple(ports for ports in ports if ports[0] == ports[1])
+    ranges = [(ports,) for ports in ports if ports[0] != ports[1]]
+    return ([singles] if singles else []) + ranges
+
+
+def _sample_address(rng, network, version):
+    """ Return an address of network: its first, last or a random address """
+    host_bits = MAX_MASK[version] ^ network.mask
+    address = network.address | (rng.choice([0, host_bits, rng.getrandbits(128)]) & host_bits)
+    return IPv6Address(address) if version == 6 else address
+
+
+def _sample_port(rng, ports):
+    low, high = rng.choice(ports)
+    return rng.choice([low, high, rng.randint(low, high)])
+
+
+def _sample_flows(rng, aces, samples):
+    """ Yield flows inside the given ACEs, then random flows """
+    protocols = list(PROTOCOL_NAMES)
+    for ace in aces:
+        if not ace.is_resolved or not ace.source_ports or not ace.destination_ports:
+            continue
+        versions = {ace.source.version, ace.destination.version} - {0}
+        if len(versions) > 1:
+            continue  # IPv4 source and IPv6 destination, never matches
+        version = versions.pop() if versions else 4
+        keyword = ace.keyword if ace.keyword in FILTER_KEYWORDS else None
+        for _ in range(samples):
+            yield Flow(
+                _sample_address(rng, ace.source, version),
+                _sample_address(rng, ace.destination, version),
+                ace.protocol or rng.choice(protocols),
+                _sample_port(rng, ace.source_ports),
+                _sample_port(rng, ace.destination_ports),
+                keyword,
+            )
+    for _ in range(samples * 10):
+        yield Flow(rng.getrandbits(32), rng.getrandbits(32), rng.choice(protocols),
+                   rng.randint(0, 65535), rng.randint(0, 65535))
+
+
+def verify(original, optimized, samples=20, seed=0):
+    """
+    Check that two ACLs give the same action to sampled flows
+
+    Args:
+        original (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+        optimized (iterable): Ace or (line_num, Ace) tuples in ACL order
+        samples (int): flows sampled per ACE (random flows: 10 times as many)
+        seed: random seed, the same seed samples the same flows
+
+    Returns:
+        list: Flow given a different action by the two ACLs, empty if none was found
+    """
+    original = [ace for _, ace in original]
+    optimized = [ace if isinstance(ace, Ace) else ace[1] for ace in optimized]
+    before = CompiledAcl(enumerate(original, start=1))
+    after = CompiledAcl(enumerate(optimized, start=1))
+    rng = random.Random(seed)
+    return [
+        flow for flow in _sample_flows(rng, original + optimized, samples)
+        if before.permits(flow) != after.permits(flow)
+    ]
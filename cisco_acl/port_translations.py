@@ -35,18 +35,64 @@ Examples:
 >>> ace = 'access-list test extended permit tcp any any range 80 81'
 >>> PortTranslator(ace).translate_ace(acl_format='asa', conversion_type='to_name')
 'access-list test extended permit tcp any any range www 81'
+
+# Translate a whole ACL in one pass
+>>> list(translate_acl(['permit tcp any any eq 80', 'permit udp any any eq 53'], 'ios', 'to_name'))
+['permit tcp any any eq www', 'permit udp any any eq domain']
 """
-import re
-import json
 import os
 import logging
-from cisco_acl.regexes import ace_match
+from cisco_acl.regexes import ace_spans
 
 logging.getLogger(__name__)
 
 translation_file = os.path.join(os.path.dirname(__file__), 'port_translations.json')
-with open(translation_file, mode='rt') as f:
-    translation_groups = json.loads(f.read())
+
+# translation_groups (acl_format -> protocol -> port name -> port number) and
+# translation_names (see _build_name_maps) are loaded on first use
+_tables = {}
+
+
+def _build_name_maps(groups):
+    """
+    Build the reverse (number -> name) maps of the translation groups
+
+    When several names share a number (ex. cmd/rsh), the first one listed wins.
+    """
+    name_maps = {}
+    for acl_format, protocols in groups.items():
+        name_maps[acl_format] = {}
+        for protocol, ports in protocols.items():
+            names = {}
+            for port_name, num in ports.items():
+                names.setdefault(int(num), port_name)
+            name_maps[acl_format][protocol] = names
+    return name_maps
+
+
+def _load(name):
+    """ Return a translation table, loading port_translations.json on first use """
+    if not _tables:
+        import json
+        with open(translation_file, mode='rt') as f:
+            groups = json.loads(f.read())
+        _tables['translation_groups'] = groups
+        # acl_format -> protocol -> port number (int) -> port name
+        _tables['translation_names'] = _build_name_maps(groups)
+    return _tables[name]
+
+
+def __getattr__(name):
+    if name in ('translation_groups', 'translation_names'):
+        return _load(name)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
+# Canonical spelling of the port operators accepted by cisco_acl.regexes.ports_rx
+port_operators = {
+    'e': 'eq', 'eq': 'eq', 'gt': 'gt', 'ge': 'ge', 'lt': 'lt', 'le': 'le', 'ne': 'neq',
+    'r': 'range', 'ra': 'range', 'ran': 'range', 'rang': 'range', 'range': 'range',
+}
 
 
 def translate_port(acl_format, protocol, ports, conversion_type):
@@ -63,21 +109,24 @@ def translate_port(acl_format, protocol, ports, conversion_type):
         list: translated ports
     """
 
-    def translate(port):
-        if conversion_type == 'to_name':
-            for port_name, num in translation_groups[acl_format][protocol].items():
-                try:
-                    if int(num) == int(port):
-                        return port_name
-                except:
-                    return port
+    if conversion_type == 'to_name':
+        names = _load('translation_names')[acl_format][protocol]
+
+        def translate(port):
+            try:
+                return names.get(int(port), port)
+            except ValueError:
+                return port
+
+    elif conversion_type == 'to_number':
+        numbers = _load('translation_groups')[acl_format][protocol]
 
-        elif conversion_type == 'to_number':
-            logging.debug(list(translation_groups[acl_format][protocol].keys()))
-            if port in translation_groups[acl_format][protocol]:
-                return translation_groups[acl_format][protocol][port]
+        def translate(port):
+            return numbers.get(port, port)
 
-        return port
+    else:
+        def translate(port):
+            return port
 
     translated_ports = [translate(port) for port in ports]
 
@@ -87,21 +136,92 @@ def translate_port(acl_format, protocol, ports, conversion_type):
         return translated_ports
 
 
+def _check_translation(acl_format, conversion_type):
+    translation_groups = _load('translation_groups')
+    if acl_format not in translation_groups:
+        raise ValueError('ACL format "{0}" not in {1}'.format(acl_format, list(translation_groups.keys())))
+
+    conversion_types = ['to_name', 'to_number']
+    if conversion_type not in conversion_types:
+        raise ValueError('Unknown conversion type: {0} Acceptable types: {1}'.format(
+            conversion_type, conversion_types))
+
+
+def _translate_line(line, spans, acl_format, conversion_type):
+    """
+    Translate the ports of an ACE in place
+
+    Args:
+        line (str): ACE
+        spans (dict): field spans of the ACE from cisco_acl.regexes.ace_spans
+        acl_format (str): 'ios' or 'asa'
+        conversion_type (str): 'to_name' or 'to_number'
+
+    Returns:
+        str: ACE with ports translated
+    """
+    protocol = line[slice(*spans['protocol'])].lower()
+    if protocol not in ['tcp', 'udp']:
+        return line
+
+    # Translate right to left so the spans of the fields still to be translated stay valid
+    for field in ['destination_ports', 'source_ports']:
+        if spans[field] is None:
+            continue
+        start, end = spans[field]
+        words = line[start:end].lower().split()
+        if words[0] not in port_operators:  # object-group / port-group
+            continue
+
+        translated = translate_port(acl_format, protocol, words[1:], conversion_type)
+        ports = ' '.join([port_operators[words[0]]] + translated)
+        line = line[:start] + ports + line[start + len(line[start:end].rstrip()):]
+
+    return line
+
+
+def translate_acl(lines, acl_format='ios', conversion_type='to_name'):
+    """
+    Translate the ports of every ACE in an ACL between names and numbers
+
+    Each line is parsed once; lines that are not ACEs (remarks, comments, ...)
+    are passed through unchanged.
+
+    Args:
+        lines (iterable): lines of the ACL
+        acl_format (str): 'ios' or 'asa'
+        conversion_type (str): 'to_name' or 'to_number'
+
+    Returns:
+        generator: lines with ports translated
+    """
+    _check_translation(acl_format, conversion_type)
+    for line in lines:
+        spans = ace_spans(line)
+        if not spans:
+            yield line
+        else:
+            yield _translate_line(line, spans, acl_format, conversion_type)
+
+
 class PortTranslator:
     def __init__(self, ace):
         self.ace = ace
         self.formats = ['ios', 'asa']
         self.permission = dict()
+        self.spans = dict()
         self._parse_ace()
 
     def _parse_ace(self):
         """
         Parse an ACE using the cisco_acl.regexes library
         """
-        permission = ace_match(self.ace)
-        if not permission:
+        spans = ace_spans(self.ace)
+        if not spans:
             raise SyntaxError('Invalid ACE: {0}'.format(self.ace))
-        self.permission = permission
+        ace = self.ace.lower()
+        self.spans = spans
+        self.permission = {field: (None if span is None else ace[span[0]:span[1]]) for field, span in spans.items()}
 
     def translate_ace(self, acl_format='ios', conversion_type='to_name'):
         """
@@ -117,52 +237,8 @@ class PortTranslator:
         if self.permission['protocol'].lower() not in ['tcp', 'udp']:
             return self.ace
 
-        if acl_format not in translation_groups:
-            raise ValueError('ACL format "{0}" not in {1}'.format(acl_format, list(translation_groups.keys())))
-
-        conversion_types = ['to_name', 'to_number']
-        if conversion_type not in conversion_types:
-            raise ValueError('Unknown conversion type: {0} Acceptable types: {1}'.format(
-                conversion_type, conversion_types))
-
-        # We have two possible conversions to make (source ports, destination ports)
-        ports = [self.permission['source_ports'], self.permission['destination_ports']]
-
-        line = self.ace
-
-        for port in ports:
-            if port is None:
-                continue
-
-            if re.match('^object-group', port, flags=re.I):
-                continue
-
-            port = port.lower()
-            _ports = port.split()[1:]
-            _translated_ports = translate_port(
-                acl_format, self.permission['protocol'].lower(), _ports, conversion_type
-            )
-            if len(_translated_ports) > 1:
-                _translated_ports = ' '.join(_translated_ports)
-            else:
-                _translated_ports = _translated_ports[0]
-
-            if port.startswith('e'):  # eq
-                line = re.sub(port, 'eq {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('gt'):  # gt
-                line = re.sub(port, 'gt {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('ge'):  # ge
-                line = re.sub(port, 'ge {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('lt'):  # lt
-                line = re.sub(port, 'lt {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('le'):  # le
-                line = re.sub(port, 'le {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('n'):  # neq
-                line = re.sub(port, 'neq {}'.format(_translated_ports), line, flags=re.I)
-            elif port.startswith('r'):  # range
-                line = re.sub(port, 'range {}'.format(_translated_ports), line, flags=re.I)
-            else:
-                raise ValueError('Invalid Port: {0} in ACE: {1}'.format(port, self.ace))
+        _check_translation(acl_format, conversion_type)
+        line = _translate_line(self.ace, self.spans, acl_format, conversion_type)
 
         logging.debug('ACE "{0}" translated to "{1}"'.format(self.ace, line))
         return line
@@ -73,6 +73,8 @@ ipv6_address_rx = (
 
 ip_address_rx = r'({0}|{1})'.format(ipv4_address_rx, ipv6_address_rx)
 subnet_rx = r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
+# IPv4 host or address and mask with valid octets, checked without ipaddress (see cisco_acl.validate)
+ipv4_network_rx = r'host ({0})|({0}) ({0})'.format(ipv4_address_rx)
 
 # Regular expressions for processing Cisco ACL data
 # DNS names using the 'host' keyword
@@ -132,7 +134,7 @@ cisco_acl_regex = (
     r'(?:\s+)?'
     r'(?:\s+(?P<destination_ports>{prt_rx}))?'  # destination ports
     r'(?:\s+(?P<keyword>{key_rx}))?'  # keywords (ex. established)
-    r'(?:\(hitcnt=\d+\)\s+[A-Za-z0-9]+)?'  # (hitcnt=0) 0x0540b3cb
+    r'(?:\(hitcnt=(?P<hitcnt>\d+)\)\s+(?P<rule_hash>[A-Za-z0-9]+))?'  # (hitcnt=0) 0x0540b3cb
     r'$'.format(
         pro_rx=protocol_rx,
         net_rx=host_or_network_rx,
@@ -141,12 +143,440 @@ cisco_acl_regex = (
     )
 )
 
+# cisco_acl_regex restricted to lower case ACEs with single spaces, which ace_match tries first.
+# The ends of a list of ports are tried in the order ports_rx backtracks through them (after
+# the ports ending with a digit first, then after the others, see _source_port_ends), but
+# without splitting the ports into characters every possible way: an invalid ACE fails in
+# polynomial time, and a valid one gets the same fields as with cisco_acl_regex.  IPv6 hosts
+# are matched loosely, ace_match checks them with ip_address_rx.
+_fast_keyword_rx = r'(?:established|echo|echo-reply|time-exceeded|unreachable|log)'
+_fast_port_list_rx = r'(?:e|eq|gt|lt|ne|le|ge)(?: [a-z0-9-]+)+'
+_fast_other_ports_rx = r'(?:r|ra|ran|rang|range) [a-z0-9-]+ [a-z0-9-]+|(?:object-group|port-group) [a-z0-9._-]+'
+_fast_network_rx = (
+    r'host (?:[a-z0-9.-]+|[0-9a-f:.]+)'
+    r'|[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3} [0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}'
+    r'|any4?'
+    r'|object-group [a-z0-9._:-]+'
+    r'|addrgroup [a-z0-9._-]+'
+)
+fast_acl_regex = (
+    r'(?:(?P<sequence>[0-9]+) )?'
+    r'(?:access-list (?P<name>[a-z0-9_-]+) extended )?'
+    r'(?P<action>permit|deny) '
+    r'(?P<protocol>(?:ahp|eigrp|esp|gre|icmp|igmp|ip|object-group|ospf|pcp|pim|tcp|udp|[0-9]{{1,3}})'
+    r'|object-group [a-z0-9._:-]+) '
+    r'(?P<source>{net_rx})'
+    r'(?: (?P<source_ports>{list_rx}?(?<=[0-9])|{list_rx}(?<![0-9])|{other_rx}))?'
+    r' (?P<destination>{net_rx}|(?=\(hitcnt=))'  # empty in front of (hitcnt=N), as with cisco_acl_regex
+    r'(?: (?=\(hitcnt=))?'
+    # A list of ports ends on a keyword after a digit, or takes the space in front of (hitcnt=N)
+    r'(?: (?P<destination_ports>{list_rx}?(?:(?<=[0-9])(?= {key_rx}\Z)|(?=\Z)| (?=\(hitcnt=))|{other_rx}))?'
+    r'(?: (?P<keyword>{key_rx}))?'
+    r'(?:\(hitcnt=(?P<hitcnt>[0-9]+)\) (?P<rule_hash>[a-z0-9]+))?'
+    r'\Z'.format(
+        net_rx=_fast_network_rx,
+        list_rx=_fast_port_list_rx,
+        other_rx=_fast_other_ports_rx,
+        key_rx=_fast_keyword_rx,
+    )
+)
+
+
+# The compiled regexes (cisco_acl_re, fast_acl_re, ip_address_re, ipv4_network_re) are only built on
+# first use: compiling cisco_acl_regex takes longer than importing the rest of the package
+_compiled = {}
+_patterns = {
+    'cisco_acl_re': (cisco_acl_regex, re.I),
+    'fast_acl_re': (fast_acl_regex, 0),  # for lower case ACEs
+    'ip_address_re': (ip_address_rx, re.I),
+    'ipv4_network_re': (ipv4_network_rx, re.I),
+}
+
+
+def _regex(name):
+    regex = _compiled.get(name)
+    if regex is None:
+        regex = _compiled[name] = re.compile(*_patterns[name])
+    return regex
+
+
+def __getattr__(name):
+    if name in _patterns:
+        return _regex(name)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
+# Token tables used by the ACE tokenizer (ace_tokenize)
+_protocols = frozenset([
+    'ahp', 'eigrp', 'esp', 'gre', 'icmp', 'igmp', 'ip', 'object-group', 'ospf', 'pcp', 'pim', 'tcp', 'udp'
+])
+_keywords = frozenset(['established', 'echo', 'echo-reply', 'time-exceeded', 'unreachable', 'log'])
+_port_operators = frozenset(['e', 'eq', 'gt', 'lt', 'ne', 'le', 'ge'])
+_range_operators = frozenset(['r', 'ra', 'ran', 'rang', 'range'])
+_group_operators = frozenset(['object-group', 'port-group'])
+_all_port_operators = _port_operators | _range_operators | _group_operators
+_port_chars = 'abcdefghijklmnopqrstuvwxyz0123456789-'
+_host_chars = _port_chars + '.'
+_group_chars = _port_chars + '._'
+_name_chars = _port_chars + '_'
+_hash_chars = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def _is_dotted_quad(token):
+    parts = token.split('.')
+    if len(parts) != 4:
+        return False
+    for part in parts:
+        if not part.isdigit() or len(part) > 3:
+            return False
+    return True
+
+
+def _is_hitcnt(token):
+    return token.startswith('(hitcnt=') and token.endswith(')') and token[8:-1].isdigit()
+
+
+def _network_end(tokens, i, n):
+    """ Return the index after the network starting at tokens[i], or -1 if there is none """
+    if i >= n:
+        return -1
+    token = tokens[i]
+    if token == 'any' or token == 'any4':
+        return i + 1
+    if i + 1 < n:
+        arg = tokens[i + 1]
+        if token == 'host':
+            if not arg.strip(_host_chars) or (':' in arg and _regex('ip_address_re').fullmatch(arg)):
+                return i + 2
+        elif token == 'object-group':
+            if not arg.strip(_group_chars + ':'):
+                return i + 2
+        elif token == 'addrgroup':
+            if not arg.strip(_group_chars):
+                return i + 2
+        elif _is_dotted_quad(token) and _is_dotted_quad(arg):
+            return i + 2
+    return -1
+
+
+def _source_port_ends(tokens, i, n):
+    """
+    Return the possible ends of the source port list whose operator is tokens[i]
+
+    The ends are in the order ports_rx backtracks through them, so the first one
+    the rest of the ACE matches from is the one the regex would have picked: in
+    a list of ports, the regex first tries to stop after a port ending with a
+    digit (\\d{1,5} does not take the following space), and to go on after the
+    other ports.  Stopping with the following space taken is left out, the
+    destination can't match after it.
+
+    Returns:
+        list: indexes after the last port
+    """
+    op = tokens[i]
+    if op in _port_operators:
+        last = i + 1
+        while last < n and not tokens[last].strip(_port_chars):
+            last += 1
+        ends = [j + 1 for j in range(i + 1, last) if tokens[j][-1].isdigit()]
+        ends.extend(j + 1 for j in range(last - 1, i, -1) if not tokens[j][-1].isdigit())
+        return ends
+    if op in _range_operators:
+        if i + 2 < n and not tokens[i + 1].strip(_port_chars) and not tokens[i + 2].strip(_port_chars):
+            return [i + 3]
+        return []
+    if i + 1 < n and not tokens[i + 1].strip(_group_chars):
+        return [i + 2]
+    return []
+
+
+def _destination_ports(tokens, i, n, m):
+    """
+    Match the destination port list whose operator is tokens[i], up to the end of the ACE
+
+    A list of ports only ends on the keyword following it if its last port ends
+    with a digit ('eq www log' is a list of two ports for the regex).  (hitcnt=N)
+    follows without a separator in cisco_acl_regex, so it only matches after a
+    list of ports, which takes the space in front of it.
+
+    Args:
+        tokens (list): tokens of the ACE
+        i (int): index of the port operator
+        n (int): number of tokens
+        m (int): index of (hitcnt=N), n without it
+
+    Returns:
+        tuple: (index after the last port, swallowed, keyword index or None), or None
+    """
+    op = tokens[i]
+    if op in _port_operators:
+        if i + 1 >= m:
+            return None
+        for j in range(i + 1, m):
+            if tokens[j].strip(_port_chars):
+                return None
+        if m < n:
+            return m, True, None
+        if m - 2 > i and tokens[m - 1] in _keywords and tokens[m - 2][-1].isdigit():
+            return m - 1, False, m - 1
+        return m, False, None
+
+    if op in _range_operators:
+        if i + 2 >= n or tokens[i + 1].strip(_port_chars) or tokens[i + 2].strip(_port_chars):
+            return None
+        end = i + 3
+    elif i + 1 < n and not tokens[i + 1].strip(_group_chars):
+        end = i + 2
+    else:
+        return None
+    if end == n:
+        return end, False, None
+    if end == n - 1 and tokens[end] in _keywords:
+        return end, False, end
+    return None
+
+
+def _destination(tokens, i, n, m):
+    """
+    Match the destination network, ports and the end of the ACE starting at tokens[i]
+
+    Args:
+        tokens (list): tokens of the ACE
+        i (int): index of the destination
+        n (int): number of tokens
+        m (int): index of (hitcnt=N), n without it
+
+    Returns:
+        tuple: (start, end, ports, keyword index), or None
+    """
+    end = _network_end(tokens, i, n)
+    if end < 0:
+        if i == m < n:
+            # host_or_network_rx matches an empty destination in front of (hitcnt=N)
+            return i, i, None, None
+        return None
+
+    if end < n and tokens[end] in _all_port_operators:
+        ports = _destination_ports(tokens, end, n, m)
+        if ports:
+            return i, end, (end, ports[0], ports[1]), ports[2]
+        return None
+    # The whitespace in front of (hitcnt=N) is taken by the optional \\s+ after the destination
+    if end == m:
+        return i, end, None, None
+    if end == n - 1 and tokens[end] in _keywords:
+        return i, end, None, end
+    return None
+
+
+def _after_protocol(tokens, i, n, m):
+    """
+    Match the source network, source ports and the rest of the ACE starting at tokens[i]
+
+    Returns:
+        tuple: (source start, source end, source ports, destination), or None
+    """
+    end = _network_end(tokens, i, n)
+    if end < 0:
+        return None
+
+    if end < n and tokens[end] in _all_port_operators:
+        for ports_end in _source_port_ends(tokens, end, n):
+            destination = _destination(tokens, ports_end, n, m)
+            if destination:
+                return i, end, (end, ports_end, False), destination
+
+    destination = _destination(tokens, end, n, m)
+    if destination:
+        return i, end, None, destination
+    return None
+
+
+def _join(tokens, span):
+    if span is None:
+        return None
+    start, end, swallowed = span
+    value = ' '.join(tokens[start:end])
+    return value + ' ' if swallowed else value
+
+
+def _tokenize(ace, with_spans=False):
+    """
+    Parse a lower case ACE with the tokenizer
+
+    Args:
+        ace (str): lower case access control entry
+        with_spans (bool): return (start, end) offsets of the fields instead of their text
+
+    Returns:
+        permission (dict): dictionary of permission details, False if the ACE is invalid,
+            or None if the line has to be handed to the full regex
+    """
+    if not ace.isascii() or not ace.isprintable():
+        return None
+    tokens = ace.split(' ')
+    if '' in tokens:
+        return None
+    n = len(tokens)
+    hitcnt = '(' in ace  # the (hitcnt=N) 0x... suffix ends the ACE
+    if hitcnt and (ace.count('(') != 1 or n < 2 or not _is_hitcnt(tokens[-2]) or tokens[-1].strip(_hash_chars)):
+        return None
+    m = n - 2 if hitcnt else n
+
+    i = 0
+    sequence = name = None
+    if tokens[0].isdigit():
+        sequence = tokens[0]
+        i = 1
+    if i < n and tokens[i] == 'access-list':
+        if i + 3 < n and not tokens[i + 1].strip(_name_chars) and tokens[i + 2] == 'extended':
+            name = tokens[i + 1]
+            i += 3
+        else:
+            return None
+    if i + 1 >= n or (tokens[i] != 'permit' and tokens[i] != 'deny'):
+        return None
+
+    protocol = tokens[i + 1]
+    parsed = None
+    protocol_end = i + 2
+    if protocol in _protocols or (protocol.isdigit() and len(protocol) <= 3):
+        parsed = _after_protocol(tokens, protocol_end, n, m)
+    if not parsed and protocol == 'object-group' and i + 2 < n and not tokens[i + 2].strip(_group_chars + ':'):
+        protocol_end = i + 3
+        parsed = _after_protocol(tokens, protocol_end, n, m)
+    if not parsed:
+        return False
+
+    source_start, source_end, source_ports, destination = parsed
+    destination_start, destination_end, destination_ports, keyword = destination
+    if with_spans:
+        starts = []
+        position = 0
+        for token in tokens:
+            starts.append(position)
+            position += len(token) + 1
+
+        def offsets(start, end, swallowed=False):
+            if start == end:
+                return starts[start], starts[start]
+            return starts[start], starts[end - 1] + len(tokens[end - 1]) + swallowed
+
+        return {
+            'sequence': None if sequence is None else offsets(0, 1),
+            'name': None if name is None else offsets(i - 2, i - 1),
+            'action': offsets(i, i + 1),
+            'protocol': offsets(i + 1, protocol_end),
+            'source': offsets(source_start, source_end),
+            'source_ports': None if source_ports is None else offsets(*source_ports),
+            'destination': offsets(destination_start, destination_end),
+            'destination_ports': None if destination_ports is None else offsets(*destination_ports),
+            'keyword': None if keyword is None else offsets(keyword, keyword + 1),
+            'hitcnt': (starts[n - 2] + 8, starts[n - 1] - 2) if hitcnt else None,
+            'rule_hash': offsets(n - 1, n) if hitcnt else None,
+        }
+    return {
+        'sequence': sequence,
+        'name': name,
+        'action': tokens[i],
+        'protocol': ' '.join(tokens[i + 1:protocol_end]),
+        'source': ' '.join(tokens[source_start:source_end]),
+        'source_ports': _join(tokens, source_ports),
+        'destination': ' '.join(tokens[destination_start:destination_end]),
+        'destination_ports': _join(tokens, destination_ports),
+        'keyword': None if keyword is None else tokens[keyword],
+        'hitcnt': tokens[n - 2][8:-1] if hitcnt else None,
+        'rule_hash': tokens[n - 1] if hitcnt else None,
+    }
+
+
+def _fast_match(ace):
+    match = _regex('fast_acl_re').match(ace)
+    if match and ':' in ace:
+        for field in ('source', 'destination'):
+            value = match.group(field)
+            # fast_acl_regex takes any hex digits and colons for an IPv6 host
+            if value.startswith('host ') and ':' in value and not _regex('ip_address_re').fullmatch(value[5:]):
+                return None
+    return match
+
+
+def ace_tokenize(ace):
+    """
+    Parse an ACE with the single pass tokenizer
+
+    The tokenizer returns exactly what ace_regex_match would return for the lines it
+    can decide on its own, and None for the rare lines it leaves to the regex
+    (irregular whitespace, non-ASCII text, ASA 'line N' entries, ...).
+
+    Args:
+        ace (str): Access control entry
+
+    Returns:
+        permission (dict): dictionary of permission details, False if the ACE is invalid,
+            None if the ACE has to be matched with the regex
+    """
+    return _tokenize(ace.lower())
+
+
+def ace_regex_match(ace):
+    """
+    Check if an ACE matches the full ACE regex (cisco_acl_regex)
+
+    This is the reference implementation for fast_acl_regex and ace_tokenize, and the
+    fallback of ace_match.
+
+    Args:
+        ace (str): Access control entry
+
+    Returns:
+        permission (dict): dictionary of permission details, false otherwise
+    """
+    match = _regex('cisco_acl_re').match(ace.lower())
+    if match:
+        return match.groupdict()
+    else:
+        return False
+
+
+def ace_spans(ace):
+    """
+    Locate the fields of an ACE
+
+    Args:
+        ace (str): Access control entry
+
+    Returns:
+        spans (dict): field name -> (start, end) offsets into ace.lower() (None for missing
+            fields), false if the ACE is invalid
+
+    Examples:
+        >>> ace_spans('permit tcp any any eq 443')['destination_ports']
+        (19, 25)
+    """
+    lower = ace.lower()
+    match = _fast_match(lower)
+    if not match:
+        spans = _tokenize(lower, with_spans=True)
+        if spans is not None:
+            return spans
+        match = _regex('cisco_acl_re').match(lower)
+        if not match:
+            return False
+    return {field: (match.span(field) if match.group(field) is not None else None)
+            for field in match.groupdict()}
+
 
 # Simple function for checking if an ACE matches our regexes above
 def ace_match(ace):
     """
     Check if an ACE matches our ACE regex
 
+    Valid lines are matched with fast_acl_regex, which parses the common single spaced
+    ACEs without the backtracking of cisco_acl_regex.  The other lines go to ace_tokenize,
+    which rejects invalid ACEs early, and cisco_acl_regex is only used for the lines the
+    tokenizer leaves undecided.
+
     Args:
         ace (str): Access control entry
 
@@ -159,16 +589,23 @@ def ace_match(ace):
         {'action': 'permit',
          'destination': 'any',
          'destination_ports': 'eq 443',
+         'hitcnt': None,
          'keyword': None,
          'name': None,
          'protocol': 'tcp',
+         'rule_hash': None,
          'sequence': None,
          'source': 'any',
          'source_ports': None}
+        >>> permission = ace_match('access-list out extended deny ip any any (hitcnt=12) 0x1e3b4c5d')
+        >>> permission['hitcnt'], permission['rule_hash']
+        ('12', '0x1e3b4c5d')
     """
-    re_obj = re.compile(cisco_acl_regex, re.I)
-    match = re_obj.match(ace.lower())
+    lower = ace.lower()
+    match = _fast_match(lower)
     if match:
         return match.groupdict()
-    else:
-        return False
+    permission = _tokenize(lower)
+    if permission is None:
+        return ace_regex_match(ace)
+    return permission
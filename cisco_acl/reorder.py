@@ -0,0 +1,195 @@
+"""
+Reorder an ACL so that the most hit ACEs come first, without changing what it permits
+
+A first match ACL costs CPU in proportion to the position of the matching ACE.
+Two ACEs only need to keep their relative order if they overlap (a packet
+may match both) and have different actions: swapping any other pair does not
+change the action taken for any packet.  dependencies() finds these pairs,
+and reorder() builds the order of the ACL with Kahn's algorithm, always taking
+the ACE whose dependencies are already placed with the highest priority:
+the best average hit count of a chain of dependent ACEs starting at it, so
+that a cold ACE which must stay before a hot one moves up with it.  ACEs with
+the same priority keep their order.
+
+The average match depth is the average position of the matching ACE, weighted
+by the hit counts.  After reordering it is an upper bound: a packet may now
+match an overlapping ACE with the same action placed before the one it used
+to match.
+
+Examples:
+    >>> from cisco_acl.ace import Acl
+    >>> acl = Acl.from_lines([
+    ...     'deny tcp any host 10.0.0.1 eq 22',
+    ...     'permit tcp any 10.0.0.0 0.0.0.255 eq 22',
+    ...     'permit udp any any eq 53',
+    ...     'permit tcp any any eq 443',
+    ... ])
+    >>> reordering = reorder(acl.items(), {1: 5, 2: 100, 3: 20, 4: 1000})
+    >>> reordering.order
+    [4, 1, 2, 3]
+    >>> reordering.depth_before, reordering.depth_after
+    (3.79, 1.24)
+"""
+import heapq
+import logging
+from collections import namedtuple
+from cisco_acl.ace import Ace, prefix_length
+from cisco_acl.acl_audit import read_acl
+from cisco_acl.diff import asa_line_re
+from cisco_acl.hitcounts import parse_hitcnt
+from cisco_acl.regexes import ace_match
+
+logging.getLogger(__name__)
+
+Reordering = namedtuple('Reordering', ['order', 'depth_before', 'depth_after'])
+"""
+order (list): line numbers of the ACEs, in their new order
+depth_before (float): average match depth of the ACL as it is
+depth_after (float): average match depth (upper bound) of the reordered ACL
+"""
+
+
+# Destinations at least this specific are bucketed by their first bits
+BUCKET_LENGTH = {4: 16, 6: 48}
+
+
+def _bucket(network):
+    """ Return the bucket of a destination, None for wider networks and references """
+    if isinstance(network, str) or network.version == 0:
+        return None
+    length = prefix_length(network)
+    if length is None or length < BUCKET_LENGTH[network.version]:
+        return None
+    bits = 32 if network.version == 4 else 128
+    return network.version, network.address >> (bits - BUCKET_LENGTH[network.version])
+
+
+def dependencies(aces):
+    """
+    Find the ACEs which must stay before an ACE
+
+    Args:
+        aces (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+
+    Returns:
+        dict: line_num -> list of the earlier line_nums which overlap it with a different action
+    """
+    # Earlier ACEs by action, destination bucket, then protocol: an ACE is only compared to
+    # the ACEs of the other action whose destination and protocol may overlap its own
+    earlier = ({}, {})
+    depends = {}
+    for line_num, ace in aces:
+        others = earlier[1 - ace.action]
+        bucket = _bucket(ace.destination)
+        if bucket is None:
+            by_protocol = list(others.values())
+        else:
+            by_protocol = [others[key] for key in (bucket, None) if key in others]
+        if ace.protocol == 0 or isinstance(ace.protocol, str):
+            candidates = [rules for protocols in by_protocol for rules in protocols.values()]
+        else:
+            candidates = [rules for protocols in by_protocol for protocol, rules in protocols.items()
+                          if protocol == ace.protocol or protocol == 0 or isinstance(protocol, str)]
+        depends[line_num] = sorted(
+            other_line for rules in candidates for other_line, other in rules if ace.overlaps(other))
+        earlier[ace.action].setdefault(bucket, {}).setdefault(ace.protocol, []).append((line_num, ace))
+    return depends
+
+
+def match_depth(order, hits):
+    """
+    Return the average position of the matching ACE
+
+    Args:
+        order (list): line numbers of the ACEs, in ACL order
+        hits (dict): line_num -> hit count, missing ACEs count as never hit
+
+    Returns:
+        float: rounded to 2 decimals, 0 if nothing was hit
+    """
+    total = sum(hits.get(line_num, 0) for line_num in order)
+    if not total:
+        return 0.0
+    return round(sum(position * hits.get(line_num, 0) for position, line_num in enumerate(order, start=1)) / total, 2)
+
+
+def reorder(aces, hits):
+    """
+    Order the ACEs of an ACL by hit count, keeping overlapping ACEs with different actions in order
+
+    Args:
+        aces (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+        hits (dict): line_num -> hit count, missing ACEs count as never hit
+
+    Returns:
+        Reordering
+    """
+    aces = list(aces)
+    original = [line_num for line_num, _ in aces]
+    position = {line_num: i for i, line_num in enumerate(original)}
+
+    depends = dependencies(aces)
+    waiting = {line_num: len(before) for line_num, before in depends.items()}
+    followers = {line_num: [] for line_num in original}
+    for line_num, before in depends.items():
+        for other in before:
+            followers[other].append(line_num)
+
+    # Best (total hits, length) of the chains starting at each ACE, followers first
+    chains = {}
+    for line_num in reversed(original):
+        best = (hits.get(line_num, 0), 1)
+        for follower in followers[line_num]:
+            total, length = chains[follower]
+            chain = (hits.get(line_num, 0) + total, length + 1)
+            if chain[0] * best[1] > best[0] * chain[1]:
+                best = chain
+        chains[line_num] = best
+    priority = {line_num: -total / length for line_num, (total, length) in chains.items()}
+
+    ready = [(priority[line_num], position[line_num], line_num)
+             for line_num, count in waiting.items() if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, _, line_num = heapq.heappop(ready)
+        order.append(line_num)
+        for follower in followers[line_num]:
+            waiting[follower] -= 1
+            if waiting[follower] == 0:
+                heapq.heappush(ready, (priority[follower], position[follower], follower))
+
+    return Reordering(order, match_depth(original, hits), match_depth(order, hits))
+
+
+def read_hit_counts(lines, mask_type=None):
+    """
+    Parse the ACEs and hit counts of an ASA 'show access-list' output
+
+    The object-group expansions of an ACE (indented lines) are skipped, the
+    hit count of the ACE already includes them.  Lines which are not valid
+    ACEs (ex. remarks) are skipped.
+
+    Args:
+        lines: 'show access-list' output, file path or iterable of lines (see read_acl)
+        mask_type (str): see Ace.from_permission
+
+    Returns:
+        tuple: ([(line_num, Ace)], {line_num: hit count}), line_num counting the lines read
+    """
+    aces, hits = [], {}
+    for line_num, line in enumerate(read_acl(lines), start=1):
+        if line[:1].isspace():
+            continue
+        parsed = parse_hitcnt(line)
+        if parsed is None:
+            continue
+        permission = ace_match(asa_line_re.sub(r'\1 ', parsed[2]))
+        if not permission:
+            continue
+        try:
+            aces.append((line_num, Ace.from_permission(permission, mask_type)))
+        except ValueError:
+            continue
+        hits[line_num] = parsed[0]
+    return aces, hits
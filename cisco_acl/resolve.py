@@ -0,0 +1,224 @@
+"""
+Resolve the host names of ACEs ('host www.cisco.com'), to report the ones that do not resolve
+
+The syntax check only tells that a host name is well formed.  This optional
+phase takes the distinct host names of one or many ACLs, resolves the ones
+that are not in a TTL cache concurrently in a thread pool, and reports the
+ACEs whose host name does not resolve:
+    'Unresolvable host: www.example.invalid'
+
+Resolvers are pluggable: any object with a resolve(name) method returning
+the addresses of a name (an empty tuple if it does not exist) will do.
+* SystemResolver: the resolver of the system (getaddrinfo: DNS, /etc/hosts, ...)
+* HostsFileResolver: a hosts file, for offline audits and tests
+
+Resolvers may raise an exception when a name could not be looked up (ex. a
+timeout): the name is reported as unresolvable, but the failure is not cached.
+
+Examples:
+    >>> from cisco_acl.acl_audit import AclAuditor
+    >>> resolver = HostsFileResolver(['10.0.0.1  www.example.com  www'])
+    >>> acl = AclAuditor(acl=['permit tcp any host www.example.com eq 80',
+    ...                       'permit tcp any host mail.example.com eq 25'], resolver=resolver)
+    >>> acl.errors
+    {2: 'Unresolvable host: mail.example.com'}
+"""
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_address
+
+logging.getLogger(__name__)
+
+
+class SystemResolver:
+    """ Resolve names with the resolver of the system (socket.getaddrinfo) """
+
+    def resolve(self, name):
+        """
+        Args:
+            name (str): host name
+
+        Returns:
+            tuple: sorted addresses of the name, empty if the name does not exist
+
+        Raises:
+            OSError: the name could not be looked up (ex. no DNS server answered)
+        """
+        try:
+            infos = socket.getaddrinfo(name, None, proto=socket.IPPROTO_TCP)
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+                return ()
+            raise
+        return tuple(sorted({info[4][0] for info in infos}))
+
+
+class HostsFileResolver:
+    """ Resolve names from a hosts file ('address name [aliases...]' lines, '#' comments) """
+
+    def __init__(self, hosts='/etc/hosts'):
+        """
+        Args:
+            hosts: hosts file path or iterable of lines
+        """
+        self.hosts = {}  # lowercase name -> addresses
+        if isinstance(hosts, str):
+            with open(hosts, encoding='utf-8', errors='ignore') as f:
+                hosts = f.readlines()
+        for line in hosts:
+            fields = line.partition('#')[0].split()
+            if len(fields) < 2:
+                continue
+            for name in fields[1:]:
+                addresses = self.hosts.setdefault(name.lower(), [])
+                if fields[0] not in addresses:
+                    addresses.append(fields[0])
+
+    def resolve(self, name):
+        """
+        Returns:
+            tuple: addresses of the name, in file order, empty if the name is not in the file
+        """
+        return tuple(self.hosts.get(name.lower(), ()))
+
+
+class TTLCache:
+    """ Thread safe cache of resolved names, whose entries expire after a time to live """
+
+    def __init__(self, ttl=300, negative_ttl=60, clock=time.monotonic):
+        """
+        Args:
+            ttl (float): seconds a resolved name is kept
+            negative_ttl (float): seconds a name that does not exist is kept
+            clock (callable): returns the current time in seconds
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries = {}  # name -> (expiry time, addresses)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name):
+        """
+        Returns:
+            tuple: addresses of the name, None if the name is not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[name]
+                return None
+            return entry[1]
+
+    def put(self, name, addresses):
+        """
+        Cache the addresses of a name (empty: the name does not exist)
+        """
+        ttl = self.ttl if addresses else self.negative_ttl
+        with self._lock:
+            self._entries[name] = (self.clock() + ttl, tuple(addresses))
+
+
+def _lookup(resolver, name):
+    try:
+        return name, tuple(resolver.resolve(name)), True
+    except Exception as e:
+        logging.warning('Could not resolve {0}: {1}: {2}'.format(name, type(e).__name__, e))
+        return name, (), False
+
+
+def resolve_names(names, resolver=None, cache=None, workers=16):
+    """
+    Resolve host names concurrently, each distinct name once
+
+    Args:
+        names (iterable): host names
+        resolver: object with a resolve(name) method, defaults to SystemResolver
+        cache (TTLCache): cache shared between calls, names cached and not expired are not resolved again
+        workers (int): maximum number of names resolved at the same time
+
+    Returns:
+        dict: name -> tuple of addresses, empty if the name does not resolve
+    """
+    resolver = resolver or SystemResolver()
+    addresses = {}
+    pending = []
+    for name in dict.fromkeys(names):
+        cached = cache.get(name) if cache is not None else None
+        if cached is not None:
+            addresses[name] = cached
+        else:
+            pending.append(name)
+    if not pending:
+        return addresses
+
+    logging.info('Resolving {0} host names ...'.format(len(pending)))
+    with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+        for name, found, looked_up in executor.map(lambda name: _lookup(resolver, name), pending):
+            addresses[name] = found
+            if looked_up and cache is not None:
+                cache.put(name, found)
+    return addresses
+
+
+def host_names(permissions):
+    """
+    Find the host names of ACEs ('host NAME' sources and destinations which are not addresses)
+
+    Args:
+        permissions (dict): line_num -> permission from ace_match, see AclAuditor.permissions
+
+    Returns:
+        dict: host name -> line numbers of the ACEs referring to it
+    """
+    names = {}
+    for i, perm in permissions.items():
+        for network in (perm['source'], perm['destination']):
+            if not network.startswith('host'):
+                continue
+            host = network.split()[1]
+            try:
+                ip_address(host)
+            except ValueError:
+                lines = names.setdefault(host, [])
+                if not lines or lines[-1] != i:
+                    lines.append(i)
+    return names
+
+
+def resolve_audits(auditors, resolver=None, cache=None, workers=16):
+    """
+    Resolve the host names of audited ACLs, adding an error to the ACEs whose host name does not resolve
+
+    The host names of all the ACLs are resolved together, each distinct name once.
+    ACEs which already have an error are skipped.
+
+    Args:
+        auditors (iterable): AclAuditor
+        resolver: see resolve_names
+        cache (TTLCache): see resolve_names
+        workers (int): see resolve_names
+
+    Returns:
+        dict: host name -> tuple of addresses, empty if the name does not resolve
+    """
+    references = []  # (auditor, host name -> line numbers)
+    for auditor in auditors:
+        permissions = {i: perm for i, perm in auditor.permissions.items() if i not in auditor.errors}
+        references.append((auditor, host_names(permissions)))
+
+    addresses = resolve_names((name for _, names in references for name in names), resolver, cache, workers)
+    for auditor, names in references:
+        for name, lines in names.items():
+            if not addresses[name]:
+                for i in lines:
+                    auditor.errors[i] = 'Unresolvable host: ' + name
+    return addresses
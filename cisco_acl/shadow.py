@@ -0,0 +1,177 @@
+"""
+Find ACEs that can never match because an earlier ACE covers them
+
+* redundant: the covering ACE has the same action, the ACE can be removed
+* shadowed: the covering ACE has a different action, the ACE never takes effect
+
+Earlier ACEs are indexed by source and destination network in a PrefixIndex,
+then by protocol and destination port in a PortIndex, so each ACE is only
+compared to the ACEs whose networks contain its own and whose protocol and
+ports may cover its own, instead of to every earlier ACE.
+
+Only coverage by a single earlier ACE is detected (two /25s covering a /24
+are not).
+
+Examples:
+    >>> from cisco_acl.ace import Acl
+    >>> acl = Acl.from_lines(['permit tcp any any', 'deny tcp any host 1.1.1.1 eq 22'])
+    >>> list(find_shadowed(acl.items()))
+    [(2, 1, 'shadowed')]
+"""
+from cisco_acl.ace import ANY, MAX_MASK, prefix_length
+
+
+class PrefixIndex:
+    """
+    Map of networks to values, which finds the values of all the networks that contain a network
+
+    Networks are bucketed by prefix length, so a lookup costs one dict access per
+    prefix length in use.  'any', non-contiguous masks and references (object-groups,
+    host names) are kept in separate buckets.
+    """
+
+    def __init__(self):
+        self._any = {}  # version -> value ('any' is version 0, 'any4' version 4)
+        self._prefixes = {4: {}, 6: {}}  # version -> prefix length -> address >> host bits -> value
+        self._irregular = {}  # network with a non-contiguous mask -> value
+        self._references = {}  # reference text -> value
+
+    def setdefault(self, network, default):
+        """
+        Return the value stored for network, storing default first if there is none
+
+        Args:
+            network: Network or reference text
+            default: value to store
+
+        Returns:
+            value stored for network
+        """
+        if isinstance(network, str):
+            return self._references.setdefault(network, default)
+        if network.mask == 0:
+            return self._any.setdefault(network.version, default)
+        length = prefix_length(network)
+        if length is None:
+            return self._irregular.setdefault(network, default)
+        bits = 32 if network.version == 4 else 128
+        table = self._prefixes[network.version].setdefault(length, {})
+        return table.setdefault(network.address >> (bits - length), default)
+
+    def containing(self, network):
+        """
+        Find the values stored for networks that may contain network
+
+        Every network that contains network is found; references are only found for
+        the identical reference, and non-contiguous masks are always returned (to be
+        checked by the caller).
+
+        Args:
+            network: Network or reference text
+
+        Returns:
+            generator: stored values
+        """
+        if ANY.version in self._any:
+            yield self._any[ANY.version]
+        if isinstance(network, str):
+            if network in self._references:
+                yield self._references[network]
+            return
+        if network.version == 0:
+            return
+        if network.version in self._any:
+            yield self._any[network.version]
+
+        bits = 32 if network.version == 4 else 128
+        longest = bits - (MAX_MASK[network.version] ^ network.mask).bit_length()
+        for length, table in self._prefixes[network.version].items():
+            if length <= longest:
+                value = table.get(network.address >> (bits - length))
+                if value is not None:
+                    yield value
+        for irregular, value in self._irregular.items():
+            if irregular.version == network.version:
+                yield value
+
+
+class PortIndex:
+    """
+    ACEs by protocol and destination ports, which finds the ACEs that may cover the protocol and ports of an ACE
+
+    ACEs on a single port ('eq 22') are bucketed by port, so ACLs of many 'eq'
+    ACEs with the same networks are not compared pairwise.  Every other port
+    list (ranges, several ports, references) is kept in a list per protocol.
+    """
+
+    def __init__(self):
+        self._ports = {}  # protocol -> port -> [(line_num, Ace)]
+        self._others = {}  # protocol -> [(line_num, Ace)]
+
+    @staticmethod
+    def _port(ports):
+        """ Return the port of a port list on a single port, None for other port lists """
+        if isinstance(ports, str) or not ports:
+            return None
+        low = min(low for low, _ in ports)
+        return low if low == max(high for _, high in ports) else None
+
+    def append(self, line_num, ace):
+        """
+        Args:
+            line_num (int): line number of the ACE
+            ace (Ace): ACE to index
+        """
+        port = self._port(ace.destination_ports)
+        if port is None:
+            self._others.setdefault(ace.protocol, []).append((line_num, ace))
+        else:
+            self._ports.setdefault(ace.protocol, {}).setdefault(port, []).append((line_num, ace))
+
+    def covering(self, ace):
+        """
+        Find the ACEs whose protocol and destination ports may cover those of ace
+
+        Args:
+            ace (Ace): ACE to look up
+
+        Returns:
+            generator: (line_num, Ace) tuples, to be checked with Ace.covers
+        """
+        port = self._port(ace.destination_ports)
+        for protocol in {ace.protocol, 0}:
+            ports = self._ports.get(protocol, {})
+            if port is not None:
+                yield from ports.get(port, ())
+            elif ace.destination_ports == ():  # no port, covered by any port list
+                for candidates in ports.values():
+                    yield from candidates
+            yield from self._others.get(protocol, ())
+
+
+def find_shadowed(aces):
+    """
+    Find the ACEs covered by an earlier ACE
+
+    Args:
+        aces (iterable): (line_num, Ace) tuples in ACL order, ex. Acl.items()
+
+    Returns:
+        generator: (line_num, covering line_num, 'redundant' or 'shadowed') tuples,
+            the covering line being the first ACE that covers line_num
+    """
+    index = PrefixIndex()  # source -> destination -> PortIndex
+
+    for line_num, ace in aces:
+        covering = None
+        for destinations in index.containing(ace.source):
+            for candidates in destinations.containing(ace.destination):
+                for candidate_line, candidate in candidates.covering(ace):
+                    if (covering is None or candidate_line < covering[0]) and candidate.covers(ace):
+                        covering = (candidate_line, candidate)
+
+        if covering is not None:
+            kind = 'redundant' if covering[1].action == ace.action else 'shadowed'
+            yield line_num, covering[0], kind
+        else:
+            index.setdefault(ace.source, PrefixIndex()).setdefault(ace.destination, PortIndex()).append(line_num, ace)
@@ -0,0 +1,164 @@
+"""
+Timing and counters of ACL audits
+
+AclAuditor reports the wall and CPU time of every phase through a hook,
+called as hook(phase, line_num, wall, cpu):
+* read: reading a line of the ACL (file I/O, decompression)
+* parse: parsing an ACE (ace_match)
+* cache: loading the results of a line from the cache (see cisco_acl.cache)
+* networks: checks of the networks of all the ACEs, in one batch (line_num is None)
+* ports, object_groups: per-line checks
+* resolve: resolution of host names, when a resolver is given (line_num is None)
+* shadowing: redundant/shadowed ACEs detection (line_num is None)
+* audit_line: auditing a line in stream mode (line_num is None)
+* total: the whole audit (line_num is None)
+
+AuditStats is a hook collecting per-phase totals, counters and the slowest
+lines.  Without stats or hook, the audit runs uninstrumented.
+
+Examples:
+    >>> from cisco_acl.acl_audit import AclAuditor
+    >>> stats = AuditStats()
+    >>> acl = AclAuditor(acl=['permit tcp any any eq 80', 'permit tcp any host eq 22'], stats=stats)
+    >>> stats.counters['lines_read'], stats.counters['lines_matched'], stats.counters['lines_failed']
+    (2, 1, 1)
+    >>> sorted(stats.wall)
+    ['networks', 'object_groups', 'parse', 'ports', 'read', 'shadowing', 'total']
+"""
+import heapq
+import logging
+import time
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+logging.getLogger(__name__)
+
+
+def timed(func, phase, hook, line_num=None):
+    """
+    Wrap a function to report its wall and CPU time to a hook
+
+    Args:
+        func (callable): function to time
+        phase (str): phase reported to the hook
+        hook (callable): hook(phase, line_num, wall, cpu)
+        line_num (callable): returns the line number from the arguments of func
+
+    Returns:
+        callable
+    """
+    perf_counter, process_time = time.perf_counter, time.process_time
+
+    def wrapper(*args):
+        wall, cpu = perf_counter(), process_time()
+        result = func(*args)
+        hook(phase, line_num(*args) if line_num else None, perf_counter() - wall, process_time() - cpu)
+        return result
+    return wrapper
+
+
+def timed_iter(iterable, phase, hook):
+    """
+    Report the wall and CPU time spent producing every item of an iterable
+
+    Items are numbered from 1, like the lines of an ACL.
+
+    Args:
+        iterable: items to time
+        phase (str): phase reported to the hook
+        hook (callable): hook(phase, line_num, wall, cpu)
+
+    Returns:
+        generator: the items of iterable
+    """
+    perf_counter, process_time = time.perf_counter, time.process_time
+    iterator = iter(iterable)
+    line_num = 0
+    while True:
+        wall, cpu = perf_counter(), process_time()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        line_num += 1
+        hook(phase, line_num, perf_counter() - wall, process_time() - cpu)
+        yield item
+
+
+class AuditStats:
+    """ Hook collecting per-phase times, counters and the slowest lines of audits """
+
+    def __init__(self, slowest=10):
+        """
+        Args:
+            slowest (int): number of slowest lines to report
+        """
+        self.slowest_count = slowest
+        self.wall = defaultdict(float)  # phase: seconds
+        self.cpu = defaultdict(float)  # phase: seconds
+        self.calls = Counter()  # phase: number of calls
+        self.counters = Counter()
+        """
+        counters = {
+            'lines_read': 1000,
+            'lines_matched': 990,  # valid ACE syntax
+            'lines_failed': 8,  # invalid ACE syntax
+            'errors': 12,
+            'warnings': 3,
+            'cache_hits': 0,
+            'cache_misses': 0,
+        }
+        """
+        self.line_times = defaultdict(float)  # line_num: seconds, all phases
+
+    def __call__(self, phase, line_num, wall, cpu):
+        self.wall[phase] += wall
+        self.cpu[phase] += cpu
+        self.calls[phase] += 1
+        if phase == 'read':
+            self.counters['lines_read'] += 1
+        if line_num is not None:
+            self.line_times[line_num] += wall
+
+    def slowest(self, n=None):
+        """
+        Return the lines that took the longest, all phases included
+
+        Args:
+            n (int): number of lines, defaults to the slowest count given at creation
+
+        Returns:
+            list: (line_num, seconds) tuples, slowest first
+        """
+        return heapq.nlargest(n or self.slowest_count, self.line_times.items(), key=itemgetter(1))
+
+    def as_dict(self):
+        """
+        Return the statistics as JSON serializable types
+
+        Returns:
+            dict
+        """
+        return {
+            'phases': {
+                phase: {'wall': self.wall[phase], 'cpu': self.cpu[phase], 'calls': self.calls[phase]}
+                for phase in self.wall
+            },
+            'counters': dict(self.counters),
+            'slowest': self.slowest(),
+        }
+
+    def report(self):
+        """
+        Format the statistics as a table
+
+        Returns:
+            str
+        """
+        lines = ['{0:<16} {1:>10} {2:>10} {3:>10}'.format('phase', 'wall (s)', 'cpu (s)', 'calls')]
+        for phase in sorted(self.wall, key=self.wall.get, reverse=True):
+            lines.append('{0:<16} {1:>10.4f} {2:>10.4f} {3:>10}'.format(
+                phase, self.wall[phase], self.cpu[phase], self.calls[phase]))
+        lines.extend('{0:<16} {1:>10}'.format(counter, count) for counter, count in sorted(self.counters.items()))
+        lines.extend('line {0:<11} {1:>10.6f}'.format(line_num, seconds) for line_num, seconds in self.slowest())
+        return '\n'.join(lines)
@@ -0,0 +1,201 @@
+"""
+Persistent store of audited ACL files, for warm restarts
+
+The aces, permissions, errors, warnings and object-groups of an AclAuditor
+are stored in sqlite under the path of the ACL file, serialized with
+marshal.  An unchanged file is loaded back without being read or parsed:
+* same mtime and size: the stored audit is loaded as is
+* different mtime or size but same content hash: the file was only touched,
+  the stored audit is loaded and its mtime updated
+* otherwise the file is audited again and the store updated
+
+Like cisco_acl.cache, the store is dropped when the package version,
+port_translations.json or the Python version (marshal format) changes.
+
+Examples:
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'acl.txt')
+    >>> with open(path, 'w') as f:
+    ...     _ = f.write('permit tcp any any eq 80\\npermit tcp any host eq 22\\n')
+    >>> with AclStore(':memory:') as store:
+    ...     acl = store.audit(path)
+    ...     acl = store.audit(path)
+    ...     acl.errors, store.hits, store.misses
+    ({2: 'Invalid ACE: permit tcp any host eq 22'}, 1, 1)
+"""
+import hashlib
+import logging
+import marshal
+import os
+import sqlite3
+import sys
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.cache import cache_namespace
+
+logging.getLogger(__name__)
+
+UNRESOLVABLE = 'Unresolvable host: '  # errors of cisco_acl.resolve
+
+
+def store_namespace():
+    """
+    Return the identifier of the code and data the stored audits depend on
+
+    Returns:
+        str: see cache_namespace, plus the Python and marshal versions
+    """
+    return '{0}:python{1}.{2}:marshal{3}'.format(cache_namespace(), sys.version_info[0], sys.version_info[1],
+                                                 marshal.version)
+
+
+def file_digest(path):
+    """
+    Hash the content of a file
+
+    Returns:
+        bytes: blake2b digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, mode='rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def _dump(auditor):
+    groups = {name: (kind, protocol, list(members))
+              for name, (kind, protocol, members) in auditor.object_groups.groups.items()}
+    # Host names resolve differently over time, their errors are not stored
+    errors = {i: error for i, error in auditor.errors.items() if not error.startswith(UNRESOLVABLE)}
+    return marshal.dumps((auditor.aces, auditor.permissions, errors, auditor.warnings, groups))
+
+
+def _load(auditor, data):
+    aces, permissions, errors, warnings, groups = marshal.loads(data)
+    auditor.aces = aces
+    auditor.permissions = permissions
+    auditor.errors = errors
+    auditor.warnings = warnings
+    auditor.object_groups.groups.update(groups)
+    return auditor
+
+
+class AclStore:
+    """ sqlite backed store of audited ACL files """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): path to the store database (':memory:' for a temporary store)
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS files (path TEXT, acl_format TEXT, shadowing INTEGER, '
+            'mtime INTEGER, size INTEGER, digest BLOB, data BLOB, PRIMARY KEY (path, acl_format, shadowing))')
+
+        self.namespace = store_namespace()
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'namespace'").fetchone()
+        if row is None or row[0] != self.namespace:
+            logging.info('ACL store {0} is outdated, clearing it'.format(path))
+            self.invalidate()
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self, path, acl_format='ios', shadowing=True):
+        """
+        Load the stored audit of an ACL file, if the file did not change since
+
+        Args:
+            path (str): path to the ACL file
+            acl_format (str): 'ios' or 'asa'
+            shadowing (bool): if the audit looked for redundant and shadowed ACEs
+
+        Returns:
+            AclAuditor, None if the file is not stored or changed
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, acl_format, int(shadowing))
+        row = self._db.execute('SELECT mtime, size, digest, data FROM files WHERE path = ? AND acl_format = ? '
+                               'AND shadowing = ?', key).fetchone()
+        if row is None:
+            return None
+
+        mtime, size, digest, data = row
+        if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+            if file_digest(path) != digest:
+                return None
+            with self._db:
+                self._db.execute('UPDATE files SET mtime = ?, size = ? WHERE path = ? AND acl_format = ? '
+                                 'AND shadowing = ?', (stat.st_mtime_ns, stat.st_size) + key)
+
+        auditor = AclAuditor(acl=path, format=acl_format, shadowing=shadowing, stream=True)
+        return _load(auditor, data)
+
+    def save(self, path, auditor, stat=None, digest=None):
+        """
+        Store the audit of an ACL file
+
+        Args:
+            path (str): path to the ACL file
+            auditor (AclAuditor): audit of the file
+            stat (os.stat_result): stat of the file before it was audited (default: now)
+            digest (bytes): file_digest of the file before it was audited (default: now)
+        """
+        path = os.path.abspath(path)
+        stat = stat or os.stat(path)
+        digest = digest or file_digest(path)
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)', (
+                path, auditor.acl_format, int(auditor.shadowing), stat.st_mtime_ns, stat.st_size,
+                digest, _dump(auditor)))
+
+    def audit(self, path, acl_format='ios', shadowing=True, **kwargs):
+        """
+        Load the stored audit of an ACL file, or audit the file and store it
+
+        Args:
+            path (str): path to the ACL file
+            acl_format (str): 'ios' or 'asa'
+            shadowing (bool): look for redundant and shadowed ACEs
+            **kwargs: other AclAuditor arguments (ex. cache, stats), used when the file is audited;
+                resolver and dns_cache are used every time, the host names are not stored resolved
+
+        Returns:
+            AclAuditor
+        """
+        resolver, dns_cache = kwargs.pop('resolver', None), kwargs.pop('dns_cache', None)
+        auditor = self.load(path, acl_format, shadowing)
+        if auditor is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            # Taken before the audit, so a file changed during the audit is audited again next time
+            stat, digest = os.stat(path), file_digest(path)
+            auditor = AclAuditor(acl=path, format=acl_format, shadowing=shadowing, **kwargs)
+            self.save(path, auditor, stat, digest)
+
+        if resolver is not None:
+            from cisco_acl.resolve import resolve_audits
+            resolve_audits([auditor], resolver, dns_cache)
+        return auditor
+
+    def invalidate(self):
+        """ Drop every stored audit """
+        with self._db:
+            self._db.execute('DELETE FROM files')
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('namespace', ?)", (self.namespace,))
+
+    def close(self):
+        self._db.close()
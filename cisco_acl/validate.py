@@ -0,0 +1,108 @@
+"""
+Validate the networks (sources and destinations) of ACEs
+
+network_errors() checks one network with regexes and ipaddress.
+batch_network_errors() checks the networks of a whole ACL (or of many ACLs):
+every distinct network is only checked once, and plain IPv4 hosts and
+networks, most of an ACL, are checked with one regex (octet ranges) and
+integer operations (contiguous mask, host bits).  Only the networks failing these checks go
+through network_errors(), so the error messages are exactly the same.
+
+Examples:
+    >>> errors = batch_network_errors(['any', 'host 10.0.0.1', '10.0.0.0 0.0.0.255', '10.0.0.1 255.255.255.0'])
+    >>> errors['10.0.0.0 0.0.0.255']
+    ()
+    >>> errors['10.0.0.1 255.255.255.0']
+    ('Invalid subnet "10.0.0.1 255.255.255.0": 10.0.0.1/24 has host bits set',)
+"""
+import logging
+import re
+from ipaddress import ip_network, ip_address
+from socket import inet_aton
+from cisco_acl import regexes
+from cisco_acl.regexes import ip_address_rx, subnet_rx, dnsname_rx
+
+logging.getLogger(__name__)
+
+ALL_ONES = (1 << 32) - 1
+
+
+def network_errors(network):
+    """
+    Check the source or destination of an ACE
+
+    Args:
+        network (str): network from ace_match (ex. 'any', 'host 1.1.1.1', '10.0.0.0 0.0.0.255')
+
+    Returns:
+        generator: errors found (the last one is the one reported)
+    """
+    if network == 'any':
+        return
+
+    if network.startswith('object-group') or network.startswith('addrgroup'):
+        og = network.split()[1]
+        if not re.match(dnsname_rx, og):
+            yield 'Invalid object-group: ' + og
+        else:
+            return
+
+    if network.startswith('host'):
+        host = network.split()[1]
+
+        if re.match(ip_address_rx, host):
+            try:
+                ip_address(host)
+            except ValueError:
+                yield 'Invalid host IP: ' + host
+        else:
+            if re.match(r'\d{1,3}.\d{1,3}.\d{1,3}.\d{1,3}', host):
+                yield 'Invalid host IP: ' + host
+            elif not re.match(dnsname_rx, host):
+                yield 'Invalid host: ' + host
+
+    elif re.match(subnet_rx, network):
+        try:
+            ip_network('/'.join(network.split()))
+        except ValueError as e:
+            yield 'Invalid subnet "{0}": {1}'.format(network, e)
+
+    else:
+        yield 'Invalid host/network: {0}'.format(network)
+
+
+def _is_valid(network, match):
+    """ Check an IPv4 host or network without ipaddress, False if it needs a full check """
+    plain = match(network)
+    if plain is None:
+        return network == 'any'
+    if plain.group(1) is not None:  # host (the regex ignores case, network_errors does not)
+        return network.startswith('host')
+
+    address = int.from_bytes(inet_aton(plain.group(2)), 'big')
+    mask = int.from_bytes(inet_aton(plain.group(3)), 'big')
+    # Like ip_network('address/mask'): a netmask if its ones are contiguous, else a hostmask (wildcard)
+    hostmask = mask ^ ALL_ONES
+    if hostmask & (hostmask + 1):
+        hostmask = mask
+        if hostmask & (hostmask + 1):
+            return False  # non-contiguous
+    return address & hostmask == 0
+
+
+def batch_network_errors(networks):
+    """
+    Check many networks, each distinct network once
+
+    Args:
+        networks (iterable): networks from ace_match
+
+    Returns:
+        dict: network -> tuple of errors found (see network_errors), empty for valid networks
+    """
+    match = regexes.ipv4_network_re.fullmatch
+    errors = {}
+    for network in networks:
+        if network not in errors:
+            errors[network] = () if _is_valid(network, match) else tuple(network_errors(network))
+    return errors
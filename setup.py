@@ -31,6 +31,11 @@ setup(
     package_dir={'cisco_acl':
                  'cisco_acl'},
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'cisco-acl=cisco_acl.cli:main',
+        ],
+    },
     install_requires=requirements,
     license="MIT license",
     zip_safe=False,
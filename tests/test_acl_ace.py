@@ -0,0 +1,59 @@
+import os.path
+import pytest
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.ace import Ace, Network, ANY, PERMIT, DENY, parse_network, parse_ports
+
+
+def test_parse_network():
+    assert parse_network('any') == ANY
+    assert parse_network('host 1.1.1.1') == Network(0x01010101, 0xffffffff, 4)
+    assert parse_network('10.0.1.0 0.0.0.255') == Network(0x0a000100, 0xffffff00, 4)
+    assert parse_network('10.0.1.0 255.255.255.0', 'subnet') == Network(0x0a000100, 0xffffff00, 4)
+    assert parse_network('host 2001:db8::1') == Network(0x20010db8 << 96 | 1, (1 << 128) - 1, 6)
+    assert parse_network('host www.cisco.com') == 'host www.cisco.com'
+    assert parse_network('object-group servers') == 'object-group servers'
+    with pytest.raises(ValueError):
+        parse_network('2.5.5.5 0.0.0.255')
+    with pytest.raises(ValueError):
+        parse_network('host 259.22.1.5')
+
+
+def test_parse_ports():
+    assert parse_ports('eq 80 443') == ((80, 80), (443, 443))
+    assert parse_ports('range ftp-data ftp') == ((20, 21),)
+    assert parse_ports('gt 1023') == ((1024, 65535),)
+    assert parse_ports('lt 1024') == ((0, 1023),)
+    assert parse_ports('ne 22') == ((0, 21), (23, 65535))
+    assert parse_ports('eq https', acl_format='asa') == ((443, 443),)
+    assert parse_ports('object-group web') == 'object-group web'
+    with pytest.raises(ValueError):
+        parse_ports('eq https')
+
+
+def test_ace():
+    ace = Ace.from_line('access-list outside extended deny udp 10.0.0.0 255.0.0.0 eq domain any log')
+    assert ace.action == DENY
+    assert ace.protocol == 17
+    assert ace.source == Network(0x0a000000, 0xff000000, 4)
+    assert ace.source_ports == ((53, 53),)
+    assert ace.keyword == 'log'
+    assert Ace.from_line('permit tcp any any eq www log').keyword == 'log'
+    # 'echo' is port 7 after 'eq', and a keyword once the port was read
+    echo = Ace.from_line('permit udp any any eq echo')
+    assert (echo.destination_ports, echo.keyword) == (((7, 7),), None)
+    echo = Ace.from_line('permit udp any any eq echo log')
+    assert (echo.destination_ports, echo.keyword) == (((7, 7),), 'log')
+    assert not Ace.from_line('permit tcp any host www.cisco.com').is_resolved
+    with pytest.raises(SyntaxError):
+        Ace.from_line('permit tcp any host eq 80')
+
+
+def test_acl():
+    aclfile = os.path.join(os.path.dirname(__file__), 'data/acl2')
+    a = AclAuditor(acl=aclfile)
+    acl = a.to_acl()
+    assert list(acl.line_nums) == [i for i in a.permissions if i not in a.errors]
+    for line_num, ace in acl.items():
+        assert ace == Ace.from_permission(a.permissions[line_num])
+    assert acl[0].action == PERMIT
+    assert acl[-1].destination == 'host www.cisco.com'
@@ -1,5 +1,6 @@
+import gzip
 import os.path
-from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.acl_audit import AclAuditor, audit_stream
 
 
 def test_acl_audit():
@@ -10,3 +11,62 @@ def test_acl_audit():
     assert a.errors[12].startswith('Invalid host IP')
     assert a.errors[13].startswith('Invalid port')
     assert len(a.errors) == 4
+
+
+def test_audit_stream(tmp_path):
+    aclfile = os.path.join(os.path.dirname(__file__), 'data/acl2')
+    errors = AclAuditor(acl=aclfile).errors
+
+    assert dict(audit_stream(aclfile)) == errors
+
+    with open(aclfile) as f:
+        lines = f.readlines()
+    assert dict(audit_stream(iter(lines))) == errors
+
+    gzfile = str(tmp_path / 'acl2.gz')
+    with gzip.open(gzfile, mode='wt') as f:
+        f.writelines(lines)
+    assert dict(audit_stream(gzfile)) == errors
+    assert AclAuditor(acl=gzfile).errors == errors
+
+
+def test_acl_audit_shadowing():
+    lines = [
+        'permit tcp 10.0.0.0 0.255.255.255 any eq 80 443',
+        'deny ip host 10.1.1.1 any',
+        'permit tcp 10.1.0.0 0.0.255.255 host 1.1.1.1 eq www',
+        'permit tcp any object-group web eq 443',
+        'permit tcp any object-group web eq 443',
+        'permit tcp host 10.1.1.1 host 1.1.1.1 eq 22',
+        'permit udp any any',
+        'permit tcp any any established',
+        'permit ip any any',
+        'deny icmp any any echo',
+    ]
+    a = AclAuditor(acl=lines)
+    assert a.errors == {}
+    assert a.warnings == {
+        3: 'Redundant ACE: already permitted by line 1',
+        5: 'Redundant ACE: already permitted by line 4',
+        6: 'Shadowed ACE: denied by line 2',
+        10: 'Shadowed ACE: permitted by line 9',
+    }
+    assert AclAuditor(acl=lines, shadowing=False).warnings == {}
+
+
+def test_acl_audit_shadowing_ports():
+    # ACEs on single ports are indexed by port, they must still be found by wider port lists and protocols
+    lines = ['permit tcp any any eq {0}'.format(port) for port in range(1, 2001)] + [
+        'permit tcp any any eq 22',
+        'deny udp any any eq 22',
+        'permit tcp any any range 3000 3100',
+        'deny tcp any any eq 3050',
+        'deny tcp any any range 3010 3020',
+        'deny ip any any',
+    ]
+    a = AclAuditor(acl=lines)
+    assert a.warnings == {
+        2001: 'Redundant ACE: already permitted by line 22',
+        2004: 'Shadowed ACE: permitted by line 2003',
+        2005: 'Shadowed ACE: permitted by line 2003',
+    }
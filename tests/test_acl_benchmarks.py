@@ -0,0 +1,25 @@
+from benchmarks.generate import generate_acl
+from benchmarks.run import run, compare
+from cisco_acl.object_groups import ObjectGroups
+from cisco_acl.regexes import ace_match
+
+
+def test_generate_acl():
+    for acl_format in ['ios', 'asa']:
+        lines = list(generate_acl(500, acl_format, seed=1))
+        assert lines == list(generate_acl(500, acl_format, seed=1))
+        groups = ObjectGroups(acl_format)
+        aces = [line for line in lines if not groups.feed(line) and 'remark' not in line]
+        assert len(aces) == 500
+        assert all(ace_match(line) for line in aces)
+        assert any('2001:db8:' in line for line in aces)
+        assert any('object-group' in line for line in aces)
+        assert any(' range ' in line for line in aces)
+    assert any('(hitcnt=' in line for line in generate_acl(100, 'asa'))
+
+
+def test_run_benchmarks():
+    results = run(sizes=[50], formats=['asa'], memory=True)
+    assert len(results['results']) == 4
+    assert all(r['lines_per_sec'] > 0 and r['peak_memory'] > 0 for r in results['results'])
+    assert {speedup for *key, speedup in compare(results, results)} == {1.0}
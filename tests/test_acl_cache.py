@@ -0,0 +1,45 @@
+import sqlite3
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.cache import AuditCache
+
+acl = [
+    'permit tcp any any eq 80',
+    'permit tcp any host eq 22',
+    'permit tcp host 1.1.1.1 host 2.2.2.2 eq 8080',
+    'permit tcp any 1.1.1.0 0.0.0.255 eq notaport',
+    'deny ip any any',
+]
+
+
+def test_audit_cache(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    expected = AclAuditor(acl=acl)
+
+    with AuditCache(path) as cache:
+        audit = AclAuditor(acl=acl, cache=cache)
+        assert (cache.hits, cache.misses) == (0, 5)
+    assert (audit.errors, audit.permissions) == (expected.errors, expected.permissions)
+
+    changed = acl[:2] + ['permit tcp host 1.1.1.1 host 2.2.2.2 eq 8081'] + acl[3:]
+    with AuditCache(path) as cache:
+        audit = AclAuditor(acl=changed, cache=cache)
+        assert (cache.hits, cache.misses) == (4, 1)
+        assert len(cache) == 6
+        assert list(AclAuditor(acl=changed, cache=cache, stream=True).iter_audit()) == sorted(audit.errors.items())
+        assert cache.misses == 1
+    expected = AclAuditor(acl=changed)
+    assert (audit.errors, audit.permissions, audit.warnings) == (
+        expected.errors, expected.permissions, expected.warnings)
+
+    with AuditCache(path, max_entries=3) as cache:
+        AclAuditor(acl=acl[:3], cache=cache)
+    with AuditCache(path) as cache:
+        assert len(cache) == 3
+        AclAuditor(acl=acl[:3], cache=cache)
+        assert cache.hits == 3
+
+    # Changing the package version or port translations drops the cache
+    with sqlite3.connect(path) as db:
+        db.execute("UPDATE meta SET value = 'outdated' WHERE key = 'namespace'")
+    with AuditCache(path) as cache:
+        assert len(cache) == 0
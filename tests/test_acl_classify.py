@@ -0,0 +1,87 @@
+import random
+from ipaddress import ip_address
+from cisco_acl.ace import Acl, PROTOCOLS, FILTER_KEYWORDS, PERMIT
+from cisco_acl.classify import CompiledAcl, Flow
+
+
+def _linear_match(acl, flow):
+    """ Reference implementation: check every ACE in order """
+    source, destination = int(ip_address(flow.source)), int(ip_address(flow.destination))
+    version = ip_address(flow.source).version
+    for line_num, ace in acl.items():
+        if not ace.is_resolved:
+            continue
+        if ace.protocol not in (0, PROTOCOLS[flow.protocol]):
+            continue
+        if ace.keyword in FILTER_KEYWORDS and ace.keyword != flow.keyword:
+            continue
+        matches = True
+        for network, address in ((ace.source, source), (ace.destination, destination)):
+            if network.version not in (0, version) or address & network.mask != network.address:
+                matches = False
+        for ranges, port in ((ace.source_ports, flow.source_port), (ace.destination_ports, flow.destination_port)):
+            if not any(low <= port <= high for low, high in ranges):
+                matches = False
+        if matches:
+            return line_num
+    return None
+
+
+acl_lines = [
+    'deny tcp any host 10.0.0.1 eq 22',
+    'permit tcp 10.1.0.0 0.0.255.255 10.0.0.0 0.0.0.255 range 80 90',
+    'permit udp any any eq 53',
+    'deny ip 10.2.0.0 0.0.255.0 any',
+    'permit tcp any any established',
+    'permit tcp any object-group servers eq 443',
+    'deny tcp any gt 1023 any lt 1024',
+    'permit icmp any any echo',
+    'permit ip host 2001:db8::1 any',
+    'permit ip 10.0.0.0 0.255.255.255 any',
+]
+
+
+def test_classify():
+    acl = Acl.from_lines(acl_lines)
+    compiled = CompiledAcl(acl.items())
+    assert compiled.skipped == [6]
+    assert compiled.match(Flow('192.0.2.1', '10.0.0.1', 'tcp', 40000, 22)) == 1
+    assert compiled.match(Flow('10.2.7.0', '192.0.2.1', 'udp', 1000, 1000)) == 4
+    assert compiled.match(Flow('10.2.7.0', '192.0.2.1', 'tcp', 1000, 1000, 'established')) == 4
+    assert compiled.match(Flow('192.0.2.1', '192.0.2.2', 'tcp', 1000, 1000, 'established')) == 5
+    assert compiled.match(Flow('2001:db8::1', '2001:db8::2', 'udp', 1000, 1000)) == 9
+    assert compiled.match(Flow('192.0.2.1', '192.0.2.2', 'icmp')) is None
+    assert compiled.permits(Flow('192.0.2.1', '192.0.2.2', 'icmp', keyword='echo'))
+    assert not compiled.permits(Flow('192.0.2.1', '10.0.0.1', 'tcp', 40000, 22))
+
+    random.seed(8)
+    flows = [
+        Flow('10.{0}.{1}.{2}'.format(random.choice([0, 1, 2, 3]), random.randint(0, 3), random.randint(0, 3)),
+             random.choice(['10.0.0.1', '10.0.0.7', '192.0.2.1']),
+             random.choice(['tcp', 'udp', 'icmp', 'ip']),
+             random.choice([53, 1000, 40000]),
+             random.choice([22, 53, 80, 85, 1000]),
+             random.choice([None, None, 'established', 'echo']))
+        for _ in range(500)
+    ]
+    expected = [_linear_match(acl, flow) for flow in flows]
+    assert [compiled.match(flow) for flow in flows] == expected
+    batch = compiled.match_batch(
+        [int(ip_address(f.source)) for f in flows],
+        [int(ip_address(f.destination)) for f in flows],
+        [PROTOCOLS[f.protocol] for f in flows],
+        [f.source_port for f in flows],
+        [f.destination_port for f in flows],
+        keywords=[f.keyword for f in flows],
+    )
+    assert list(batch) == [line_num or 0 for line_num in expected]
+    batch = compiled.match_batch(
+        ['192.0.2.1', '2001:db8::1', '2001:db8::1', '192.0.2.1'],
+        ['192.0.2.2', '2001:db8::2', '192.0.2.2', '192.0.2.2'],
+        [17, 17, 17, 6],
+        [1000, 1000, 1000, 1000],
+        [1000, 1000, 1000, 1000],
+    )
+    assert list(batch) == [0, 9, 0, 0]
+    assert [compiled.actions[compiled.line_nums.index(n)] == PERMIT if n else False for n in expected] == \
+        [compiled.permits(flow) for flow in flows]
@@ -0,0 +1,36 @@
+import io
+import json
+import os.path
+from cisco_acl.cli import main
+
+acl2 = os.path.join(os.path.dirname(__file__), 'data/acl2')
+
+
+def _records(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_cli_audit(capsys, tmp_path):
+    missing = str(tmp_path / 'missing')
+    assert main(['audit', '--jobs', '2', acl2, missing]) == 1
+    records = _records(capsys)
+    assert {'file': missing, 'exception': 'FileNotFoundError: ' + missing} in records
+    assert [r['line'] for r in records if r['file'] == acl2] == [9, 11, 12, 13]
+
+    valid = tmp_path / 'valid'
+    valid.write_text('permit tcp any any eq 80\n')
+    assert main(['audit', '-j', '1', str(valid)]) == 0
+    assert capsys.readouterr().out == ''
+
+
+def test_cli_convert(capsys, tmp_path, monkeypatch):
+    acl = tmp_path / 'acl'
+    acl.write_text('permit tcp 10.0.1.0 0.0.0.255 any eq 80\nremark web\n')
+    assert main(['convert-mask', '--from', 'wc', '--to', 'cidr', '-j', '2', str(acl), str(acl)]) == 0
+    records = _records(capsys)
+    assert len(records) == 4
+    assert records[0] == {'file': str(acl), 'line': 1, 'ace': 'permit tcp 10.0.1.0/24 any eq 80'}
+
+    monkeypatch.setattr('sys.stdin', io.StringIO('permit tcp any any eq 80\n'))
+    assert main(['translate-ports', '--to', 'name', '--output', 'text']) == 0
+    assert capsys.readouterr().out == 'permit tcp any any eq www\n'
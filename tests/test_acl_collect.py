@@ -0,0 +1,52 @@
+import asyncio
+import os.path
+from cisco_acl.collect import Collector, Device, FileTransport, TcpTransport, collect_and_audit, serve_acls
+
+acl2 = os.path.join(os.path.dirname(__file__), 'data/acl2')
+
+
+def test_collect_files(tmp_path):
+    devices = [Device('r1', acl2), Device('r2', str(tmp_path / 'missing'))]
+    results = {result.device.name: result for result in collect_and_audit(devices, FileTransport(), concurrency=1)}
+    assert sorted(results['r1'].errors) == [9, 11, 12, 13]
+    assert results['r1'].exception is None
+    assert results['r2'].exception.startswith('FileNotFoundError')
+
+
+def test_collect_tcp():
+    with open(acl2) as f:
+        acl = f.readlines()
+
+    async def run():
+        connections = []
+        server = await serve_acls({'show access-lists': acl, 'show run | i access-list': acl[:2]})
+        server_port = server.sockets[0].getsockname()[1]
+        address = '127.0.0.1:{0}'.format(server_port)
+
+        async def silent(reader, writer):
+            await reader.readline()
+            await asyncio.sleep(10)
+        hung = await asyncio.start_server(silent, '127.0.0.1', 0)
+        hung_address = '127.0.0.1:{0}'.format(hung.sockets[0].getsockname()[1])
+
+        class CountingTransport(TcpTransport):
+            async def connect(self, device):
+                connections.append(device.name)
+                return await super().connect(device)
+
+        devices = [
+            Device('r1', address, 'show access-lists'),
+            Device('r1-short', address, 'show run | i access-list'),
+            Device('hung', hung_address),
+        ]
+        async with Collector(CountingTransport(), concurrency=2, timeout=0.5) as collector:
+            results = {r.device.name: r async for r in collector.audit(devices)}
+        server.close()
+        hung.close()
+        return results, connections
+
+    results, connections = asyncio.run(run())
+    assert sorted(results['r1'].errors) == [9, 11, 12, 13]
+    assert results['r1-short'].errors == {}
+    assert results['hung'].exception.startswith('TimeoutError')
+    assert sorted(connections) == ['hung', 'r1']  # one connection to the address of r1 and r1-short
@@ -0,0 +1,91 @@
+import pytest
+from cisco_acl.convert_format import convert_format, convert_format_file, convert_line, iter_convert_format
+
+IOS = '''! edge filter
+remark web servers
+10 permit tcp 10.0.1.0 0.0.0.255 host 192.168.0.1 eq www 443 log
+20 permit udp any range 1024 65535 host 192.168.0.2 eq domain
+30 permit tcp any any established
+40 deny ip 10.0.0.0 0.255.0.255 any
+50 permit ahp any any
+'''
+
+ASA = '''access-list in line 1 remark web servers
+access-list in line 2 extended permit tcp any4 10.0.1.0 255.255.255.0 eq https (hitcnt=3) 0x1a2b
+access-list out line 1 extended permit tcp any any eq 22 (hitcnt=0) 0x3c4d
+access-list in line 3 extended deny tcp host 10.0.0.1 any eq ssh log
+access-list in line 4 extended permit tcp any host 2001:db8::1 eq 80
+'''
+
+
+def test_ios_to_asa():
+    converted, failed = convert_format(IOS.splitlines(), 'ios', 'asa', name='edge')
+    assert converted == [
+        'access-list edge remark web servers',
+        'access-list edge extended permit tcp 10.0.1.0 255.255.255.0 host 192.168.0.1 eq www log',
+        'access-list edge extended permit tcp 10.0.1.0 255.255.255.0 host 192.168.0.1 eq 443 log',
+        'access-list edge extended permit udp any range 1024 65535 host 192.168.0.2 eq domain',
+        'access-list edge extended permit 51 any any',
+    ]
+    assert [(conversion.line_num, conversion.error) for conversion in failed] == [
+        (5, 'Unsupported keyword on asa: established'),
+        (6, 'Non-contiguous mask: 10.0.0.0 0.255.0.255'),
+    ]
+
+
+def test_asa_to_ios():
+    converted, failed = convert_format(ASA.splitlines(), 'asa', 'ios', name='in')
+    # IOS has no 'https' or 'ssh' port names
+    assert converted == [
+        'remark web servers',
+        'permit tcp any 10.0.1.0 0.0.0.255 eq 443',
+        'deny tcp host 10.0.0.1 any eq 22 log',
+    ]
+    assert [(conversion.line_num, conversion.error) for conversion in failed] == [
+        (5, 'IPv6 host in an IPv4 ACL: host 2001:db8::1')]
+
+    # Without a name, the ACEs of every ACL are converted
+    assert len(list(iter_convert_format(ASA.splitlines(), 'asa', 'ios'))) == 5
+
+
+def test_convert_format_file_in_chunks(tmp_path):
+    input_file, output_file = str(tmp_path / 'acl.txt'), str(tmp_path / 'asa.txt')
+    with open(input_file, 'w') as f:
+        f.write(IOS * 50)
+
+    failed = convert_format_file(input_file, output_file, 'ios', 'asa', name='edge', jobs=2, chunk_size=16)
+    assert [conversion.line_num for conversion in failed][:4] == [5, 6, 12, 13]
+    with open(output_file) as f:
+        in_chunks = f.read().splitlines()
+    assert in_chunks == convert_format((IOS * 50).splitlines(), 'ios', 'asa', name='edge')[0]
+
+    # And back
+    converted, failed = convert_format(in_chunks, 'asa', 'ios')
+    assert not failed
+    assert converted[1] == 'permit tcp 10.0.1.0 0.0.0.255 host 192.168.0.1 eq www log'
+
+
+def test_port_names_that_are_keywords():
+    # 'echo' is port 7, not the keyword that follows the ports
+    assert convert_line('permit udp any any eq echo', 'ios', 'asa', name='X') == [
+        'access-list X extended permit udp any any eq echo']
+    assert convert_line('permit udp any any eq echo log', 'ios', 'asa', name='X') == [
+        'access-list X extended permit udp any any eq echo log']
+    assert convert_line('access-list X extended permit udp any any eq echo', 'asa', 'ios') == [
+        'permit udp any any eq echo']
+    conversions = list(iter_convert_format(['permit udp any any eq echo'], 'ios', 'asa', name='X'))
+    assert [conversion.converted for conversion in conversions] == [
+        ['access-list X extended permit udp any any eq echo']]
+
+
+def test_object_groups():
+    # Object-group names are case sensitive
+    assert convert_line('access-list X extended permit tcp object-group WebSrv object-group Dst eq www',
+                        'asa', 'ios') == ['permit tcp object-group WebSrv object-group Dst eq www']
+    assert convert_line('access-list X extended permit tcp any any object-group Ports', 'asa', 'ios') == [
+        'permit tcp any any object-group Ports']
+    # The ports of a protocol object-group are kept
+    assert convert_line('access-list X extended permit object-group SVC any any eq 80', 'asa', 'ios') == [
+        'permit object-group SVC any any eq 80']
+    with pytest.raises(ValueError):
+        convert_line('permit ip any any eq 80', 'ios', 'asa', name='X')
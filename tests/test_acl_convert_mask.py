@@ -1,4 +1,4 @@
-from cisco_acl.convert_mask import translate_mask
+from cisco_acl.convert_mask import translate_mask, iter_translate_mask, translate_mask_file
 
 
 def test_convert_mask():
@@ -18,3 +18,26 @@ def test_convert_mask():
     assert translate_mask(aces_with_wildcard, 'wc', 'subnet')[0] == aces_with_hostmask[0]
     assert translate_mask(aces_with_hostmask, 'subnet', 'cidr')[0] == aces_with_cidr[0]
     assert translate_mask(aces_with_hostmask, 'subnet', 'wc')[0] == aces_with_wildcard[0]
+
+
+def test_convert_mask_lines_are_independent(tmp_path):
+    aces = [
+        'permit tcp 10.1.1.0 0.0.0.255 any eq 443',
+        'remark 10.1.1.0 0.0.0.255 is not an ACE',
+        'permit tcp any host 10.1.1.0 eq 22',
+        'permit ip 10.1.2.0 0.0.1.255 10.0.0.0 0.255.255.255',
+        'permit ip 10.1.2.0 0.0.255.0 any',
+    ]
+    assert translate_mask(aces, 'wc', 'cidr') == [
+        'permit tcp 10.1.1.0/24 any eq 443',
+        'remark 10.1.1.0 0.0.0.255 is not an ACE',
+        'permit tcp any host 10.1.1.0 eq 22',
+        'permit ip 10.1.2.0/23 10.0.0.0/8',
+        'permit ip 10.1.2.0 0.0.255.0 any',
+    ]
+
+    source = tmp_path / 'acl'
+    source.write_text('\n'.join(aces) + '\n')
+    assert translate_mask_file(str(source), str(tmp_path / 'acl_cidr'), 'wc', 'cidr') == len(aces)
+    translated = (tmp_path / 'acl_cidr').read_text().splitlines()
+    assert list(iter_translate_mask(translated, 'cidr', 'wc'))[:4] == aces[:4]
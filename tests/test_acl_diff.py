@@ -0,0 +1,43 @@
+from cisco_acl.diff import canonical_rules, diff_acl
+
+OLD = [
+    'ip access-list extended edge',
+    ' remark web servers',
+    ' 10 permit tcp any 10.0.1.0 0.0.0.255 eq www 443',
+    ' 20 permit udp any host 10.0.0.53 eq domain',
+    ' 30 permit tcp any host 10.0.0.25 eq smtp',
+    ' 40 deny ip 192.168.0.0 0.0.255.255 any',
+    ' 50 permit icmp any any echo',
+    ' 60 deny ip any any log',
+]
+
+NEW = [
+    'ip access-list extended edge',
+    ' 5 deny ip 192.168.0.0 0.0.255.255 any',
+    ' 10 permit tcp any 10.0.1.0 0.0.0.255 eq 443 80',
+    ' 20 deny udp any 10.0.0.53 0.0.0.0 eq 53',
+    ' 35 permit tcp any host 10.0.0.22 eq 22',
+    ' 50 permit icmp any any echo',
+    ' 60 deny ip any any',
+]
+
+
+def test_canonical_rules():
+    rules = canonical_rules(OLD)
+    assert [rule.line_num for rule in rules] == [1, 3, 4, 5, 6, 7, 8]
+    assert rules[1].key == canonical_rules(NEW)[2].key
+    assert canonical_rules(['access-list out line 1 extended permit tcp any any eq https (hitcnt=3) 0x1a'])[0].key == \
+        canonical_rules(['access-list out extended permit tcp any any eq 443'])[0].key
+
+
+def test_diff_acl():
+    changes = [(change.kind, change.old and change.old.line_num, change.new and change.new.line_num)
+               for change in diff_acl(OLD, NEW)]
+    assert changes == [
+        ('moved', 3, 3),  # the deny moved before it, or it moved after the deny
+        ('changed', 4, 4),
+        ('removed', 5, None),
+        ('added', None, 5),
+        ('changed', 8, 7),
+    ]
+    assert diff_acl(OLD, OLD) == []
@@ -0,0 +1,44 @@
+from cisco_acl.extract import ConfigIndex
+
+config = b'''hostname fw1
+!
+object-group network servers
+ network-object host 10.0.0.1
+ network-object 10.1.0.0 255.255.255.0
+access-list out extended permit tcp any object-group servers eq www
+access-list out extended deny ip any object-group undefined
+interface GigabitEthernet0/0
+ nameif outside
+access-list in extended permit tcp any any eq 22
+access-list out remark added later
+access-list out extended permit udp any any eq domain
+ip access-list logging interval 10
+ip access-list extended mgmt
+ 10 permit tcp 10.0.0.0 0.0.0.255 any eq 22
+ 20 deny ip any any log
+!
+access-list 101 permit ip any any'''
+
+
+def test_config_index(tmp_path):
+    path = tmp_path / 'show-tech.txt'
+    path.write_bytes(config)
+    with ConfigIndex(str(path)) as index:
+        assert sorted(index) == ['101', 'in', 'mgmt', 'out']
+        assert len(index.spans['out']) == 2
+        assert index.formats == {'out': 'asa', 'in': 'asa', 'mgmt': 'ios', '101': 'ios'}
+        assert index.lines('mgmt') == [' 10 permit tcp 10.0.0.0 0.0.0.255 any eq 22', ' 20 deny ip any any log']
+        assert index.lines('101') == ['permit ip any any']
+        assert index.audit('101').errors == {}
+        assert len(index.acl('out')) == 3
+        assert 'servers' in index.object_groups()
+
+        auditor = index.audit('out')
+        assert auditor.errors == {2: 'Undefined object-group: undefined'}
+
+
+def test_empty_config(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    with ConfigIndex(str(path)) as index:
+        assert len(index) == 0
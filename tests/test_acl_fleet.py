@@ -0,0 +1,17 @@
+import os.path
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.fleet import audit_fleet, read_manifest
+
+
+def test_audit_fleet(tmp_path):
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    missing = os.path.join(data_dir, 'missing_acl')
+    manifest = str(tmp_path / 'failed.txt')
+
+    for jobs in [1, 2]:
+        results = {r.path: r for r in audit_fleet([data_dir, missing], jobs=jobs, manifest=manifest)}
+        acl2 = os.path.join(data_dir, 'acl2')
+        assert results[acl2].errors == AclAuditor(acl=acl2).errors
+        assert results[acl2].exception is None
+        assert results[missing].exception.startswith('FileNotFoundError')
+        assert read_manifest(manifest) == [missing]
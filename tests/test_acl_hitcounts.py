@@ -0,0 +1,48 @@
+import pytest
+from cisco_acl.hitcounts import HitCounts, MISSING, parse_hitcnt
+from cisco_acl.regexes import ace_match
+
+MONDAY = [
+    'access-list out extended permit tcp any any eq www (hitcnt=10) 0x1a',
+    'access-list out extended permit tcp any any eq 22 (hitcnt=0) 0x2b',
+    'access-list out extended deny ip any any (hitcnt=500) 0x3c',
+]
+FRIDAY = [
+    'access-list out line 1 extended permit tcp any any eq www (hitcnt=250) 0x1a',
+    'access-list out line 2 extended permit tcp any any eq 22 (hitcnt=0) 0x2b',
+    'access-list out line 3 extended deny ip any any (hitcnt=20) 0x3c',
+    'access-list out line 4 extended permit udp any any eq 53 (hitcnt=7) 0x4d',
+    'access-list out line 5 remark no hit count here',
+]
+
+
+def test_parse_hitcnt():
+    line = MONDAY[0]
+    assert parse_hitcnt(line) == (10, '0x1a', 'access-list out extended permit tcp any any eq www')
+    assert (ace_match(line)['hitcnt'], ace_match(line)['rule_hash']) == ('10', '0x1a')
+    assert parse_hitcnt('access-list out extended deny ip any any') is None
+    assert parse_hitcnt('access-list out extended deny ip any any (hitcnt=x) 0x1') is None
+
+
+def test_hitcounts():
+    hits = HitCounts()
+    assert hits.add('monday', 'fw1', MONDAY) == 3
+    assert hits.add('friday', 'fw1', FRIDAY) == 4
+    hits.add('friday', 'fw2', MONDAY[:1])
+    assert len(hits) == 5
+    assert hits.snapshots == ['monday', 'friday']
+    assert list(hits.counts('monday')) == [10, 0, 500, MISSING, MISSING]
+    assert hits.zero_hit() == [1]
+    assert hits.zero_hit('monday') == [1]
+    # 0x3c was cleared in between, 0x4d and fw2 did not exist on monday
+    assert list(hits.deltas('monday', 'friday')) == [240, 0, 20, -1, -1]
+    assert hits.unused() == [1]
+    assert hits.top(2, 'monday', 'friday') == [(0, 240), (2, 20)]
+    assert hits.top(2) == [(0, 250), (2, 20)]
+    assert hits.rule(4) == ('fw2', '0x1a', 'access-list out extended permit tcp any any eq www')
+
+    # Unknown snapshots are not created by lookups
+    for snapshot in ('sunday', 2):
+        with pytest.raises(KeyError):
+            hits.counts(snapshot)
+    assert hits.snapshots == ['monday', 'friday']
@@ -0,0 +1,43 @@
+from cisco_acl.index import FleetIndex
+
+FW1 = '''object-group network servers
+ network-object host 10.0.0.1
+ network-object host 10.0.0.2
+access-list out extended deny tcp any host 10.0.0.2 eq 443
+access-list out extended permit tcp any object-group servers eq 443
+access-list out extended permit udp 192.168.0.0 255.255.0.0 10.0.0.0 255.255.255.0 range 1000 2000
+access-list out extended permit tcp any host eq 22
+'''
+
+FW2 = '''access-list in extended permit ip any any
+'''
+
+
+def test_fleet_index(tmp_path):
+    for name, acl in (('fw1.txt', FW1), ('fw2.txt', FW2)):
+        with open(str(tmp_path / name), 'w') as f:
+            f.write(acl)
+
+    index = FleetIndex.build(str(tmp_path), 'asa', jobs=1)
+    assert index.failed == {}
+    # Object-group ACEs are expanded, the invalid ACE is skipped
+    assert len(index) == 5
+
+    hits = index.query(destination='10.0.0.2', protocol='tcp', port=443)
+    assert [(hit.path.rsplit('/', 1)[-1], hit.line_num, hit.action) for hit in hits] == [
+        ('fw1.txt', 4, 'deny'), ('fw1.txt', 5, 'permit'), ('fw2.txt', 1, 'permit')]
+    permitted = index.permitted_by(destination='10.0.0.2', protocol='tcp', port=443)
+    assert [hit.path.rsplit('/', 1)[-1] for hit in permitted] == ['fw2.txt']
+
+    # A network is only matched by ACEs covering all of it
+    assert [hit.line_num for hit in index.query(source='192.168.1.0/24', destination='10.0.0.0/24',
+                                                protocol='udp', port=1500)] == [6, 1]
+    assert [hit.line_num for hit in index.query(source='192.0.0.0/8', protocol='udp', port=1500)] == [1]
+    assert [hit.line_num for hit in index.query(protocol='udp', port=999)] == [1]
+
+    path = str(tmp_path / 'index.json.gz')
+    index.save(path)
+    loaded = FleetIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.query(destination='10.0.0.2', protocol='tcp', port=443) == hits
+    assert loaded.query(protocol='udp', port=1500) == index.query(protocol='udp', port=1500)
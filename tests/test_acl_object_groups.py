@@ -0,0 +1,108 @@
+import pytest
+from cisco_acl.ace import Ace, Network, ALL_PORTS, PERMIT
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.classify import CompiledAcl, Flow
+from cisco_acl.object_groups import ObjectGroups, Service
+
+config = [
+    'object-group network servers',
+    ' description web and mail servers',
+    ' network-object host 10.0.0.1',
+    ' network-object 10.1.0.0 255.255.255.0',
+    ' group-object more-servers',
+    'object-group network more-servers',
+    ' network-object range 10.2.0.0 10.2.0.255',
+    ' network-object 2001:db8::/32',
+    'object-group service web tcp',
+    ' port-object eq www',
+    ' port-object eq https',
+    'object-group service dns-and-ping',
+    ' service-object udp destination eq domain',
+    ' service-object icmp echo',
+    'object-group network loop-a',
+    ' group-object loop-b',
+    'object-group network loop-b',
+    ' group-object loop-a',
+    'access-list out extended permit tcp any object-group servers object-group web',
+    'access-list out extended permit object-group dns-and-ping any object-group servers',
+    'access-list out extended permit tcp object-group servers object-group servers object-group web',
+    'access-list out extended deny ip any object-group loop-a',
+    'access-list out extended deny ip any object-group undefined',
+    'access-list out extended deny ip any object-group web',
+]
+
+
+def test_object_groups():
+    groups = ObjectGroups.from_lines(config)
+    assert len(groups) == 6
+    assert 'servers' in groups
+    assert groups.networks('servers') == (
+        Network(0x0a000001, 0xffffffff, 4),
+        Network(0x0a010000, 0xffffff00, 4),
+        Network(0x0a020000, 0xffffff00, 4),
+        Network(0x20010db8 << 96, ((1 << 32) - 1) << 96, 6),
+    )
+    assert groups.networks('servers') is groups.networks('servers')
+    assert groups.services('web') == (
+        Service(6, ALL_PORTS, ((80, 80),), None),
+        Service(6, ALL_PORTS, ((443, 443),), None),
+    )
+    assert groups.services('dns-and-ping') == (
+        Service(17, ALL_PORTS, ((53, 53),), None),
+        Service(1, ALL_PORTS, ALL_PORTS, 'echo'),
+    )
+    echo = ObjectGroups.from_lines(['object-group service echo', ' service-object udp destination eq echo log'])
+    assert echo.services('echo') == (Service(17, ALL_PORTS, ((7, 7),), 'log'),)
+    with pytest.raises(ValueError):
+        groups.networks('loop-a')
+    with pytest.raises(ValueError):
+        groups.networks('undefined')
+    with pytest.raises(ValueError):
+        groups.networks('web')
+
+    ace = Ace.from_line(config[19])
+    expanded = groups.expand(ace)
+    assert len(expanded) == 8
+    assert expanded[0] == Ace(PERMIT, 17, destination=Network(0x0a000001, 0xffffffff, 4), destination_ports=((53, 53),))
+    assert expanded[4].keyword == 'echo'
+
+    ace = Ace.from_line(config[20])
+    assert all(a.destination_ports == ((80, 80), (443, 443)) for a in groups.expand(ace))
+    assert len(groups.expand(ace)) == 16
+
+
+def test_object_groups_protocol_ports():
+    groups = ObjectGroups.from_lines([
+        'object-group protocol web-protocols',
+        ' protocol-object tcp',
+        ' protocol-object udp',
+        ' protocol-object icmp',
+    ])
+    ace = Ace.from_line('access-list out extended permit object-group web-protocols any host 10.0.0.1 eq www 8080')
+    assert [(a.protocol, a.destination_ports) for a in groups.expand(ace)] == [
+        (6, ((80, 80), (8080, 8080))),
+        (17, ((80, 80), (8080, 8080))),
+    ]
+    ace = Ace.from_line('access-list out extended permit object-group web-protocols any any')
+    assert [(a.protocol, a.destination_ports) for a in groups.expand(ace)] == [
+        (6, ALL_PORTS), (17, ALL_PORTS), (1, ALL_PORTS),
+    ]
+
+
+def test_object_groups_audit():
+    acl = AclAuditor(acl=config, format='asa')
+    assert acl.errors == {
+        22: 'Circular object-group reference: loop-a',
+        23: 'Undefined object-group: undefined',
+        24: 'Object-group web is not a network object-group',
+    }
+    assert list(AclAuditor(acl=config, format='asa', stream=True).iter_audit()) == sorted(acl.errors.items())
+
+
+def test_object_groups_classify():
+    groups = ObjectGroups.from_lines(config)
+    compiled = CompiledAcl(AclAuditor(acl=config, format='asa').to_acl().items(), groups=groups)
+    assert compiled.skipped == []  # lines with errors are left out of to_acl()
+    assert compiled.match(Flow('192.0.2.1', '10.1.0.9', 'tcp', 40000, 443)) == 19
+    assert compiled.match(Flow('192.0.2.1', '10.2.0.9', 'udp', 40000, 53)) == 20
+    assert compiled.match(Flow('192.0.2.1', '10.3.0.9', 'udp', 40000, 53)) is None
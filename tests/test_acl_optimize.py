@@ -0,0 +1,53 @@
+from cisco_acl.ace import Acl, Ace
+from cisco_acl.optimize import optimize, verify, to_lines, collapse_networks, merge_ranges
+
+ACL = [
+    'permit tcp any 10.0.0.0 0.0.0.127 eq 22',
+    'permit tcp any 10.0.0.128 0.0.0.127 eq 22',
+    'deny tcp any 10.0.1.0 0.0.0.255 eq 22',
+    'permit tcp any 10.0.1.0 0.0.0.255 eq 22',  # shadowed
+    'permit tcp any 10.0.2.0 0.0.0.255 eq 22',  # not merged with 10.0.0.0/24, the deny is in between
+    'permit udp host 192.0.2.1 any eq 53',
+    'permit udp host 192.0.2.1 any eq 123',
+    'permit udp host 192.0.2.1 any range 1000 2000',
+    'permit udp host 192.0.2.1 any gt 65535',  # no port: kept as it is
+    'deny ip any any log',
+]
+
+
+def test_collapse():
+    networks = [Ace.from_line('permit ip 10.0.{0}.0 0.0.0.255 any'.format(i)).source for i in range(4)]
+    assert [Ace(1, 0, network).source for network in collapse_networks(networks)] == \
+        [Ace.from_line('permit ip 10.0.0.0 0.0.3.255 any').source]
+    assert collapse_networks(networks + ['object-group web']) == ['object-group web'] + \
+        collapse_networks(networks)
+    assert merge_ranges([(22, 22), (20, 21), (1000, 2000), (1500, 2500)]) == ((20, 22), (1000, 2500))
+
+
+def test_optimize():
+    acl = Acl.from_lines(ACL)
+    optimized = optimize(acl.items())
+    assert to_lines(optimized) == [
+        'permit tcp any 10.0.0.0 0.0.0.255 eq 22',
+        'deny tcp any 10.0.1.0 0.0.0.255 eq 22',
+        'permit tcp any 10.0.2.0 0.0.0.255 eq 22',
+        'permit udp host 192.0.2.1 any eq 53 123',
+        'permit udp host 192.0.2.1 any range 1000 2000',
+        'permit udp host 192.0.2.1 any gt 65535',
+        'deny ip any any log',
+    ]
+    assert to_lines(optimized[:1], 'asa', 'out') == [
+        'access-list out extended permit tcp any 10.0.0.0 255.255.255.0 eq 22']
+    assert verify(acl.items(), optimized) == []
+
+
+def test_optimize_port_names():
+    # 'echo' is port 7, not an ACE matching nothing
+    acl = Acl.from_lines(['permit udp any any eq echo', 'deny ip any any'])
+    assert to_lines(optimize(acl.items())) == ['permit udp any any eq 7', 'deny ip any any']
+
+
+def test_verify_differences():
+    acl = Acl.from_lines(ACL)
+    broken = [Ace.from_line(line) for line in ACL[2:]]
+    assert verify(acl.items(), broken)
@@ -1,4 +1,4 @@
-from cisco_acl.port_translations import PortTranslator
+from cisco_acl.port_translations import PortTranslator, translate_acl
 
 
 def test_port_translator():
@@ -17,3 +17,25 @@ def test_port_translator():
     line = 'access-list test extended permit tcp any any eq 443'
     translated = 'access-list test extended permit tcp any any eq https'
     assert PortTranslator(line).translate_ace(acl_format='asa', conversion_type='to_name') == translated
+
+
+def test_translate_acl():
+    lines = [
+        'remark web servers',
+        'permit tcp any any eq 80 8080',
+        'permit udp any eq 53 any',
+        'permit ip any any',
+        'access-list test extended permit tcp any any eq 80 (hitcnt=0) 0x0540b3cb',
+    ]
+    assert list(translate_acl(lines, 'asa', 'to_name')) == [
+        'remark web servers',
+        'permit tcp any any eq www 8080',
+        'permit udp any eq domain any',
+        'permit ip any any',
+        'access-list test extended permit tcp any any eq www (hitcnt=0) 0x0540b3cb',
+    ]
+    assert list(translate_acl(['permit tcp any any eq www 8080'], 'ios', 'to_number')) == [
+        'permit tcp any any eq 80 8080'
+    ]
+    for line in lines[1:]:
+        assert next(translate_acl([line], 'ios', 'to_name')) == PortTranslator(line).translate_ace('ios', 'to_name')
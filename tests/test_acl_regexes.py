@@ -9,7 +9,9 @@ Tests for `regexes` module.
 """
 
 import os
-from cisco_acl.regexes import ace_match
+import subprocess
+import sys
+from cisco_acl.regexes import ace_match, ace_regex_match, ace_tokenize
 
 
 def test_acl_regexes():
@@ -28,3 +30,51 @@ def test_acl_regexes():
 def test_bad_ace():
     ace = 'permit tcp any host eq 80'
     assert ace_match(ace) is False
+
+
+def test_tokenizer_matches_regex():
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    aces = [
+        'permit tcp any any eq 80 log',
+        'permit tcp any any eq www log',
+        'permit tcp any eq 80 443 any',
+        'permit tcp any eq www host foo any',
+        'permit udp any4 host 2001:420:210d::a range 1000 2000 log',
+        'permit object-group svc any any',
+        'permit 17 object-group nets eq 53 addrgroup dns-servers',
+        'deny icmp any any echo-reply',
+        '10 access-list outside extended permit tcp any any eq 80 (hitcnt=1) 0x1e3b4c5d',
+        'access-list outside extended permit tcp any any eq www log (hitcnt=0) 0x0540b3cb',
+        'access-list outside extended permit tcp any any range 1 2 (hitcnt=0) 0x0540b3cb',
+        'access-list outside extended deny ip any any (hitcnt=12) 0x1e3b4c5d',
+        'permit tcp any any neq 80',
+        'permit tcp any any eq 80 443 8080 host 1.1.1.1',
+        'permit tcp any any eq 80 www established',
+        'permit tcp any any eq www 80 established',
+        'permit tcp any host 2001:420:210d::a::1 eq 80',
+        'access-list outside extended permit tcp any eq 80 www (hitcnt=3) 0x1e3b4c5d',
+    ]
+    for name in ['acl1', 'acl2']:
+        with open(os.path.join(data_dir, name)) as f:
+            aces.extend(line.strip() for line in f)
+
+    for ace in aces:
+        permission = ace_tokenize(ace)
+        if permission is not None:
+            assert permission == ace_regex_match(ace), ace
+        assert ace_match(ace) == ace_regex_match(ace), ace
+
+
+def test_lazy_import():
+    """ Importing the package does not compile the ACE regex nor load the port tables """
+    code = '\n'.join([
+        'import cisco_acl.acl_audit',
+        'from cisco_acl import regexes, port_translations',
+        'assert not regexes._compiled and not port_translations._tables',
+        'regexes.ace_match("permit tcp any any eq 80")',
+        'assert "cisco_acl_re" not in regexes._compiled',
+        'assert regexes.cisco_acl_re.match("permit tcp any any eq 80")',
+        'assert port_translations.translate_port("ios", "tcp", ["80"], "to_name") == ["www"]',
+        'assert "www" in port_translations.translation_groups["ios"]["tcp"]',
+    ])
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,46 @@
+from cisco_acl.ace import Ace, Acl
+from cisco_acl.optimize import verify
+from cisco_acl.reorder import dependencies, read_hit_counts, reorder
+
+SHOW_ACCESS_LIST = '''access-list out; 5 elements; name hash: 0x4a5b
+access-list out line 1 remark web servers
+access-list out line 2 extended deny tcp any host 10.0.0.1 eq 22 (hitcnt=3) 0x01
+access-list out line 3 extended permit tcp any 10.0.0.0 255.255.255.0 eq 22 (hitcnt=50) 0x02
+access-list out line 4 extended permit tcp any object-group servers eq www (hitcnt=400) 0x03
+  access-list out line 4 extended permit tcp any host 10.0.0.1 eq www (hitcnt=400) 0xa1
+access-list out line 5 extended deny ip any host 10.0.0.9 (hitcnt=0) 0x04
+access-list out line 6 extended permit udp any any eq 53 (hitcnt=900) 0x05
+'''
+
+
+def test_overlaps():
+    web = Ace.from_line('permit tcp any 10.0.0.0 0.0.0.255 eq 80')
+    assert web.overlaps(Ace.from_line('deny ip any host 10.0.0.1'))
+    assert not web.overlaps(Ace.from_line('deny udp any host 10.0.0.1 eq 80'))
+    assert not web.overlaps(Ace.from_line('deny tcp any host 10.0.1.1 eq 80'))
+    assert not web.overlaps(Ace.from_line('deny tcp any host 10.0.0.1 range 81 90'))
+    assert web.overlaps(Ace.from_line('deny tcp any object-group servers'))
+
+
+def test_reorder():
+    aces, hits = read_hit_counts(SHOW_ACCESS_LIST.splitlines())
+    assert [line_num for line_num, _ in aces] == [3, 4, 5, 7, 8]
+    assert hits == {3: 3, 4: 50, 5: 400, 7: 0, 8: 900}
+
+    # The object-group may contain 10.0.0.9
+    assert dependencies(aces) == {3: [], 4: [3], 5: [], 7: [4, 5], 8: [7]}
+
+    reordering = reorder(aces, hits)
+    # 8 must stay after the deny for 10.0.0.9, which must stay after 4 and the object-group
+    assert reordering.order == [5, 3, 4, 7, 8]
+    assert reordering.depth_after < reordering.depth_before
+
+    aces_by_line = dict(aces)
+    assert verify(aces, [aces_by_line[line_num] for line_num in reordering.order]) == []
+
+
+def test_reorder_port_names():
+    # 'echo' is port 7: the deny overlaps the permit and must stay first
+    acl = Acl.from_lines(['deny udp any any eq echo', 'permit udp any any'])
+    assert dependencies(acl.items()) == {1: [], 2: [1]}
+    assert reorder(acl.items(), {1: 1, 2: 1000}).order == [1, 2]
@@ -0,0 +1,77 @@
+import threading
+import time
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.resolve import HostsFileResolver, TTLCache, resolve_audits, resolve_names
+
+
+class SlowResolver:
+    """ Counts lookups, takes 0.1s per name, fails for names starting with 'timeout' """
+
+    def __init__(self):
+        self.lookups = []
+        self.lock = threading.Lock()
+
+    def resolve(self, name):
+        with self.lock:
+            self.lookups.append(name)
+        time.sleep(0.1)
+        if name.startswith('timeout'):
+            raise OSError('timed out')
+        return ('10.0.0.1',) if name.endswith('.example.com') else ()
+
+
+def test_hosts_file_resolver(tmp_path):
+    path = str(tmp_path / 'hosts')
+    with open(path, 'w') as f:
+        f.write('# static names\n10.0.0.1 www.example.com www\n2001:db8::1 WWW.example.com\n\n')
+    resolver = HostsFileResolver(path)
+    assert resolver.resolve('www.EXAMPLE.com') == ('10.0.0.1', '2001:db8::1')
+    assert resolver.resolve('www') == ('10.0.0.1',)
+    assert resolver.resolve('mail') == ()
+
+
+def test_ttl_cache():
+    now = [0]
+    cache = TTLCache(ttl=300, negative_ttl=60, clock=lambda: now[0])
+    cache.put('www', ('10.0.0.1',))
+    cache.put('missing', ())
+    now[0] = 100
+    assert cache.get('www') == ('10.0.0.1',)
+    assert cache.get('missing') is None
+    now[0] = 300
+    assert cache.get('www') is None
+    assert len(cache) == 0
+
+
+def test_resolve_names_concurrently():
+    resolver = SlowResolver()
+    cache = TTLCache()
+    names = ['host{0}.example.com'.format(i) for i in range(20)] + ['nxdomain', 'timeout']
+    start = time.perf_counter()
+    addresses = resolve_names(names + names, resolver, cache, workers=16)
+    assert time.perf_counter() - start < 1
+    assert sorted(resolver.lookups) == sorted(names)
+    assert addresses['host0.example.com'] == ('10.0.0.1',)
+    assert addresses['nxdomain'] == addresses['timeout'] == ()
+
+    # Lookup failures are not cached
+    resolve_names(names, resolver, cache)
+    assert resolver.lookups[len(names):] == ['timeout']
+
+
+def test_resolve_audits():
+    resolver = SlowResolver()
+    first = AclAuditor(acl=['permit tcp any host www.example.com eq 80',
+                            'permit tcp host nxdomain host nxdomain',
+                            'permit tcp any host 10.0.0.1 eq 22'], shadowing=False)
+    second = AclAuditor(acl=['deny ip host nxdomain any', 'permit tcp any host skipped eq notaport'], shadowing=False)
+    assert first.errors == {}
+    assert list(second.errors) == [2]
+
+    addresses = resolve_audits([first, second], resolver)
+    # Every name once, except the names of ACEs with errors
+    assert sorted(resolver.lookups) == ['nxdomain', 'www.example.com']
+    assert addresses['www.example.com'] == ('10.0.0.1',)
+    assert first.errors == {2: 'Unresolvable host: nxdomain'}
+    assert second.errors[1] == 'Unresolvable host: nxdomain'
+    assert second.errors[2].startswith('Invalid port')
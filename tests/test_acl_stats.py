@@ -0,0 +1,46 @@
+import json
+from cisco_acl.acl_audit import AclAuditor
+from cisco_acl.cache import AuditCache
+from cisco_acl.stats import AuditStats
+
+acl = [
+    'permit tcp any any eq 80',
+    'permit tcp any host eq 22',
+    '',
+    'permit tcp any 1.1.1.0 0.0.0.255 eq notaport',
+    'permit tcp any any eq 80',
+]
+
+
+def test_audit_stats():
+    events = []
+    stats = AuditStats(slowest=2)
+    AclAuditor(acl=acl, stats=stats, hook=lambda *event: events.append(event))
+    assert dict(stats.counters) == {
+        'lines_read': 5, 'lines_matched': 3, 'lines_failed': 1, 'errors': 2, 'warnings': 1,
+    }
+    assert stats.calls['parse'] == 4
+    assert stats.calls['networks'] == 1  # networks are checked in one batch
+    assert stats.wall['total'] >= stats.wall['parse']
+    assert len(stats.slowest()) == 2
+    assert {line_num for line_num, seconds in stats.slowest(10)} == {1, 2, 3, 4, 5}
+    assert len(events) == sum(stats.calls.values())
+    assert events[-1][:2] == ('total', None)
+    assert json.loads(json.dumps(stats.as_dict()))['counters'] == dict(stats.counters)
+    assert 'shadowing' in stats.report()
+
+    with AuditCache(':memory:') as cache:
+        stats = AuditStats()
+        AclAuditor(acl=acl, cache=cache, stats=stats)
+        assert (stats.counters['cache_hits'], stats.counters['cache_misses']) == (0, 4)
+
+    stats = AuditStats()
+    errors = list(AclAuditor(acl=acl, stats=stats, stream=True).iter_audit())
+    assert len(errors) == 2
+    assert stats.counters['lines_read'] == 5
+    assert stats.calls['audit_line'] == 5
+
+
+def test_audit_without_stats():
+    auditor = AclAuditor(acl=acl)
+    assert '_parse_line' not in vars(auditor)
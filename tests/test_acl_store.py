@@ -0,0 +1,70 @@
+import os
+from cisco_acl.store import AclStore
+from cisco_acl.resolve import HostsFileResolver
+
+ACL = '''object-group network servers
+ network-object host 10.0.0.1
+access-list out extended permit tcp any object-group servers eq www
+access-list out extended permit tcp any host eq 22
+access-list out extended permit tcp any object-group servers eq 80
+'''
+
+
+def test_acl_store(tmp_path):
+    acl_path = str(tmp_path / 'acl.txt')
+    with open(acl_path, 'w') as f:
+        f.write(ACL)
+
+    db = str(tmp_path / 'store.db')
+    with AclStore(db) as store:
+        audited = store.audit(acl_path, 'asa')
+        assert (store.hits, store.misses) == (0, 1)
+
+    with AclStore(db) as store:
+        loaded = store.audit(acl_path, 'asa')
+        assert (store.hits, store.misses) == (1, 0)
+        for attribute in ('aces', 'permissions', 'errors', 'warnings'):
+            assert getattr(loaded, attribute) == getattr(audited, attribute)
+        assert loaded.warnings == {5: 'Redundant ACE: already permitted by line 3'}
+        assert 'servers' in loaded.object_groups
+
+        # Touched, not changed
+        os.utime(acl_path, ns=(0, 0))
+        assert store.load(acl_path, 'asa') is not None
+        # Stored per format and shadowing option
+        assert store.load(acl_path, 'ios') is None
+        assert store.load(acl_path, 'asa', shadowing=False) is None
+
+        with open(acl_path, 'a') as f:
+            f.write('access-list out extended deny ip any any\n')
+        assert store.load(acl_path, 'asa') is None
+        assert 6 in store.audit(acl_path, 'asa').permissions
+        assert len(store) == 1
+
+
+def test_acl_store_namespace(tmp_path):
+    db = str(tmp_path / 'store.db')
+    acl_path = str(tmp_path / 'acl.txt')
+    with open(acl_path, 'w') as f:
+        f.write(ACL)
+    with AclStore(db) as store:
+        store.audit(acl_path, 'asa')
+        store._db.execute("UPDATE meta SET value = 'old' WHERE key = 'namespace'")
+        store._db.commit()
+    with AclStore(db) as store:
+        assert len(store) == 0
+
+
+def test_acl_store_resolver(tmp_path):
+    acl_path = str(tmp_path / 'acl.txt')
+    with open(acl_path, 'w') as f:
+        f.write('permit tcp any host www.example.com eq 80\npermit tcp any host mail.example.com eq 25\n')
+
+    with AclStore(str(tmp_path / 'store.db')) as store:
+        resolver = HostsFileResolver(['10.0.0.1 www.example.com'])
+        assert store.audit(acl_path, resolver=resolver).errors == {2: 'Unresolvable host: mail.example.com'}
+        # Host names are resolved again, not loaded from the store
+        assert store.audit(acl_path).errors == {}
+        resolver = HostsFileResolver(['10.0.0.1 www.example.com', '10.0.0.2 mail.example.com'])
+        assert store.audit(acl_path, resolver=resolver).errors == {}
+        assert (store.hits, store.misses) == (2, 1)
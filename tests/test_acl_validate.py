@@ -0,0 +1,35 @@
+from cisco_acl.validate import batch_network_errors, network_errors
+
+networks = [
+    'any',
+    'any4',
+    'host 10.0.0.1',
+    'HOST 10.0.0.1',
+    'host 10.0.0.256',
+    'host 010.0.0.1',
+    'host 2001:db8::1',
+    'host server-1',
+    'host bad!name',
+    '10.0.0.0 0.0.0.255',
+    '10.0.0.0 255.255.255.0',
+    '10.0.0.1 0.0.0.0',
+    '10.0.0.1 255.255.255.255',
+    '10.0.0.0 255.0.255.0',
+    '10.0.0.0 0.0.0.256',
+    '10.0.0.1 255.255.255.0',
+    'object-group servers',
+    'object-group !servers',
+    '10.0.0.0',
+]
+
+
+def test_batch_network_errors():
+    errors = batch_network_errors(networks * 2)
+    assert len(errors) == len(networks)
+    for network in networks:
+        assert errors[network] == tuple(network_errors(network)), network
+    assert [network for network in networks if not errors[network]] == [
+        'any', 'host 10.0.0.1', 'host 2001:db8::1', 'host server-1', 'host bad!name', '10.0.0.0 0.0.0.255',
+        '10.0.0.0 255.255.255.0',
+        '10.0.0.1 255.255.255.255', 'object-group servers',
+    ]